@@ -0,0 +1,18 @@
+# Render resized variants for every listing image that has none yet.
+# Run once after a deploy (not in every worker):
+#
+#     python -m app.backfill_variants
+
+from app.core.database import SessionLocal
+from app.models import user, seller, listing, listing_image, listing_image_variant, chat, conversation  # noqa: F401
+from app.services.image_variants import image_variants
+
+# The render processes are spawned and re-import this module, so only
+# the parent does the work
+if __name__ == "__main__":
+    with SessionLocal() as db:
+        queued = image_variants.backfill(db)
+    print(f"Rendering variants for {queued} images...")
+    image_variants.join()
+    image_variants.stop()
+    print(f"Done: {image_variants.completed} rendered, {image_variants.failed} failed")
@@ -9,4 +9,25 @@ class Settings:
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+    # Search relevance blend (sort=relevance)
+    SEARCH_TEXT_WEIGHT = float(os.getenv("SEARCH_TEXT_WEIGHT", "0.7"))
+    SEARCH_POPULARITY_WEIGHT = float(os.getenv("SEARCH_POPULARITY_WEIGHT", "0.2"))
+    SEARCH_RECENCY_WEIGHT = float(os.getenv("SEARCH_RECENCY_WEIGHT", "0.1"))
+    SEARCH_RECENCY_HALF_LIFE_DAYS = float(os.getenv("SEARCH_RECENCY_HALF_LIFE_DAYS", "30"))
+
+    # Uploaded files (listing images, profile pictures, logos)
+    UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+    MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+    # Internal nginx location holding UPLOAD_DIR; when set, /uploads
+    # answers with X-Accel-Redirect and nginx sends the file itself
+    UPLOADS_ACCEL_REDIRECT_PREFIX = os.getenv("UPLOADS_ACCEL_REDIRECT_PREFIX")
+    # Processes resizing listing images into thumb/card/full variants
+    IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+
+    # redis://[:password@]host:port used to fan chat events out across
+    # workers; unset keeps chat delivery inside this process
+    CHAT_BROKER_URL = os.getenv("CHAT_BROKER_URL")
+    # Threads running the chat WebSocket's database reads
+    CHAT_DB_THREADS = int(os.getenv("CHAT_DB_THREADS", "4"))
+
 settings = Settings()
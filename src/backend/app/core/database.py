@@ -1,7 +1,19 @@
+from typing import List
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from app.core.config import settings
 
 engine = create_engine(settings.DB_URL, echo=True, future=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+
+def inserted_ids(db: Session, lastrowid: int, count: int) -> List[int]:
+    """
+    Ids of the rows of one multi-row INSERT, in VALUES order. InnoDB
+    gives such a statement consecutive ids (auto_increment_increment = 1)
+    and reports the first as lastrowid; SQLite reports the last.
+    """
+    first = lastrowid - count + 1 if db.get_bind().dialect.name == "sqlite" else lastrowid
+    return list(range(first, first + count))
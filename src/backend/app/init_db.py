@@ -1,5 +1,40 @@
-from app.core.database import Base, engine
-from app.models import user, listing
+from sqlalchemy import inspect, text
+
+from app.core.database import Base, engine, SessionLocal
+from app.models import user, seller, listing, listing_image, listing_image_variant, search_query, search_rollup, chat, conversation
+from app.services.search_rollups import backfill_search_rollups
+from app.services.conversations import backfill_conversations
 
 print("Creating database tables...")
 Base.metadata.create_all(bind=engine)
+
+# create_all skips tables that already exist, so add indexes introduced
+# since they were created
+for index in chat.ChatMessage.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+
+# ...and drop the ones that are no longer used
+RETIRED_INDEXES = {"chat_messages": ["ix_chat_messages_listing_receiver_sender"]}
+for table, names in RETIRED_INDEXES.items():
+    existing = {i["name"] for i in inspect(engine).get_indexes(table)}
+    for name in names:
+        if name in existing:
+            print(f"Dropping index {name}...")
+            on_table = "" if engine.dialect.name == "sqlite" else f" ON {table}"
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP INDEX {name}{on_table}"))
+
+# ...and columns
+for table in ("listings", "sellers"):
+    if "version" not in {c["name"] for c in inspect(engine).get_columns(table)}:
+        print(f"Adding {table}.version...")
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+with SessionLocal() as db:
+    if not db.query(search_rollup.SearchQueryRollup).first():
+        print("Backfilling search rollups...")
+        backfill_search_rollups(db)
+    if not db.query(conversation.Conversation).first() and db.query(chat.ChatMessage).first():
+        print("Backfilling conversations...")
+        backfill_conversations(db)
@@ -1,13 +1,40 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from app.routers import auth, listings, users, admin_users, sellers, chat, item_interactions, search
 from fastapi.middleware.cors import CORSMiddleware
 import os
-from fastapi.staticfiles import StaticFiles
+from app.utils.upload_files import UploadFiles
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.listing_service import load_listing_indexes
+from app.services.search_log import search_log
+from app.services.image_variants import image_variants
+from app.services.chat_broker import chat_broker
+from app.services.chat_store import chat_writer
 
 # Make sure uploads folder exists in project root
-os.makedirs("uploads", exist_ok=True)
+os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    with SessionLocal() as db:
+        load_listing_indexes(db)
+    search_log.start()
+    await chat_broker.start()
+
+    yield
 
-app = FastAPI(title="Constructify API")
+    # Shutdown: flush what is still buffered
+    search_log.stop()
+    image_variants.stop()
+    await chat_broker.stop()
+    chat_writer.stop()
+
+
+app = FastAPI(title="Constructify API", lifespan=lifespan)
 
 origins = [
     "http://localhost",
@@ -21,9 +48,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[chat.NEXT_BEFORE_ID_HEADER],
 )
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+
+app.mount(
+    "/uploads",
+    UploadFiles(
+        directory=settings.UPLOAD_DIR,
+        accel_redirect_prefix=settings.UPLOADS_ACCEL_REDIRECT_PREFIX,
+    ),
+    name="uploads",
+)
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(listings.router, prefix="/listings", tags=["Listings"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
@@ -1,10 +1,19 @@
-from sqlalchemy import Column, BigInteger, Text, ForeignKey, TIMESTAMP, func
+from sqlalchemy import Column, BigInteger, Text, ForeignKey, TIMESTAMP, Index, func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    # History pages read newest id first, one leg per direction. A
+    # user's whole history needs id right after the user's column, hence
+    # one index per direction. With one partner both legs fix listing,
+    # sender and receiver, so a single index ending in id serves both.
+    __table_args__ = (
+        Index("ix_chat_messages_listing_sender", "listing_id", "sender_id", "id"),
+        Index("ix_chat_messages_listing_receiver", "listing_id", "receiver_id", "id"),
+        Index("ix_chat_messages_listing_sender_receiver", "listing_id", "sender_id", "receiver_id", "id"),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     sender_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
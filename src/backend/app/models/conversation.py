@@ -0,0 +1,28 @@
+from sqlalchemy import Column, BigInteger, String, Integer, ForeignKey, TIMESTAMP, Index, UniqueConstraint
+from app.core.database import Base
+
+
+class Conversation(Base):
+    """
+    One row per (listing, pair of users) chat, kept current as messages
+    are saved, so the inbox never reads chat_messages. The pair is stored
+    ordered (user_a_id < user_b_id); unread counts are per side.
+    """
+    __tablename__ = "conversations"
+    __table_args__ = (
+        UniqueConstraint("listing_id", "user_a_id", "user_b_id", name="uq_conversation_participants"),
+        # Inbox pages for either participant, most recent first
+        Index("ix_conversations_user_a_recent", "user_a_id", "last_message_at", "id"),
+        Index("ix_conversations_user_b_recent", "user_b_id", "last_message_at", "id"),
+    )
+
+    id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
+    listing_id = Column(BigInteger, ForeignKey("listings.id", ondelete="CASCADE"), nullable=False)
+    user_a_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_b_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    last_message_id = Column(BigInteger, nullable=False)
+    last_sender_id = Column(BigInteger, nullable=False)
+    last_message_preview = Column(String(255), nullable=False)
+    last_message_at = Column(TIMESTAMP, nullable=False)
+    unread_a = Column(Integer, nullable=False, default=0)  # unread by user_a
+    unread_b = Column(Integer, nullable=False, default=0)  # unread by user_b
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, BigInteger, String, Text, ForeignKey, DECIMAL, DateTime, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, BigInteger, Integer, String, Text, ForeignKey, DECIMAL, DateTime, func, select, text
+from sqlalchemy.orm import column_property, relationship
 from app.core.database import Base
+from app.models.seller import Seller
 
 class Listing(Base):
     __tablename__ = "listings"
@@ -14,6 +15,15 @@ class Listing(Base):
     seller_id = Column(BigInteger, ForeignKey("sellers.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Goes up by one on every UPDATE of the row. Caches of the listing's
+    # payload compare this rather than updated_at, which only has
+    # one-second precision in MySQL.
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=text("version + 1"))
+    # The seller's users.id, which chat addresses them by. Loaded with the
+    # row as a correlated subquery, so no extra round trip per listing.
+    seller_user_id = column_property(
+        select(Seller.user_id).where(Seller.id == seller_id).correlate_except(Seller).scalar_subquery()
+    )
 
     # Relationships
     seller = relationship("Seller", back_populates="listings")
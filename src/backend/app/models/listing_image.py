@@ -11,3 +11,4 @@ class ListingImage(Base):
     is_primary = Column(Boolean, default=False)
 
     listing = relationship("Listing", back_populates="images")
+    variants = relationship("ListingImageVariant", back_populates="image", cascade="all, delete-orphan")
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, BigInteger, String, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+class ListingImageVariant(Base):
+    """A resized/recompressed copy of a listing image (thumb, card_webp, ...)."""
+    __tablename__ = "listing_image_variants"
+    __table_args__ = (
+        UniqueConstraint("image_id", "name", name="uq_listing_image_variant"),
+    )
+
+    id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
+    image_id = Column(BigInteger, ForeignKey("listing_images.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String(20), nullable=False)
+    url = Column(String(255), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+
+    image = relationship("ListingImage", back_populates="variants")
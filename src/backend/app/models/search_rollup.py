@@ -0,0 +1,16 @@
+from sqlalchemy import Column, BigInteger, String, Integer, DateTime, UniqueConstraint
+from app.core.database import Base
+
+class SearchQueryRollup(Base):
+    """Search counts per hour, normalized query text and category."""
+    __tablename__ = "search_query_rollups"
+    __table_args__ = (
+        UniqueConstraint("bucket", "query_text", "category", name="uq_search_rollup_key"),
+    )
+
+    id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
+    bucket = Column(DateTime, index=True, nullable=False)  # start of the hour
+    query_text = Column(String(512), nullable=False)
+    category = Column(String(100), nullable=False, default="")
+    searches = Column(Integer, nullable=False, default=0)
+    low_result_searches = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String, ForeignKey, TIMESTAMP, func, Enum
+from sqlalchemy import Column, BigInteger, Integer, String, ForeignKey, TIMESTAMP, func, Enum, text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import enum
@@ -19,6 +19,9 @@ class Seller(Base):
     status = Column(Enum(SellerStatus), default=SellerStatus.pending, nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    # Goes up by one on every UPDATE of the row; the profile's ETag uses
+    # it because updated_at cannot tell two edits in one second apart.
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=text("version + 1"))
 
     # Relationships
     user = relationship("User", back_populates="seller_profile")
@@ -1,27 +1,40 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status, Depends, HTTPException, Request
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status, Depends, HTTPException, Request, Response, Query
 from sqlalchemy.orm import Session
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import json
 import logging
 from datetime import datetime
 
-from app.models.chat import ChatMessage
 from app.models.listing import Listing
 from app.models.user import User
 from app.core.security import decode_access_token
 from app.utils.dependencies import get_db
-from app.core.database import SessionLocal
-from app.schemas.chat import ChatMessageResponse
+from app.schemas.chat import ChatMessageResponse, ConversationPage
 from app.utils.dependencies import get_current_user
+from app.services.chat_broker import chat_broker, parse_user_channel, user_channel
+from app.services.chat_context import ChatContext
+from app.services.chat_store import (
+    DEFAULT_HISTORY_LIMIT,
+    MAX_HISTORY_LIMIT,
+    chat_writer,
+    message_history,
+)
+from app.services.conversations import inbox_page, mark_read
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 router = APIRouter()
 logger = logging.getLogger("chat")
 
+# Cursor for the next (older) page of GET /chat/{listing_id}
+NEXT_BEFORE_ID_HEADER = "X-Next-Before-Id"
+
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
+# Sockets held by this worker. Events reach them through the chat broker
+# (see _send_to_user), so users connected to other workers get them too.
 # Structure:
 # active_connections[listing_id][user_id] = [WebSocket, WebSocket, ...]
 active_connections: Dict[int, Dict[int, List[WebSocket]]] = {}
@@ -35,7 +48,16 @@ def _ensure_listing_user_entry(listing_id: int, user_id: int) -> None:
         active_connections[listing_id][user_id] = []
 
 
-def _remove_connection(listing_id: int, user_id: int, websocket: WebSocket) -> None:
+async def _add_connection(listing_id: int, user_id: int, websocket: WebSocket) -> None:
+    """Register a socket; the user's first one here subscribes this worker to their channel."""
+    _ensure_listing_user_entry(listing_id, user_id)
+    user_conns = active_connections[listing_id][user_id]
+    user_conns.append(websocket)
+    if len(user_conns) == 1:
+        await chat_broker.subscribe(user_channel(listing_id, user_id))
+
+
+async def _remove_connection(listing_id: int, user_id: int, websocket: WebSocket) -> None:
     """Remove a websocket connection and clean up empty containers."""
     if listing_id not in active_connections:
         return
@@ -46,19 +68,31 @@ def _remove_connection(listing_id: int, user_id: int, websocket: WebSocket) -> N
         user_conns.remove(websocket)
     if len(user_conns) == 0:
         del active_connections[listing_id][user_id]
+        await chat_broker.unsubscribe(user_channel(listing_id, user_id))
     if len(active_connections[listing_id]) == 0:
         del active_connections[listing_id]
 
 
 async def _send_to_user(listing_id: int, user_id: int, payload: Any) -> None:
-    """Send payload (dict) to all sockets for a particular user."""
+    """
+    Send payload (dict) to all sockets for a particular user, on whichever
+    worker holds them, through the chat broker.
+    """
+    await chat_broker.publish(user_channel(listing_id, user_id), json.dumps(payload))
+
+
+async def _deliver(channel: str, text: str) -> None:
+    """Broker handler: write an event to this worker's sockets for the channel's user."""
+    parsed = parse_user_channel(channel)
+    if parsed is None:
+        return
+    listing_id, user_id = parsed
     if listing_id not in active_connections:
         return
     user_conns = active_connections[listing_id].get(user_id, [])
     if not user_conns:
         return
 
-    text = json.dumps(payload)
     dead_connections = []
 
     for ws in list(user_conns):
@@ -69,120 +103,67 @@ async def _send_to_user(listing_id: int, user_id: int, payload: Any) -> None:
             dead_connections.append(ws)
 
     for dead_ws in dead_connections:
-        _remove_connection(listing_id, user_id, dead_ws)
-
+        await _remove_connection(listing_id, user_id, dead_ws)
 
-def _validate_listing_access(db: Session, listing_id: int, user_id: int) -> bool:
-    """
-    Allow:
-    - Seller of the listing
-    - Any buyer (non-seller user)
 
-    Deny:
-    - Any user if listing doesn't exist
-    """
-    listing = db.query(Listing).filter(Listing.id == listing_id).first()
-    if not listing:
-        return False
+chat_broker.set_handler(_deliver)
 
-    # Seller is allowed
-    # Buyers are allowed
-    return True
 
-
-@router.get("/messages")
+@router.get("/messages", response_model=ConversationPage)
 @limiter.limit("100/hour")
 def get_user_messages(
     request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    messages = (
-        db.query(ChatMessage)
-        .filter(
-            (ChatMessage.sender_id == current_user.id)
-            | (ChatMessage.receiver_id == current_user.id)
-        )
-        .order_by(ChatMessage.created_at.asc())
-        .all()
-    )
-
-    listings: Dict[int, Dict] = {}
-
-    for msg in messages:
-        listing_id = msg.listing_id
-        listing = msg.listing
-
-        if msg.sender_id == current_user.id:
-            other_user = msg.receiver
-        else:
-            other_user = msg.sender
-
-        if other_user is None:
-            other_user_id = msg.receiver_id if msg.sender_id == current_user.id else msg.sender_id
-            other_user_name = None
-            other_user_image = None
-        else:
-            other_user_id = other_user.id
-            other_user_name = getattr(other_user, "name", None)
-            other_user_image = getattr(other_user, "profile_picture", None)
-
-        if listing_id not in listings:
-            listings[listing_id] = {
-                "listing_id": listing_id,
-                "listing_title": getattr(listing, "title", None),
-                "chats": {}
-            }
-
-        chats = listings[listing_id]["chats"]
-
-        if other_user_id not in chats:
-            chats[other_user_id] = {
-                "user_id": other_user_id,
-                "user_name": other_user_name,
-                "user_image": other_user_image,
-                "messages": []
-            }
-
-        chats[other_user_id]["messages"].append({
-            "id": msg.id,
-            "sender_id": msg.sender_id,
-            "receiver_id": msg.receiver_id,
-            "message": msg.message,
-            "created_at": msg.created_at.isoformat()
-        })
-
-    result = []
-    for listing_data in listings.values():
-        listing_data["chats"] = list(listing_data["chats"].values())
-        result.append(listing_data)
-
-    return result
+    """
+    The user's inbox: one entry per conversation, most recent first, with
+    the last message and the user's unread count. Threads are loaded on
+    demand from GET /chat/{listing_id}?user_id=...
+    """
+    return inbox_page(db, current_user.id, cursor, limit)
 
 
 @router.get("/{listing_id}", response_model=list[ChatMessageResponse])
 def get_chat_messages(
     listing_id: int,
+    response: Response,
+    user_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_HISTORY_LIMIT, ge=1, le=MAX_HISTORY_LIMIT),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    listing = db.query(Listing).filter(Listing.id == listing_id).first()
+    """
+    The newest `limit` messages (oldest first) the user sent or received
+    on the listing, optionally only those with `user_id`. For older
+    pages, pass the first message's id as `before_id`; X-Next-Before-Id
+    is set while more remain.
+    """
+    listing = db.query(Listing.id).filter(Listing.id == listing_id).first()
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
 
-    messages = (
-        db.query(ChatMessage)
-        .filter(
-            ChatMessage.listing_id == listing_id,
-            (ChatMessage.sender_id == current_user.id)
-            | (ChatMessage.receiver_id == current_user.id)
-        )
-        .order_by(ChatMessage.created_at.asc())
-        .all()
-    )
+    messages, has_more = message_history(db, listing_id, current_user.id, user_id, before_id, limit)
+    if has_more:
+        response.headers[NEXT_BEFORE_ID_HEADER] = str(messages[0].id)
     return messages
 
 
+@router.post("/{listing_id}/read")
+def mark_conversation_read(
+    listing_id: int,
+    user_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Clear the current user's unread count for the conversation with `user_id`."""
+    mark_read(db, listing_id, current_user.id, user_id)
+    return {"status": "ok"}
+
+
 @router.websocket("/ws/{listing_id}")
 async def chat_websocket(websocket: WebSocket, listing_id: int):
     logger.debug("Incoming WS connection for listing %s", listing_id)
@@ -201,18 +182,20 @@ async def chat_websocket(websocket: WebSocket, listing_id: int):
         await websocket.close(code=status.W_1008_POLICY_VIOLATION)
         return
 
+    # Allow the listing's seller and any buyer; deny everyone if the
+    # listing doesn't exist. The context is kept for the connection, so
+    # messages need no further listing lookups.
     try:
-        with SessionLocal() as db:
-            if not _validate_listing_access(db, listing_id, user_id):
-                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-                return
+        context = await ChatContext.resolve(listing_id, user_id)
+        if context is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
     except Exception:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
     await websocket.accept()
-    _ensure_listing_user_entry(listing_id, user_id)
-    active_connections[listing_id][user_id].append(websocket)
+    await _add_connection(listing_id, user_id, websocket)
 
     try:
         while True:
@@ -267,61 +250,66 @@ async def chat_websocket(websocket: WebSocket, listing_id: int):
             except:
                 continue
 
-            with SessionLocal() as db:
-                listing = db.query(Listing).filter(Listing.id == listing_id).first()
-                seller_id = listing.seller_id
-
-                # ---- Role-based messaging rules ----
-                if user_id != seller_id:
-                    # Buyer → must message seller
-                    if receiver_id != seller_id:
-                        await websocket.send_text(json.dumps({
-                            "type": "error",
-                            "message": "Buyers can only message the seller."
-                        }))
-                        continue
-                else:
-                    # Seller → must message a buyer
-                    if receiver_id == seller_id:
-                        await websocket.send_text(json.dumps({
-                            "type": "error",
-                            "message": "Seller cannot message themselves."
-                        }))
-                        continue
-
-                # Save message
-                try:
-                    message = ChatMessage(
-                        sender_id=user_id,
-                        receiver_id=receiver_id,
-                        listing_id=listing_id,
-                        message=message_text,
-                    )
-                    db.add(message)
-                    db.commit()
-                    db.refresh(message)
-                except Exception as e:
-                    try:
-                        await websocket.send_text(json.dumps({
-                            "type": "error",
-                            "message": "Failed to save message"
-                        }))
-                    except:
-                        pass
+            if not await context.current():
+                await websocket.send_text(json.dumps({
+                    "type": "error",
+                    "message": "Listing not found."
+                }))
+                break
+            seller_user_id = context.owner.user_id
+
+            # ---- Role-based messaging rules ----
+            if not context.is_seller:
+                # Buyer → must message seller
+                if receiver_id != seller_user_id:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": "Buyers can only message the seller."
+                    }))
+                    continue
+            else:
+                # Seller → must message a buyer
+                if receiver_id == seller_user_id:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": "Seller cannot message themselves."
+                    }))
                     continue
 
+            # Save message: queued for the next batch insert; resolves once
+            # that batch has committed, so the echo below is the ack
+            try:
+                message = await chat_writer.save(
+                    sender_id=user_id,
+                    receiver_id=receiver_id,
+                    listing_id=listing_id,
+                    message=message_text,
+                )
+            except Exception as e:
+                try:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": "Failed to save message"
+                    }))
+                except:
+                    pass
+                continue
+
             response = {
                 "type": "message",
-                "id": message.id,
-                "sender_id": message.sender_id,
-                "receiver_id": message.receiver_id,
-                "listing_id": message.listing_id,
-                "message": message.message,
-                "created_at": message.created_at.isoformat(),
+                "id": message["id"],
+                "sender_id": message["sender_id"],
+                "receiver_id": message["receiver_id"],
+                "listing_id": message["listing_id"],
+                "message": message["message"],
+                "created_at": message["created_at"].isoformat(),
             }
+            # Lets the sender match the ack to its optimistic copy
+            if data.get("client_id") is not None:
+                response["client_id"] = data["client_id"]
 
-            await _send_to_user(listing_id, message.sender_id, response)
-            await _send_to_user(listing_id, message.receiver_id, response)
+            await _send_to_user(listing_id, message["sender_id"], response)
+            await _send_to_user(listing_id, message["receiver_id"], response)
 
     finally:
-        _remove_connection(listing_id, user_id, websocket)
+        await _remove_connection(listing_id, user_id, websocket)
@@ -24,6 +24,8 @@ from app.services.item_interaction_service import (
     get_popularity_scores
 )
 from app.utils.dependencies import get_db, get_current_user_optional
+from app.services.autocomplete import autocomplete
+from app.services.listing_cards import listing_cards
 from app.models.user import User
 
 router = APIRouter()
@@ -38,22 +40,20 @@ def create_item_interaction(
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     user_id = current_user.id if current_user else None
-    return record_item_interaction(db, data, user_id)
+    interaction = record_item_interaction(db, data, user_id)
+    autocomplete.reweigh_listing(interaction.listing_id)
+    return interaction
 
 
 # ----------------------------------------------------
 # 2. RECOMMENDATION ROUTES
 # ----------------------------------------------------
-def serialize_listing(l):
-    if not l:
+def serialize_listing(card):
+    """Recommendation card, rendered from the listing card store."""
+    if not card:
         return None
 
-    return {
-        "id": l.id,
-        "title": l.title,
-        "price": l.price,
-        "images": [{"image_url": img.image_url} for img in getattr(l, "images", [])],
-    }
+    return card.summary()
 
 
 @router.get("/recommendations/global")
@@ -73,8 +73,7 @@ def get_global_recommendations(db: Session = Depends(get_db)):
         return {"recommendations": []}
 
     listing_ids = [i.listing_id for i in interactions]
-    listings = db.query(Listing).filter(Listing.id.in_(listing_ids)).all()
-    listing_map = {l.id: l for l in listings}
+    listing_map = {card.id: card for card in listing_cards.get_many(listing_ids, db)}
 
     results = []
     for i in interactions:
@@ -114,8 +113,7 @@ def get_user_recommendations(
 
     # Fetch listings in one query
     listing_ids = [i.listing_id for i in interactions]
-    listings = db.query(Listing).filter(Listing.id.in_(listing_ids)).all()
-    listing_map = {l.id: l for l in listings}
+    listing_map = {card.id: card for card in listing_cards.get_many(listing_ids, db)}
 
     results = []
     for i in interactions:
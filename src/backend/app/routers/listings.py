@@ -1,57 +1,222 @@
-from fastapi import APIRouter, Depends, HTTPException, Form, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Form, File, UploadFile, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
-import os
+from typing import FrozenSet, List, Optional
+import json
+from datetime import datetime
 
-from app.schemas.listing import ListingCreate, ListingRead
+from app.schemas.listing import ListingCreate, ListingRead, ListingPage, ListingBatch, ListingBatchRequest
 from app.models.listing import Listing
 from app.models.listing_image import ListingImage
 from app.models.user import User, RoleEnum
-from app.utils.dependencies import get_db, get_current_user
+from app.utils.dependencies import get_db, get_current_user, require_role
+from app.services.listing_service import (
+    export_listings_ndjson,
+    feed_query,
+    paginate_listings,
+    serialize_page,
+    listing_saved,
+    listing_deleted,
+    listing_json_cache,
+    listing_version,
+    render_listing_json,
+    render_listing_fields,
+    render_listings_json,
+    seller_listings_etag,
+)
+from app.utils.conditional import (
+    REVALIDATE_PRIVATE,
+    conditional,
+    is_not_modified,
+    validator_headers,
+    weak_etag,
+)
+from app.services.loading import get_listing_or_404
+from app.services.listing_fields import parse_fields
+from app.services.storage import upload_store
+from app.services.image_variants import image_variants
+from app.services.listing_import import detect_format, import_listings
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Internal counters are for admins only
+admin_required = require_role([RoleEnum.admin])
+
+
+NDJSON = "application/x-ndjson"
+# Most ids one batch lookup resolves.
+MAX_BATCH_IDS = 300
+
+
+def _ndjson_export(updated_since: Optional[datetime]) -> StreamingResponse:
+    return StreamingResponse(export_listings_ndjson(updated_since), media_type=NDJSON)
+
+
+def _page_response(page: dict, fields: Optional[FrozenSet[str]], response: Optional[Response] = None):
+    # Sparse results do not fit ListingPage, so they skip response_model
+    # validation (keeping any validator headers already set)
+    if fields is None:
+        return page
+    return JSONResponse(page, headers=dict(response.headers) if response is not None else None)
+
+
+def _batch_response(db: Session, ids: List[int], fields: Optional[FrozenSet[str]] = None) -> Response:
+    # Requested order, first occurrence wins
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    if fields is not None:
+        found = render_listing_fields(db, ids, fields)
+        return JSONResponse({
+            "results": [found[i] for i in ids if i in found],
+            "missing": [i for i in ids if i not in found],
+        })
+
+    bodies = render_listings_json(db, ids)
+    missing = [listing_id for listing_id in ids if listing_id not in bodies]
+    # Splice the cached JSON bodies together rather than re-serializing them
+    body = (
+        b'{"results":[' + b",".join(bodies[i] for i in ids if i in bodies)
+        + b'],"missing":' + json.dumps(missing).encode() + b"}"
+    )
+    return Response(content=body, media_type="application/json")
 
 
 # Browse listings
-@router.get("/", response_model=List[ListingRead])
-def browse_listings(db: Session = Depends(get_db)):
-    return db.query(Listing).all()
+@router.get("/", response_model=ListingPage)
+def browse_listings(
+    request: Request,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    updated_since: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    # Accept: application/x-ndjson streams the whole catalogue instead
+    if NDJSON in request.headers.get("accept", ""):
+        return _ndjson_export(updated_since)
+    fields = parse_fields(fields)
+    query = feed_query(db)
+    if updated_since is not None:
+        query = query.filter(Listing.updated_at >= updated_since)
+    page = serialize_page(paginate_listings(query, sort, cursor, limit, include_total), db, fields)
+    return _page_response(page, fields)
 # Get current user's listings (only sellers)
-@router.get("/my-listings", response_model=List[ListingRead])
+@router.get("/my-listings", response_model=ListingPage)
 def get_my_listings(
+    request: Request,
+    response: Response,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role != RoleEnum.seller or not current_user.seller_profile:
         raise HTTPException(status_code=403, detail="Only sellers can access their listings")
-    
-    listings = (
-        db.query(Listing)
-        .filter(Listing.seller_id == current_user.seller_profile.id)
-        .all()
-    )
-    return listings
 
-# Get single listing by ID
+    fields = parse_fields(fields)
+    seller_id = current_user.seller_profile.id
+    etag = seller_listings_etag(db, seller_id, sort, cursor, limit, include_total, fields and sorted(fields))
+    not_modified = conditional(request, response, etag, cache_control=REVALIDATE_PRIVATE)
+    if not_modified:
+        return not_modified
+
+    query = feed_query(db).filter(Listing.seller_id == seller_id)
+    page = serialize_page(paginate_listings(query, sort, cursor, limit, include_total), db, fields)
+    return _page_response(page, fields, response)
+
+# Stream the whole catalogue, one ListingRead JSON object per line
+@router.get("/export")
+def export_listings(updated_since: Optional[datetime] = None):
+    return _ndjson_export(updated_since)
+
+# Hit/miss counters and memory use of the listing detail cache
+@router.get("/cache/stats", dependencies=[Depends(admin_required)])
+def listing_cache_stats():
+    return listing_json_cache.stats()
+
+# Several listings by id, in the order asked for: ?ids=3,1,2 (or ids=3&ids=1)
+@router.get("/batch", response_model=ListingBatch)
+def get_listings_batch(
+    ids: List[str] = Query(...),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    try:
+        parsed = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be integers")
+    return _batch_response(db, parsed, parse_fields(fields))
+
+# Same lookup with the ids in a JSON body, for lists too long for a URL
+@router.post("/batch", response_model=ListingBatch)
+def post_listings_batch(
+    payload: ListingBatchRequest,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    return _batch_response(db, payload.ids, parse_fields(fields))
+
+# Get single listing by ID (pre-rendered JSON from the detail cache)
 @router.get("/{listing_id}", response_model=ListingRead)
-def get_listing(listing_id: int, db: Session = Depends(get_db)):
-    db_listing = db.query(Listing).filter(Listing.id == listing_id).first()
-    if not db_listing:
+def get_listing(
+    listing_id: int,
+    request: Request,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    fields = parse_fields(fields)
+    # Validators come from (version, updated_at) alone; a 304 loads nothing else
+    current = listing_version(db, listing_id)
+    if current is None:
         raise HTTPException(status_code=404, detail="Listing not found")
-    return db_listing
+    etag = weak_etag("listing", listing_id, current.version, fields and sorted(fields))
+    headers = validator_headers(etag, current.updated_at)
+    if is_not_modified(request, etag, current.updated_at):
+        return Response(status_code=304, headers=headers)
+
+    if fields is not None:
+        found = render_listing_fields(db, [listing_id], fields)
+        if listing_id not in found:
+            raise HTTPException(status_code=404, detail="Listing not found")
+        return JSONResponse(found[listing_id], headers=headers)
+
+    body = render_listing_json(db, listing_id, current.version)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Listing not found")
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # Get listings by seller ID
-@router.get("/seller/{seller_id}", response_model=List[ListingRead])
+@router.get("/seller/{seller_id}", response_model=ListingPage)
 def get_listings_by_seller(
     seller_id: int,
+    request: Request,
+    response: Response,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    listings = db.query(Listing).filter(Listing.seller_id == seller_id).all()
-    if not listings:
+    fields = parse_fields(fields)
+    etag = seller_listings_etag(db, seller_id, sort, cursor, limit, include_total, fields and sorted(fields))
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    query = feed_query(db).filter(Listing.seller_id == seller_id)
+    page = paginate_listings(query, sort, cursor, limit, include_total)
+    if not page["results"] and not cursor:
         raise HTTPException(status_code=404, detail="No listings found for this seller")
-    return listings
+    return _page_response(serialize_page(page, db, fields), fields, response)
 
 
 # Create listing (only sellers)
@@ -69,6 +234,9 @@ def create_listing(
     if current_user.role != RoleEnum.seller or not current_user.seller_profile:
         raise HTTPException(status_code=403, detail="Only sellers can create listings")
 
+    # Store the files first so a rejected upload leaves no half-made listing
+    stored = [upload_store.save(img) for img in images]
+
     new_listing = Listing(
         title=title,
         description=description,
@@ -77,21 +245,37 @@ def create_listing(
         category=category,
         seller_id=current_user.seller_profile.id,
     )
+    new_listing.images = [
+        ListingImage(image_url=f.url, is_primary=(i == 0)) for i, f in enumerate(stored)
+    ]
     db.add(new_listing)
     db.commit()
     db.refresh(new_listing)
+    listing_saved(new_listing)
+    image_variants.submit(new_listing.images)
+    return new_listing
 
-    for i, img in enumerate(images):
-        file_path = os.path.join(UPLOAD_DIR, img.filename)
-        with open(file_path, "wb") as f:
-            f.write(img.file.read())
-        url_path = f"/uploads/{img.filename}".replace("\\", "/")
 
-        db.add(ListingImage(listing_id=new_listing.id, image_url=url_path, is_primary=(i == 0)))
+# Bulk import (only sellers): CSV or NDJSON rows plus an optional zip of
+# the images the rows name in their "images" field
+@router.post("/import")
+def import_listings_file(
+    file: UploadFile = File(...),
+    images: Optional[UploadFile] = File(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role != RoleEnum.seller or not current_user.seller_profile:
+        raise HTTPException(status_code=403, detail="Only sellers can import listings")
 
-    db.commit()
-    db.refresh(new_listing)
-    return new_listing
+    fmt = detect_format(file.filename, file.content_type)
+    return import_listings(
+        db,
+        current_user.seller_profile.id,
+        file.file,
+        fmt,
+        images.file if images else None,
+    )
 
 
 # Update listing (owner or admin)
@@ -107,9 +291,7 @@ def update_listing(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    db_listing = db.query(Listing).filter(Listing.id == listing_id).first()
-    if not db_listing:
-        raise HTTPException(status_code=404, detail="Listing not found")
+    db_listing = get_listing_or_404(db, listing_id, for_write=True)
 
     if (
         db_listing.seller.user_id != current_user.id
@@ -129,17 +311,19 @@ def update_listing(
         db_listing.category = category
 
     if images:
-        # clear old images
+        stored = [upload_store.save(img) for img in images]
+        # clear old images (the files stay; other listings may share them)
         db.query(ListingImage).filter(ListingImage.listing_id == db_listing.id).delete()
-        for i, img in enumerate(images):
-            file_path = os.path.join(UPLOAD_DIR, img.filename)
-            with open(file_path, "wb") as f:
-                f.write(img.file.read())
-            url_path = f"/uploads/{img.filename}".replace("\\", "/")
-            db.add(ListingImage(listing_id=db_listing.id, image_url=url_path, is_primary=(i == 0)))
+        # Only the images may have changed; the listing still needs a new version
+        db_listing.updated_at = func.now()
+        for i, f in enumerate(stored):
+            db.add(ListingImage(listing_id=db_listing.id, image_url=f.url, is_primary=(i == 0)))
 
     db.commit()
     db.refresh(db_listing)
+    listing_saved(db_listing)
+    if images:
+        image_variants.submit(db_listing.images)
     return db_listing
 
 
@@ -150,9 +334,7 @@ def delete_listing(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_listing = db.query(Listing).filter(Listing.id == listing_id).first()
-    if not db_listing:
-        raise HTTPException(status_code=404, detail="Listing not found")
+    db_listing = get_listing_or_404(db, listing_id, for_write=True)
 
     if (
         db_listing.seller.user_id != current_user.id
@@ -162,4 +344,5 @@ def delete_listing(
 
     db.delete(db_listing)
     db.commit()
+    listing_deleted(listing_id)
     return {"message": f"Listing {listing_id} deleted successfully"}
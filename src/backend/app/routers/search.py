@@ -1,82 +1,83 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
-from app.utils.dependencies import get_db
-from app.models.search_query import SearchQuery
+from sqlalchemy.orm import Session
+from app.utils.dependencies import get_db, require_role
+from app.models.user import RoleEnum
 from app.models.listing import Listing
-from sqlalchemy import or_
+from app.schemas.search import SearchLogCreate
+from app.services.search_index import search_index, normalize
+from app.services.autocomplete import autocomplete
+from app.services.popularity import popularity
+from app.services.facets import facet_index
+from app.services.search_log import search_log
+from app.services import search_rollups
+from app.services.listing_cards import listing_cards
+from app.services.listing_fields import parse_fields
+from app.services.listing_service import (
+    feed_query,
+    paginate_listings,
+    paginate_hits,
+    serialize_page,
+    catalogue_version,
+)
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.cache import LRUCache
 router = APIRouter()
 
+# Internal counters are for admins only
+admin_required = require_role([RoleEnum.admin])
+
+# Result pages for /search/ and /search/listings, keyed by normalized
+# query parameters and stamped with the catalogue version, so any
+# listing write on this worker invalidates them. The TTL bounds how long
+# writes made on other workers can go unseen.
+search_cache = LRUCache(max_entries=2048, ttl=30.0)
+
 
 # -------------------------
 #  LOG A SEARCH EVENT
 # -------------------------
 @router.post("/log")
-def log_search(
-    payload: dict,
-    db: Session = Depends(get_db),
-):
-    query_text = payload.get("query_text")
-    category = payload.get("category")
-    location = payload.get("location")
-    results_count = payload.get("results_count", 0)
-    user_id = payload.get("user_id")
-    device_type = payload.get("device_type")
-
-    if not query_text:
+def log_search(payload: SearchLogCreate):
+    if not payload.query_text:
         return {"error": "query_text required"}
 
-    entry = SearchQuery(
-        user_id=user_id,
-        query_text=query_text,
-        category=category,
-        location=location,
-        results_count=results_count,
+    # Written to search_queries in batches by the background flusher
+    queued = search_log.add(
+        user_id=payload.user_id,
+        query_text=payload.query_text,
+        category=payload.category,
+        location=payload.location,
+        results_count=payload.results_count,
     )
+    autocomplete.record_query(payload.query_text, payload.results_count)
+
+    return {"status": "queued" if queued else "dropped"}
 
-    db.add(entry)
-    db.commit()
-    db.refresh(entry)
 
-    return {"status": "logged", "id": entry.id}
+@router.get("/log/stats", dependencies=[Depends(admin_required)])
+def search_log_stats():
+    """Queue depth, flush latency and dropped-event counters for /log."""
+    return search_log.stats()
     
 
 # -------------------------
 #  SEARCH INSIGHTS
 # -------------------------
 @router.get("/insights")
-def search_insights(db: Session = Depends(get_db)):
+def search_insights(window: str = "7d", db: Session = Depends(get_db)):
+    """Served from the hourly rollups; window is e.g. 24h, 7d or all."""
 
     # Popular searches
-    popular = (
-        db.query(
-            SearchQuery.query_text,
-            func.count(SearchQuery.id).label("freq")
-        )
-        .group_by(SearchQuery.query_text)
-        .order_by(func.count(SearchQuery.id).desc())
-        .limit(10)
-        .all()
-    )
-
     popular_searches = [
-        {"term": term, "count": freq}
-        for term, freq in popular
+        {"term": term, "count": int(freq)}
+        for term, freq in search_rollups.popular_searches(db, window)
     ]
 
     # Suggested searches (low result count)
-    suggested = (
-        db.query(SearchQuery.query_text)
-        .filter(SearchQuery.results_count < 3)
-        .group_by(SearchQuery.query_text)
-        .order_by(func.count(SearchQuery.id).desc())
-        .limit(10)
-        .all()
-    )
-
-    suggested_terms = [term for (term,) in suggested]
+    suggested_terms = [term for term, _ in search_rollups.low_result_searches(db, window)]
 
     return {
+        "window": window,
         "popular_searches": popular_searches,
         "suggested_searches": suggested_terms,
     }
@@ -86,19 +87,9 @@ def search_insights(db: Session = Depends(get_db)):
 #  POPULAR CATEGORIES
 # -------------------------
 @router.get("/popular-categories")
-def popular_categories(db: Session = Depends(get_db)):
+def popular_categories(window: str = "7d", db: Session = Depends(get_db)):
 
-    categories = (
-        db.query(
-            SearchQuery.category,
-            func.count(SearchQuery.id).label("freq")
-        )
-        .filter(SearchQuery.category != None)
-        .group_by(SearchQuery.category)
-        .order_by(func.count(SearchQuery.id).desc())
-        .limit(10)
-        .all()
-    )
+    categories = search_rollups.popular_categories(db, window)
 
     cat_list = [c for (c, _) in categories]
 
@@ -126,19 +117,20 @@ def get_listings(
     search: str | None = None,
     category: str | None = None,
     location: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    fields: str | None = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Listing)
+    fields = parse_fields(fields)
+    cache_key = ("/", normalize(search), category, location, cursor, limit, include_total, fields)
+    version = catalogue_version()
+    cached = search_cache.get(cache_key, version)
+    if cached is not None:
+        return cached
 
-    # Keyword search
-    if search:
-        like = f"%{search}%"
-        query = query.filter(
-            or_(
-                Listing.title.ilike(like),
-                Listing.description.ilike(like)
-            )
-        )
+    query = feed_query(db)
 
     # Category filter
     if category:
@@ -148,72 +140,87 @@ def get_listings(
     if location:
         query = query.filter(Listing.location == location)
 
-    listings = query.order_by(Listing.created_at.desc()).all()
+    # Keyword search, spelling-corrected when exact hits are sparse; only
+    # the page's hits are read from the database
+    corrected = None
+    if search:
+        hits, corrected = search_index.search_fuzzy(search)
+        page = paginate_hits(
+            query, dict(hits), "newest", cursor, limit, include_total, category, location
+        )
+    else:
+        page = paginate_listings(query, "newest", cursor, limit, include_total)
 
-    return {"results": listings, "count": len(listings)}
+    page = serialize_page(page, db, fields)
+    page["corrected_query"] = corrected
+    search_cache.put(cache_key, page, version)
+    return page
 
 
 @router.get("/quick")
-def quick_search(q: str, db: Session = Depends(get_db)):
-    if not q.strip():
-        return []
-
-    results = (
-        db.query(Listing)
-        .filter(
-            or_(
-                Listing.title.ilike(f"%{q}%"),
-                Listing.description.ilike(f"%{q}%"),
-                Listing.category.ilike(f"%{q}%"),
-                Listing.location.ilike(f"%{q}%"),
-            )
-        )
-        .limit(5)
-        .all()
-    )
-
-    return [
-        {"id": l.id, "title": l.title, "price": l.price}
-        for l in results
-    ]
+def quick_search(q: str, limit: int = Query(5, ge=1, le=10)):
+    """Typeahead suggestions, answered from the in-memory prefix trie."""
+    suggestions = autocomplete.suggest(q, limit)
+    for suggestion in suggestions:
+        if suggestion["type"] == "listing":
+            card = listing_cards.get(suggestion["id"])
+            suggestion["image_url"] = card.primary_image("thumb") if card else None
+    return suggestions
 
 @router.get("/listings")
 def search_listings(
     q: str = Query("", alias="q"),
     category: str = Query("", alias="category"),
     sort: str = Query("relevance", alias="sort"),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    facets: bool = False,
+    fields: str | None = None,
     db: Session = Depends(get_db)
 ):
-    # Base query — NOTE joinedload here
-    query = (
-        db.query(Listing)
-        .options(joinedload(Listing.images))
-    )
+    fields = parse_fields(fields)
+    cache_key = ("/listings", normalize(q), category, sort, cursor, limit, include_total, facets, fields)
+    version = catalogue_version()
+    cached = search_cache.get(cache_key, version)
+    if cached is not None:
+        return cached
 
-    # Apply search text filter
-    if q:
-        query = query.filter(
-            or_(
-                Listing.title.ilike(f"%{q}%"),
-                Listing.description.ilike(f"%{q}%")
-            )
-        )
+    # Sort keys only; the page is rendered from the listing card store
+    query = feed_query(db)
 
     # Apply category filter
     if category:
         query = query.filter(Listing.category == category)
 
-    # Sorting
-    if sort == "price_low":
-        query = query.order_by(Listing.price.asc())
-    elif sort == "price_high":
-        query = query.order_by(Listing.price.desc())
-    else:  # relevance or default
-        query = query.order_by(Listing.created_at.desc())
-
-    results = query.all()
-
-    return {
-        "results": results,
-        "count": len(results)
-    }
\ No newline at end of file
+    # Search text (BM25 over the in-memory index), retried with a spelling
+    # correction when exact hits are sparse. Hits are filtered and sorted
+    # in memory and only the page's ids are read from the database;
+    # relevance blends text score, popularity and recency.
+    scores = {}
+    corrected = None
+    if q:
+        hits, corrected = search_index.search_fuzzy(q)
+        scores = dict(hits)
+        if sort == "relevance":
+            popularity.refresh_if_stale()
+        page = paginate_hits(query, scores, sort, cursor, limit, include_total, category or None)
+    else:
+        # Newest-first when there is no q
+        page = paginate_listings(query, sort, cursor, limit, include_total)
+
+    # Counts per category / location / price bucket for the whole matched
+    # set, from the in-memory facet columns rather than GROUP BY queries
+    if facets:
+        page["facets"] = facet_index.counts(scores if q else None, category or None)
+
+    page = serialize_page(page, db, fields)
+    page["corrected_query"] = corrected
+    search_cache.put(cache_key, page, version)
+    return page
+
+
+@router.get("/cache/stats", dependencies=[Depends(admin_required)])
+def search_cache_stats():
+    """Hit/miss/eviction counters for the search result cache."""
+    return {**search_cache.stats(), "catalogue_version": catalogue_version()}
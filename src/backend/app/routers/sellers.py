@@ -1,15 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Response
 from sqlalchemy.orm import Session
-import os, shutil
-from uuid import uuid4
 
 from app.schemas import seller as schemas
 from app.models.seller import Seller
 from app.models.user import User, RoleEnum
+from app.services.storage import upload_store
 from app.utils.dependencies import get_db, require_role
+from app.utils.conditional import REVALIDATE_PRIVATE, conditional, weak_etag
 
-UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 router = APIRouter()
 
@@ -32,13 +30,21 @@ def create_seller_profile(
 
 @router.get("/me", response_model=schemas.SellerRead)
 def read_my_seller_profile(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role([RoleEnum.seller]))
 ):
-    seller = db.query(Seller).filter(Seller.user_id == current_user.id).first()
-    if not seller:
+    # Check the validators from (id, version, updated_at) before loading the profile
+    version = db.query(Seller.id, Seller.version, Seller.updated_at).filter(Seller.user_id == current_user.id).first()
+    if not version:
         raise HTTPException(status_code=404, detail="Seller profile not found")
-    return seller
+    etag = weak_etag("seller", version.id, version.version)
+    not_modified = conditional(request, response, etag, version.updated_at, REVALIDATE_PRIVATE)
+    if not_modified:
+        return not_modified
+
+    return db.query(Seller).filter(Seller.id == version.id).first()
 
 
 @router.put("/me", response_model=schemas.SellerRead)
@@ -59,12 +65,8 @@ def update_my_seller_profile(
         seller.address = address
 
     if file:
-        ext = os.path.splitext(file.filename)[1]
-        filename = f"{uuid4().hex}{ext}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        seller.logo = filename
+        # Stored relative to /uploads, as before
+        seller.logo = upload_store.save(file).name
 
     db.commit()
     db.refresh(seller)
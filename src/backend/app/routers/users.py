@@ -1,19 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import os, shutil
-from uuid import uuid4
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 from app.utils.dependencies import get_db, get_current_user
 from app.models.seller import Seller, SellerStatus
 from app.models.user import User, RoleEnum
+from app.services.storage import upload_store
 from app.schemas.user import UserRead, UserAdminRead, UserAdminUpdate
 
 router = APIRouter()
-UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
 def get_user_or_404(db: Session, user_id: int) -> User:
@@ -57,12 +54,8 @@ def update_user_profile(
     if phone:
         user.phone = phone
     if file:
-        ext = os.path.splitext(file.filename)[1]
-        filename = f"{uuid4().hex}{ext}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        user.profile_picture = filename
+        # Stored relative to /uploads, as before
+        user.profile_picture = upload_store.save(file).name
 
     # 👇 key difference: user can make themselves a seller
     if role:
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 
 class ChatMessageBase(BaseModel):
@@ -30,3 +31,22 @@ class ChatMessageResponse(BaseModel):
     class Config:
         orm_mode = True
 
+
+class ConversationRead(BaseModel):
+    id: int
+    listing_id: int
+    listing_title: str
+    user_id: int
+    user_name: str
+    user_image: Optional[str] = None
+    last_message: str
+    last_sender_id: int
+    last_message_at: datetime
+    unread_count: int
+
+
+class ConversationPage(BaseModel):
+    results: List[ConversationRead]
+    count: int
+    limit: int
+    next_cursor: Optional[str] = None
@@ -1,11 +1,20 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class ListingImageRead(BaseModel):
     id: int
     image_url: str
     is_primary: bool
+    # Smaller copies by name (thumb, card, full and *_webp), once generated
+    variants: Dict[str, str] = {}
+
+    @field_validator("variants", mode="before")
+    @classmethod
+    def variants_by_name(cls, value):
+        if isinstance(value, list):
+            return {v.name: v.url for v in value}
+        return value
 
     class Config:
         orm_mode = True
@@ -23,9 +32,26 @@ class ListingCreate(ListingBase):
 class ListingRead(ListingBase):
     id: int
     seller_id: int
+    # users.id of the seller; the receiver_id for messaging them
+    seller_user_id: int
     created_at: datetime
     updated_at: datetime
     images: List[ListingImageRead] = []
 
     class Config:
         orm_mode = True
+
+class ListingPage(BaseModel):
+    results: List[ListingRead]
+    count: int
+    limit: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_estimate: Optional[bool] = None
+
+class ListingBatchRequest(BaseModel):
+    ids: List[int]
+
+class ListingBatch(BaseModel):
+    results: List[ListingRead]
+    missing: List[int] = []
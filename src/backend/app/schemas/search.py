@@ -0,0 +1,12 @@
+from pydantic import BaseModel, conint, constr
+from typing import Optional
+
+
+class SearchLogCreate(BaseModel):
+    # Lengths match the search_queries columns
+    query_text: constr(max_length=512)
+    category: Optional[constr(max_length=100)] = None
+    location: Optional[constr(max_length=150)] = None
+    results_count: conint(ge=0) = 0
+    user_id: Optional[int] = None
+    device_type: Optional[constr(max_length=50)] = None
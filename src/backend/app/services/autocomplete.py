@@ -0,0 +1,332 @@
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.listing import Listing
+from app.models.search_query import SearchQuery
+from app.services.popularity import popularity
+from app.services.search_index import normalize
+
+# Suggestions kept per trie node; /search/quick never asks for more.
+TOP_K = 10
+# Index strings are cut here so a long title cannot make the trie deep.
+MAX_KEY_LEN = 40
+# A leaf keeps up to this many index strings whole before they are split
+# into child nodes, so a key only gets nodes of its own for as many
+# characters as it shares with other keys.
+LEAF_SIZE = 16
+# A logged query must be seen this often (with results) to be suggested.
+MIN_QUERY_FREQ = 2
+# Past this many distinct queries, the ones seen only once are forgotten.
+MAX_TRACKED_QUERIES = 100_000
+
+QUERY_BOOST = 1.5
+
+EntryKey = Tuple[str, object]
+
+
+class Suggestion:
+    __slots__ = ("key", "kind", "text", "weight", "payload", "index_keys")
+
+    def __init__(self, key: EntryKey, kind: str, text: str, weight: float, payload: dict):
+        self.key = key
+        self.kind = kind
+        self.text = text
+        self.weight = weight
+        self.payload = payload
+        self.index_keys: List[str] = []
+
+    def to_dict(self) -> dict:
+        return {"type": self.kind, "text": self.text, **self.payload}
+
+
+class _Node:
+    __slots__ = ("children", "terminal", "tails", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # Entries whose index string ends here
+        self.terminal: set = set()
+        # (index string, entry key) for longer strings not split into
+        # children yet; only a leaf has these
+        self.tails: List[Tuple[str, EntryKey]] = []
+        # Best TOP_K entry keys in this subtree, highest weight first
+        self.top: List[EntryKey] = []
+
+
+class Autocomplete:
+    """
+    Prefix trie over listing titles, categories, locations and frequent
+    search queries. Every node caches its best TOP_K suggestions, so a
+    lookup is a walk down the typed prefix and never touches the database.
+
+    Each phrase is indexed from every word start, so "cem" completes
+    "Portland cement" as well as "Cement". Leaves hold up to LEAF_SIZE
+    index strings whole (a burst trie), so the per-word keys do not each
+    need a chain of MAX_KEY_LEN nodes; a prefix that runs past the nodes
+    is answered by filtering its leaf.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Set while rebuild() fills the trie; node tops are then computed
+        # once at the end instead of on every insert
+        self._bulk = False
+        self._clear()
+
+    def _clear(self) -> None:
+        self.root = _Node()
+        self.entries: Dict[EntryKey, Suggestion] = {}
+        # listing_id -> (category, location), to undo counts on update/delete
+        self.listing_facets: Dict[int, Tuple[str, str]] = {}
+        self.category_counts: Dict[str, int] = {}
+        self.location_counts: Dict[str, int] = {}
+        self.query_counts: Dict[str, int] = {}
+
+    # -------------------------
+    #  TRIE MAINTENANCE
+    # -------------------------
+    def _weight_of(self, key: EntryKey) -> float:
+        return self.entries[key].weight
+
+    def _path(self, index_key: str) -> List[_Node]:
+        """Nodes from the root to the one `index_key` ends at or the leaf holding it."""
+        node = self.root
+        path = [node]
+        for ch in index_key:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            path.append(node)
+        return path
+
+    def _insert(self, index_key: str, key: EntryKey) -> List[_Node]:
+        """Store `key` under `index_key`; returns the nodes above it."""
+        node = self.root
+        path = [node]
+        for depth, ch in enumerate(index_key):
+            child = node.children.get(ch)
+            if child is None:
+                if not node.children:
+                    node.tails.append((index_key, key))
+                    if len(node.tails) > LEAF_SIZE:
+                        self._split(node, depth)
+                    return path
+                child = node.children[ch] = _Node()
+            node = child
+            path.append(node)
+        node.terminal.add(key)
+        return path
+
+    def _split(self, leaf: _Node, depth: int) -> None:
+        """Move a leaf's tails one level down into new child nodes."""
+        tails, leaf.tails = leaf.tails, []
+        for index_key, key in tails:
+            child = leaf.children.setdefault(index_key[depth], _Node())
+            if len(index_key) == depth + 1:
+                child.terminal.add(key)
+            else:
+                child.tails.append((index_key, key))
+        for child in leaf.children.values():
+            if len(child.tails) > LEAF_SIZE:
+                self._split(child, depth + 1)
+            if not self._bulk:
+                self._recompute(child)
+
+    def _promote(self, node: _Node, key: EntryKey) -> None:
+        top = node.top
+        if key not in top:
+            if len(top) >= TOP_K and self._weight_of(key) <= self._weight_of(top[-1]):
+                return
+            top.append(key)
+        top.sort(key=self._weight_of, reverse=True)
+        del top[TOP_K:]
+
+    def _recompute(self, node: _Node) -> None:
+        candidates = set(node.terminal)
+        candidates.update(key for _, key in node.tails)
+        for child in node.children.values():
+            candidates.update(child.top)
+        node.top = sorted(candidates, key=self._weight_of, reverse=True)[:TOP_K]
+
+    def _recompute_all(self, node: _Node) -> None:
+        for child in node.children.values():
+            self._recompute_all(child)
+        self._recompute(node)
+
+    def _index_keys(self, text: str) -> List[str]:
+        words = normalize(text).split(" ")
+        return list(dict.fromkeys(
+            " ".join(words[i:])[:MAX_KEY_LEN] for i in range(len(words)) if words[i]
+        ))
+
+    def _put(self, key: EntryKey, kind: str, text: str, weight: float, payload: dict) -> None:
+        entry = self.entries.get(key)
+        if entry is not None and entry.text == text:
+            decreased = weight < entry.weight
+            entry.weight = weight
+            entry.payload = payload
+            if self._bulk:
+                return
+            for index_key in entry.index_keys:
+                path = self._path(index_key)
+                if decreased:
+                    for node in reversed(path):
+                        self._recompute(node)
+                else:
+                    for node in path:
+                        self._promote(node, key)
+            return
+
+        if entry is not None:
+            self._drop(key)
+        entry = self.entries[key] = Suggestion(key, kind, text, weight, payload)
+        entry.index_keys = self._index_keys(text)
+        for index_key in entry.index_keys:
+            path = self._insert(index_key, key)
+            if not self._bulk:
+                for node in path:
+                    self._promote(node, key)
+
+    def _drop(self, key: EntryKey) -> None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        for index_key in entry.index_keys:
+            path = self._path(index_key)
+            path[-1].terminal.discard(key)
+            path[-1].tails = [tail for tail in path[-1].tails if tail != (index_key, key)]
+            for node in path:
+                if key in node.top:
+                    node.top.remove(key)
+        del self.entries[key]
+        # Refill the tops the entry was removed from
+        for index_key in entry.index_keys:
+            path = self._path(index_key)
+            for node in reversed(path):
+                self._recompute(node)
+            # Prune now-empty branches
+            for parent, child, ch in zip(reversed(path[:-1]), reversed(path[1:]), reversed(index_key[:len(path) - 1])):
+                if child.children or child.terminal or child.tails:
+                    break
+                del parent.children[ch]
+
+    # -------------------------
+    #  WEIGHTED SOURCES
+    # -------------------------
+    def _put_listing(self, listing_id: int, title: str, price) -> None:
+        weight = 1.0 + math.log1p(max(popularity.get(listing_id), 0.0))
+        payload = {"id": listing_id, "price": float(price) if price is not None else None}
+        self._put(("listing", listing_id), "listing", title, weight, payload)
+
+    def _count_facet(self, kind: str, counts: Dict[str, int], value: Optional[str], delta: int) -> None:
+        if not value:
+            return
+        norm = value.lower()
+        counts[norm] = counts.get(norm, 0) + delta
+        key = (kind, norm)
+        if counts[norm] <= 0:
+            del counts[norm]
+            self._drop(key)
+        else:
+            self._put(key, kind, value, math.log1p(counts[norm]), {})
+
+    def add_listing(self, listing: Listing) -> None:
+        with self._lock:
+            self._remove_facets(listing.id)
+            self._put_listing(listing.id, listing.title, listing.price)
+            self.listing_facets[listing.id] = (listing.category, listing.location)
+            self._count_facet("category", self.category_counts, listing.category, 1)
+            self._count_facet("location", self.location_counts, listing.location, 1)
+
+    def remove_listing(self, listing_id: int) -> None:
+        with self._lock:
+            self._drop(("listing", listing_id))
+            self._remove_facets(listing_id)
+
+    def _remove_facets(self, listing_id: int) -> None:
+        facets = self.listing_facets.pop(listing_id, None)
+        if facets:
+            category, location = facets
+            self._count_facet("category", self.category_counts, category, -1)
+            self._count_facet("location", self.location_counts, location, -1)
+
+    def reweigh_listing(self, listing_id: int) -> None:
+        """Re-read a listing's popularity after new interactions."""
+        with self._lock:
+            entry = self.entries.get(("listing", listing_id))
+            if entry is not None:
+                self._put_listing(listing_id, entry.text, entry.payload["price"])
+
+    def record_query(self, query_text: str, results_count: int = 0, count: int = 1) -> None:
+        text = normalize(query_text)
+        if not text or not results_count:
+            return
+        with self._lock:
+            freq = self.query_counts[text] = self.query_counts.get(text, 0) + count
+            if len(self.query_counts) > MAX_TRACKED_QUERIES:
+                self.query_counts = {
+                    t: n for t, n in self.query_counts.items() if n >= MIN_QUERY_FREQ
+                }
+            if freq >= MIN_QUERY_FREQ:
+                self._put(("query", text), "query", text, QUERY_BOOST * math.log1p(freq), {})
+
+    # -------------------------
+    #  LOOKUP
+    # -------------------------
+    def suggest(self, prefix: str, limit: int = 5) -> List[dict]:
+        typed = normalize(prefix)
+        if not typed:
+            return []
+        typed = typed[:MAX_KEY_LEN]
+        with self._lock:
+            node = self.root
+            for ch in typed:
+                child = node.children.get(ch)
+                if child is None:
+                    # Past the nodes: the matches are among the leaf's tails
+                    keys = dict.fromkeys(key for index_key, key in node.tails if index_key.startswith(typed))
+                    top = sorted(keys, key=self._weight_of, reverse=True)[:limit]
+                    return [self.entries[key].to_dict() for key in top]
+                node = child
+            return [self.entries[key].to_dict() for key in node.top[:limit]]
+
+    # -------------------------
+    #  FULL RELOAD
+    # -------------------------
+    def rebuild(self, db: Session) -> None:
+        """Reload from the database; expects the popularity cache to be loaded."""
+        listings = db.query(
+            Listing.id, Listing.title, Listing.price, Listing.category, Listing.location
+        ).yield_per(1000)
+        queries = (
+            db.query(SearchQuery.query_text, func.count(SearchQuery.id))
+            .filter(SearchQuery.results_count > 0)
+            .group_by(SearchQuery.query_text)
+            .having(func.count(SearchQuery.id) >= MIN_QUERY_FREQ)
+            .all()
+        )
+        self.load(listings, queries)
+
+    def load(self, listings: Iterable, queries: Iterable[Tuple[str, int]] = ()) -> None:
+        """
+        Replace the contents with `listings` (rows with id, title, price,
+        category and location) and (query text, frequency) pairs.
+        """
+        with self._lock:
+            self._clear()
+            self._bulk = True
+            try:
+                for row in listings:
+                    self.add_listing(row)
+                for text, freq in queries:
+                    self.record_query(text, results_count=1, count=freq)
+            finally:
+                self._bulk = False
+                self._recompute_all(self.root)
+
+
+autocomplete = Autocomplete()
@@ -0,0 +1,333 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+logger = logging.getLogger("chat")
+
+# Called with (channel, data) for every message on a subscribed channel.
+MessageHandler = Callable[[str, str], Awaitable[None]]
+
+CHANNEL_PREFIX = "chat"
+# Seconds between reconnect attempts, doubling up to the maximum.
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 10.0
+# Events waiting for one channel's sockets; past this the oldest are dropped.
+MAX_CHANNEL_BACKLOG = 1000
+# Events waiting to be published; publish() waits while this many are queued.
+MAX_PENDING_PUBLISHES = 10_000
+# Most PUBLISH commands sent in one pipelined write.
+MAX_PIPELINE = 500
+
+
+def user_channel(listing_id: int, user_id: int) -> str:
+    """Channel carrying one user's events for one listing's chat."""
+    return f"{CHANNEL_PREFIX}:{listing_id}:{user_id}"
+
+
+def parse_user_channel(channel: str) -> Optional[Tuple[int, int]]:
+    try:
+        prefix, listing_id, user_id = channel.split(":")
+        if prefix != CHANNEL_PREFIX:
+            return None
+        return int(listing_id), int(user_id)
+    except ValueError:
+        return None
+
+
+class ChatBroker(ABC):
+    """
+    Pub/sub between the workers serving chat WebSockets. A worker
+    subscribes to the channels of the users it holds sockets for and
+    publishes every outgoing event; whichever worker holds the receiver's
+    sockets gets it through its handler.
+
+    Received events are handed to the handler by one task per channel
+    with a backlog, so each user's events arrive in order and a slow
+    socket only holds up its own channel.
+    """
+
+    def __init__(self):
+        self.handler: Optional[MessageHandler] = None
+        self.channels: Set[str] = set()
+        self._backlogs: Dict[str, Deque[str]] = {}
+        self._deliveries: Set[asyncio.Task] = set()
+
+    def set_handler(self, handler: MessageHandler) -> None:
+        self.handler = handler
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        for task in list(self._deliveries):
+            task.cancel()
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    @abstractmethod
+    async def subscribe(self, channel: str) -> None:
+        """Start handing this channel's events to the handler."""
+
+    @abstractmethod
+    async def unsubscribe(self, channel: str) -> None:
+        """Stop handing this channel's events to the handler."""
+
+    @abstractmethod
+    async def publish(self, channel: str, data: str) -> None:
+        """Send an event to every worker subscribed to the channel."""
+
+    async def join(self) -> None:
+        """Wait until every event received so far has been handled."""
+        while self._deliveries:
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    def _receive(self, channel: str, data: str) -> None:
+        """Queue an event for its channel's delivery task, starting one if needed."""
+        if self.handler is None or channel not in self.channels:
+            return
+        backlog = self._backlogs.get(channel)
+        if backlog is not None:
+            if len(backlog) == backlog.maxlen:
+                logger.warning("Chat backlog full for %s; dropping the oldest event", channel)
+            backlog.append(data)
+            return
+        backlog = self._backlogs[channel] = deque([data], maxlen=MAX_CHANNEL_BACKLOG)
+        task = asyncio.create_task(self._drain(channel, backlog))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _drain(self, channel: str, backlog: Deque[str]) -> None:
+        try:
+            while backlog:
+                await self._dispatch(channel, backlog.popleft())
+        finally:
+            if self._backlogs.get(channel) is backlog:
+                del self._backlogs[channel]
+
+    async def _dispatch(self, channel: str, data: str) -> None:
+        if self.handler is None or channel not in self.channels:
+            return
+        try:
+            await self.handler(channel, data)
+        except Exception:
+            logger.exception("Chat handler failed for %s", channel)
+
+
+class LocalBroker(ChatBroker):
+    """Single-process broker: publish hands the event straight to the channel's delivery task."""
+
+    async def subscribe(self, channel: str) -> None:
+        self.channels.add(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        self.channels.discard(channel)
+
+    async def publish(self, channel: str, data: str) -> None:
+        self._receive(channel, data)
+
+
+# -------------------------
+#  REDIS PROTOCOL
+# -------------------------
+def encode_command(*args) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        value = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(value), value))
+    return b"".join(parts)
+
+
+class RedisError(Exception):
+    pass
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """One RESP2 reply: str for simple strings, int, bytes/None for bulk, list for arrays."""
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RedisError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"unexpected reply {line[:20]!r}")
+
+
+class RedisBroker(ChatBroker):
+    """
+    Broker over Redis PUBLISH/SUBSCRIBE (or anything speaking the same
+    protocol). Uses two connections, each with a background task: one
+    publishing, one held in subscribe mode. publish() only queues the
+    event; the publisher pipelines everything queued into one write and
+    then reads the replies, so throughput is not bound to one round trip
+    per event. Both reconnect on failure, and the subscriber re-subscribes
+    to every channel this worker still needs. Messages published while
+    the subscriber is down are lost, as with any Redis pub/sub.
+    """
+
+    def __init__(self, url: str):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+
+        self._pub: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._publisher: Optional[asyncio.Task] = None
+        self._sub_writer: Optional[asyncio.StreamWriter] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    # -------------------------
+    #  LIFECYCLE
+    # -------------------------
+    async def start(self) -> None:
+        if self._listener is None:
+            self._outbox = asyncio.Queue(maxsize=MAX_PENDING_PUBLISHES)
+            self._publisher = asyncio.create_task(self._publish_loop())
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        tasks = [self._listener, self._publisher]
+        self._listener = self._publisher = None
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await super().stop()
+        if self._pub is not None:
+            self._pub[1].close()
+            self._pub = None
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            writer.write(encode_command("AUTH", self.password))
+            await writer.drain()
+            await read_reply(reader)
+        return reader, writer
+
+    # -------------------------
+    #  SUBSCRIBER
+    # -------------------------
+    async def subscribe(self, channel: str) -> None:
+        await self.start()
+        if channel in self.channels:
+            return
+        self.channels.add(channel)
+        await self._send_sub("SUBSCRIBE", channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        if channel not in self.channels:
+            return
+        self.channels.discard(channel)
+        await self._send_sub("UNSUBSCRIBE", channel)
+
+    async def _send_sub(self, command: str, channel: str) -> None:
+        # While disconnected the listener re-subscribes from self.channels
+        writer = self._sub_writer
+        if writer is None:
+            return
+        try:
+            writer.write(encode_command(command, channel))
+            await writer.drain()
+        except (ConnectionError, OSError):
+            writer.close()
+
+    async def _listen(self) -> None:
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                reader, writer = await self._connect()
+                # Publish the writer before the snapshot so a channel added
+                # in between is sent by subscribe() itself
+                self._sub_writer = writer
+                if self.channels:
+                    writer.write(encode_command("SUBSCRIBE", *self.channels))
+                    await writer.drain()
+                delay = RECONNECT_DELAY
+                while True:
+                    reply = await read_reply(reader)
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        self._receive(reply[1].decode(), reply[2].decode())
+            except asyncio.CancelledError:
+                if self._sub_writer is not None:
+                    self._sub_writer.close()
+                raise
+            except (ConnectionError, OSError, RedisError, asyncio.IncompleteReadError) as exc:
+                logger.warning("Chat broker subscriber disconnected (%s); retrying in %.1fs", exc, delay)
+            if self._sub_writer is not None:
+                self._sub_writer.close()
+                self._sub_writer = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    # -------------------------
+    #  PUBLISHER
+    # -------------------------
+    async def publish(self, channel: str, data: str) -> None:
+        await self.start()
+        await self._outbox.put((channel, data))
+
+    async def _publish_loop(self) -> None:
+        while True:
+            batch = [await self._outbox.get()]
+            while len(batch) < MAX_PIPELINE and not self._outbox.empty():
+                batch.append(self._outbox.get_nowait())
+            await self._send_publishes(batch)
+
+    async def _send_publishes(self, batch: List[Tuple[str, str]]) -> None:
+        # Publishes Redis has replied to. After a dropped connection only
+        # the rest are sent again, so acknowledged events are not repeated
+        # (one whose reply was lost in flight still can be).
+        sent = 0
+        for attempt in range(2):
+            try:
+                if self._pub is None:
+                    self._pub = await self._connect()
+                reader, writer = self._pub
+                writer.write(b"".join(encode_command("PUBLISH", channel, data) for channel, data in batch[sent:]))
+                await writer.drain()
+                while sent < len(batch):
+                    try:
+                        await read_reply(reader)
+                    except RedisError as exc:
+                        logger.warning("Chat broker publish to %s refused: %s", batch[sent][0], exc)
+                    sent += 1
+                return
+            except (ConnectionError, OSError, asyncio.IncompleteReadError) as exc:
+                if self._pub is not None:
+                    self._pub[1].close()
+                    self._pub = None
+                if attempt:
+                    logger.warning("Chat broker could not publish %d events: %s", len(batch) - sent, exc)
+
+
+def create_broker(url: Optional[str]) -> ChatBroker:
+    """RedisBroker for a redis:// URL, else the in-process LocalBroker."""
+    if url:
+        return RedisBroker(url)
+    return LocalBroker()
+
+
+chat_broker = create_broker(settings.CHAT_BROKER_URL)
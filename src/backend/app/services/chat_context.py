@@ -0,0 +1,99 @@
+import time
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.listing import Listing
+from app.models.seller import Seller
+from app.services.chat_store import run_db
+from app.utils.cache import LRUCache
+
+# Seconds a resolved listing owner is trusted before it is read again.
+# Deletes and transfers on this worker invalidate at once; this bounds how
+# long ones made on other workers can go unseen.
+OWNER_TTL = 60.0
+
+
+class ListingOwner:
+    __slots__ = ("seller_id", "user_id")
+
+    def __init__(self, seller_id: int, user_id: int):
+        self.seller_id = seller_id  # sellers.id, as on Listing.seller_id
+        self.user_id = user_id      # the seller's users.id, as on chat messages
+
+
+# listing id -> ListingOwner, shared by every connection to the listing
+listing_owners = LRUCache(max_entries=10_000, ttl=OWNER_TTL)
+# Bumped per listing on invalidation so open connections notice
+_generations: Dict[int, int] = {}
+
+
+def _load_owner(db: Session, listing_id: int) -> Optional[ListingOwner]:
+    row = (
+        db.query(Listing.seller_id, Seller.user_id)
+        .join(Seller, Seller.id == Listing.seller_id)
+        .filter(Listing.id == listing_id)
+        .first()
+    )
+    return ListingOwner(row.seller_id, row.user_id) if row else None
+
+
+async def listing_owner(listing_id: int) -> Optional[ListingOwner]:
+    """Owner of a listing from the shared cache, read from the DB on a miss."""
+    owner = listing_owners.get(listing_id)
+    if owner is None:
+        owner = await run_db(_load_owner, listing_id)
+        if owner is not None:
+            listing_owners.put(listing_id, owner)
+    return owner
+
+
+def invalidate_listing_owner(listing_id: int) -> None:
+    """Call when a listing is deleted or changes seller."""
+    listing_owners.pop(listing_id)
+    _generations[listing_id] = _generations.get(listing_id, 0) + 1
+
+
+def listing_owner_changed(listing: Listing) -> None:
+    """Invalidate a saved listing's cached owner if it now has a different seller."""
+    owner = listing_owners.get(listing.id)
+    if owner is not None and owner.seller_id != listing.seller_id:
+        invalidate_listing_owner(listing.id)
+
+
+class ChatContext:
+    """
+    What one chat connection needs for every message: the listing's owner
+    and whether this user is its seller or a buyer. Resolved once at the
+    handshake; current() only goes back to the shared cache (and, on a
+    miss, the DB) after the listing was invalidated or OWNER_TTL passed.
+    """
+
+    __slots__ = ("listing_id", "user_id", "owner", "generation", "expires_at")
+
+    def __init__(self, listing_id: int, user_id: int):
+        self.listing_id = listing_id
+        self.user_id = user_id
+        self.owner: Optional[ListingOwner] = None
+        self.generation = -1
+        self.expires_at = 0.0
+
+    @classmethod
+    async def resolve(cls, listing_id: int, user_id: int) -> Optional["ChatContext"]:
+        """Context for a new connection, or None if the listing does not exist."""
+        context = cls(listing_id, user_id)
+        return context if await context.current() else None
+
+    async def current(self) -> bool:
+        """Make sure the owner is up to date; False once the listing is gone."""
+        generation = _generations.get(self.listing_id, 0)
+        if self.owner is not None and generation == self.generation and time.monotonic() < self.expires_at:
+            return True
+        self.owner = await listing_owner(self.listing_id)
+        self.generation = generation
+        self.expires_at = time.monotonic() + OWNER_TTL
+        return self.owner is not None
+
+    @property
+    def is_seller(self) -> bool:
+        return self.owner is not None and self.owner.user_id == self.user_id
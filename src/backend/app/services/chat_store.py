@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Deque, List, Optional, Tuple, Union
+
+from sqlalchemy import insert, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, inserted_ids
+from app.models.chat import ChatMessage
+from app.services.conversations import record_messages
+
+logger = logging.getLogger("chat")
+
+# History page sizes.
+DEFAULT_HISTORY_LIMIT = 50
+MAX_HISTORY_LIMIT = 200
+
+# Most messages written in one transaction.
+BATCH_SIZE = 200
+# Messages waiting while this many are already queued are refused.
+MAX_QUEUE = 20_000
+
+
+# -------------------------
+#  READS
+# -------------------------
+# Chat's own threads for blocking database work, so a slow query neither
+# stalls the event loop nor competes with sync HTTP endpoints for the
+# shared threadpool.
+chat_db_executor = ThreadPoolExecutor(
+    max_workers=settings.CHAT_DB_THREADS,
+    thread_name_prefix="chat-db",
+)
+
+
+async def run_db(fn: Callable[..., Any], *args) -> Any:
+    """Run fn(db, *args) with a fresh session on the chat DB threads."""
+    def call():
+        with SessionLocal() as db:
+            return fn(db, *args)
+
+    return await asyncio.get_running_loop().run_in_executor(chat_db_executor, call)
+
+
+def message_history(
+    db: Session,
+    listing_id: int,
+    user_id: int,
+    other_user_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = DEFAULT_HISTORY_LIMIT,
+) -> Tuple[List[ChatMessage], bool]:
+    """
+    Up to `limit` of the newest messages on a listing that `user_id` sent
+    or received (only those with `other_user_id` when given), older than
+    `before_id`. Returns them oldest first, plus whether older ones exist.
+
+    Sent and received messages are fetched as two legs of a UNION ALL
+    rather than one OR over both columns. Each leg is a newest-first
+    range scan that stops after limit + 1 rows: on (listing_id, sender_id
+    or receiver_id, id) for the whole history, and on (listing_id,
+    sender_id, receiver_id, id) for both legs when `other_user_id` is
+    given.
+    """
+    legs = []
+    for mine, theirs in ((ChatMessage.sender_id, ChatMessage.receiver_id),
+                         (ChatMessage.receiver_id, ChatMessage.sender_id)):
+        leg = select(ChatMessage.id).where(ChatMessage.listing_id == listing_id, mine == user_id)
+        if other_user_id is not None:
+            leg = leg.where(theirs == other_user_id)
+        if before_id is not None:
+            leg = leg.where(ChatMessage.id < before_id)
+        legs.append(select(leg.order_by(ChatMessage.id.desc()).limit(limit + 1).subquery().c.id))
+    ids = union_all(*legs).subquery()
+
+    messages = (
+        db.query(ChatMessage)
+        .join(ids, ids.c.id == ChatMessage.id)
+        .order_by(ChatMessage.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(messages) > limit
+    return messages[:limit][::-1], has_more
+
+
+# -------------------------
+#  WRITES
+# -------------------------
+class ChatMessageWriter:
+    """
+    Group-commit writer for chat messages. save() queues the row and
+    awaits a future; a single writer thread takes everything queued (up
+    to BATCH_SIZE) and inserts it in one transaction, so messages that
+    arrive while a commit is in flight share the next one. Each future
+    resolves with the saved row (id, created_at) only after its batch has
+    committed. If the batch breaks a constraint, its messages are written
+    one transaction each, so only the offending message fails.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE, max_queue: int = MAX_QUEUE):
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self._queue: Deque[Tuple[dict, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.saved = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_batch = 0
+
+    # -------------------------
+    #  LIFECYCLE
+    # -------------------------
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="chat-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            self.flush()
+
+    # -------------------------
+    #  QUEUE
+    # -------------------------
+    async def save(self, **row) -> dict:
+        """Persist one ChatMessage; returns its columns once committed."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        row.setdefault("created_at", datetime.now())
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                raise RuntimeError("chat message queue is full")
+            self._queue.append((row, future))
+        self._wake.set()
+        return await future
+
+    def _take_batch(self) -> List[Tuple[dict, asyncio.Future]]:
+        with self._lock:
+            n = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(n)]
+
+    def flush(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            try:
+                outcomes = self._write(batch)
+            except Exception as exc:
+                logger.exception("Could not save %d chat messages", len(batch))
+                outcomes = [exc] * len(batch)
+            else:
+                self.batches += 1
+                self.max_batch = max(self.max_batch, len(batch))
+            for (_, future), outcome in zip(batch, outcomes):
+                if isinstance(outcome, Exception):
+                    self.failed += 1
+                    _resolve(future, error=outcome)
+                else:
+                    self.saved += 1
+                    _resolve(future, outcome)
+
+    def _write(self, batch: List[Tuple[dict, asyncio.Future]]) -> List[Union[dict, Exception]]:
+        rows = [row for row, _ in batch]
+        try:
+            with SessionLocal() as db:
+                saved = _insert_messages(db, rows)
+                db.commit()
+                return saved
+        except IntegrityError:
+            # A message the database refused (e.g. a receiver that no
+            # longer exists), or another worker created one of the
+            # conversations first. Writing each message on its own fails
+            # just the bad one, and finds the other worker's conversation.
+            logger.warning("Chat batch of %d rejected; saving its messages one by one", len(rows))
+            return [_write_one(row) for row in rows]
+
+
+def _write_one(row: dict) -> Union[dict, Exception]:
+    try:
+        with SessionLocal() as db:
+            saved = _insert_messages(db, [row])
+            db.commit()
+            return saved[0]
+    except Exception as exc:
+        logger.warning("Could not save chat message from %s to %s: %s",
+                       row.get("sender_id"), row.get("receiver_id"), exc)
+        return exc
+
+
+def _insert_messages(db: Session, rows: List[dict]) -> List[dict]:
+    # One multi-row INSERT for the batch (add_all + flush would send a
+    # statement per row on MySQL, which has no RETURNING). created_at is
+    # set client-side, so the ids are all that comes back. Conversations
+    # move on in the same transaction.
+    result = db.execute(insert(ChatMessage).values(rows))
+    ids = inserted_ids(db, result.lastrowid, len(rows))
+    saved = [{"id": message_id, **row} for message_id, row in zip(ids, rows)]
+    record_messages(db, [ChatMessage(**message) for message in saved])
+    return saved
+
+
+def _resolve(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Complete an event-loop future from the writer thread."""
+    def complete():
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    try:
+        future.get_loop().call_soon_threadsafe(complete)
+    except RuntimeError:
+        pass  # the loop has closed; nobody is waiting any more
+
+
+chat_writer = ChatMessageWriter()
@@ -0,0 +1,159 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, insert, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from app.models.chat import ChatMessage
+from app.models.conversation import Conversation
+from app.models.listing import Listing
+from app.models.user import User
+from app.utils.pagination import cursor_filter, encode_cursor
+
+# Characters of the last message kept for the inbox.
+PREVIEW_LENGTH = 200
+# Most recent first; id breaks ties so cursors are unambiguous.
+INBOX_ORDER = [(Conversation.last_message_at, True), (Conversation.id, True)]
+INBOX_SORT = "inbox"
+
+ConversationKey = Tuple[int, int, int]
+
+
+def conversation_key(listing_id: int, user_id: int, other_user_id: int) -> ConversationKey:
+    """(listing_id, user_a_id, user_b_id) with the pair in stored order."""
+    return (listing_id, min(user_id, other_user_id), max(user_id, other_user_id))
+
+
+def _preview(text: str) -> str:
+    return text if len(text) <= PREVIEW_LENGTH else text[:PREVIEW_LENGTH - 1] + "…"
+
+
+# -------------------------
+#  WRITES
+# -------------------------
+def record_messages(db: Session, messages: Sequence[ChatMessage]) -> None:
+    """
+    Move the conversations of freshly flushed messages on: last message,
+    and +1 unread for each receiver. Runs in the messages' transaction;
+    existing rows are locked first so concurrent writers serialize.
+    """
+    by_key: Dict[ConversationKey, List[ChatMessage]] = {}
+    for message in messages:
+        key = conversation_key(message.listing_id, message.sender_id, message.receiver_id)
+        by_key.setdefault(key, []).append(message)
+
+    columns = tuple_(Conversation.listing_id, Conversation.user_a_id, Conversation.user_b_id)
+    existing = {
+        (c.listing_id, c.user_a_id, c.user_b_id): c
+        for c in db.query(Conversation).filter(columns.in_(list(by_key))).with_for_update()
+    }
+    for key, batch in by_key.items():
+        conversation = existing.get(key)
+        if conversation is None:
+            listing_id, user_a_id, user_b_id = key
+            conversation = Conversation(listing_id=listing_id, user_a_id=user_a_id, user_b_id=user_b_id,
+                                        unread_a=0, unread_b=0)
+            db.add(conversation)
+        for message in batch:
+            if message.receiver_id == conversation.user_a_id:
+                conversation.unread_a += 1
+            else:
+                conversation.unread_b += 1
+        last = batch[-1]
+        conversation.last_message_id = last.id
+        conversation.last_sender_id = last.sender_id
+        conversation.last_message_preview = _preview(last.message)
+        conversation.last_message_at = last.created_at
+    db.flush()
+
+
+def mark_read(db: Session, listing_id: int, user_id: int, other_user_id: int) -> None:
+    """Zero the user's unread count for one conversation."""
+    listing_id, user_a_id, user_b_id = conversation_key(listing_id, user_id, other_user_id)
+    column = Conversation.unread_a if user_id == user_a_id else Conversation.unread_b
+    db.query(Conversation).filter(
+        Conversation.listing_id == listing_id,
+        Conversation.user_a_id == user_a_id,
+        Conversation.user_b_id == user_b_id,
+    ).update({column: 0}, synchronize_session=False)
+    db.commit()
+
+
+def backfill_conversations(db: Session, batch_size: int = 5000) -> None:
+    """Rebuild conversations from chat_messages (unread counts start at 0)."""
+    db.query(Conversation).delete()
+    latest: Dict[ConversationKey, ChatMessage] = {}
+    for message in db.query(ChatMessage).order_by(ChatMessage.id).yield_per(batch_size):
+        latest[conversation_key(message.listing_id, message.sender_id, message.receiver_id)] = message
+    rows = [
+        {
+            "listing_id": listing_id,
+            "user_a_id": user_a_id,
+            "user_b_id": user_b_id,
+            "last_message_id": m.id,
+            "last_sender_id": m.sender_id,
+            "last_message_preview": _preview(m.message),
+            "last_message_at": m.created_at,
+            "unread_a": 0,
+            "unread_b": 0,
+        }
+        for (listing_id, user_a_id, user_b_id), m in latest.items()
+    ]
+    for start in range(0, len(rows), batch_size):
+        db.execute(insert(Conversation), rows[start:start + batch_size])
+    db.commit()
+
+
+# -------------------------
+#  INBOX
+# -------------------------
+def inbox_page(db: Session, user_id: int, cursor: Optional[str] = None, limit: int = 20) -> dict:
+    """
+    The user's conversations, most recent first, with the listing title,
+    the other participant and the user's unread count, in one statement.
+    Each side of the pair is a leg of a UNION ALL that range-scans its
+    (user, last_message_at, id) index and stops after limit + 1 rows.
+    """
+    legs = []
+    for side in (Conversation.user_a_id, Conversation.user_b_id):
+        leg = select(Conversation.id).where(side == user_id)
+        if cursor:
+            leg = leg.where(cursor_filter(INBOX_ORDER, INBOX_SORT, cursor))
+        leg = leg.order_by(*[c.desc() for c, _ in INBOX_ORDER]).limit(limit + 1)
+        legs.append(select(leg.subquery().c.id))
+    ids = union_all(*legs).subquery()
+
+    is_a = Conversation.user_a_id == user_id
+    other_id = case((is_a, Conversation.user_b_id), else_=Conversation.user_a_id)
+    unread = case((is_a, Conversation.unread_a), else_=Conversation.unread_b)
+    rows = (
+        db.query(
+            Conversation.id,
+            Conversation.listing_id,
+            Listing.title.label("listing_title"),
+            User.id.label("user_id"),
+            User.name.label("user_name"),
+            User.profile_picture.label("user_image"),
+            Conversation.last_message_preview.label("last_message"),
+            Conversation.last_sender_id,
+            Conversation.last_message_at,
+            unread.label("unread_count"),
+        )
+        .join(ids, ids.c.id == Conversation.id)
+        .join(Listing, Listing.id == Conversation.listing_id)
+        .join(User, User.id == other_id)
+        .order_by(*[c.desc() for c, _ in INBOX_ORDER])
+        .limit(limit + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(INBOX_SORT, [last.last_message_at, last.id])
+    return {
+        "results": [row._asdict() for row in rows],
+        "count": len(rows),
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,219 @@
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.listing import Listing
+from app.services.ranking import naive_seconds
+
+# Lower edges of the price buckets reported by /search/listings?facets=true;
+# the last bucket is open-ended.
+PRICE_BUCKETS = [0, 100, 500, 1_000, 5_000, 10_000, 50_000, 100_000]
+
+
+class FacetIndex:
+    """
+    Column store of (listing id, category, location, price, created) for
+    facet counts and for filtering and ordering search hits without
+    reading them all from the database. Categories and locations are
+    dictionary-encoded to small ints, so counting a matched set is a mask
+    plus one np.bincount per facet.
+
+    Rows are kept sorted by listing id; deleted rows are only marked dead.
+    Writes never modify an array in place: they build replacements and
+    swap them in under the lock, so the arrays counts() snapshots stay
+    consistent while it works on them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self.ids = np.empty(0, dtype=np.int64)
+        self.category = np.empty(0, dtype=np.int32)
+        self.location = np.empty(0, dtype=np.int32)
+        self.price = np.empty(0, dtype=np.float64)
+        # Naive seconds (see ranking.naive_seconds), NaN when unknown
+        self.created = np.empty(0, dtype=np.float64)
+        self.alive = np.empty(0, dtype=bool)
+        self.categories: List[str] = []
+        self.locations: List[str] = []
+        self._category_codes: Dict[str, int] = {}
+        self._location_codes: Dict[str, int] = {}
+
+    @staticmethod
+    def _code(value: str, names: List[str], codes: Dict[str, int]) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    # -------------------------
+    #  WRITES
+    # -------------------------
+    def add(
+        self,
+        listing_id: int,
+        category: str,
+        location: str,
+        price,
+        created_at: Optional[datetime] = None,
+    ) -> None:
+        with self._lock:
+            cat = self._code(category, self.categories, self._category_codes)
+            loc = self._code(location, self.locations, self._location_codes)
+            price = float(price or 0)
+            created = _seconds(created_at)
+            i = int(np.searchsorted(self.ids, listing_id))
+            if i < len(self.ids) and self.ids[i] == listing_id:
+                self.category = _replaced(self.category, i, cat)
+                self.location = _replaced(self.location, i, loc)
+                self.price = _replaced(self.price, i, price)
+                self.created = _replaced(self.created, i, created)
+                self.alive = _replaced(self.alive, i, True)
+                return
+            self.ids = np.insert(self.ids, i, listing_id)
+            self.category = np.insert(self.category, i, cat)
+            self.location = np.insert(self.location, i, loc)
+            self.price = np.insert(self.price, i, price)
+            self.created = np.insert(self.created, i, created)
+            self.alive = np.insert(self.alive, i, True)
+
+    def add_listing(self, listing: Listing) -> None:
+        self.add(listing.id, listing.category, listing.location, listing.price, listing.created_at)
+
+    def remove(self, listing_id: int) -> None:
+        with self._lock:
+            i = int(np.searchsorted(self.ids, listing_id))
+            if i < len(self.ids) and self.ids[i] == listing_id:
+                self.alive = _replaced(self.alive, i, False)
+
+    def rebuild(self, db: Session) -> None:
+        rows = (
+            db.query(Listing.id, Listing.category, Listing.location, Listing.price, Listing.created_at)
+            .order_by(Listing.id)
+            .all()
+        )
+        with self._lock:
+            self._clear()
+            n = len(rows)
+            self.ids = np.fromiter((r.id for r in rows), dtype=np.int64, count=n)
+            self.category = np.fromiter(
+                (self._code(r.category, self.categories, self._category_codes) for r in rows),
+                dtype=np.int32, count=n,
+            )
+            self.location = np.fromiter(
+                (self._code(r.location, self.locations, self._location_codes) for r in rows),
+                dtype=np.int32, count=n,
+            )
+            self.price = np.fromiter((float(r.price or 0) for r in rows), dtype=np.float64, count=n)
+            self.created = np.fromiter((_seconds(r.created_at) for r in rows), dtype=np.float64, count=n)
+            self.alive = np.ones(n, dtype=bool)
+
+    # -------------------------
+    #  SEARCH HITS
+    # -------------------------
+    def matching(
+        self,
+        listing_ids: Iterable[int],
+        category: Optional[str] = None,
+        location: Optional[str] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (ids, price, created) of the live listings among `listing_ids`
+        that are in `category` and `location` when given, in the order of
+        `listing_ids`.
+        """
+        with self._lock:
+            ids, alive = self.ids, self.alive
+            cat, loc, price, created = self.category, self.location, self.price, self.created
+            category_code = self._category_codes.get(category, -1) if category else None
+            location_code = self._location_codes.get(location, -1) if location else None
+
+        wanted = np.fromiter(listing_ids, dtype=np.int64)
+        if not len(ids) or not len(wanted):
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty.astype(np.float64), empty.astype(np.float64)
+        pos = np.searchsorted(ids, wanted)
+        pos[pos == len(ids)] = 0
+        keep = (ids[pos] == wanted) & alive[pos]
+        if category_code is not None:
+            keep &= cat[pos] == category_code
+        if location_code is not None:
+            keep &= loc[pos] == location_code
+        pos = pos[keep]
+        return wanted[keep], price[pos], created[pos]
+
+    # -------------------------
+    #  COUNTS
+    # -------------------------
+    def counts(
+        self,
+        listing_ids: Optional[Iterable[int]] = None,
+        category: Optional[str] = None,
+    ) -> dict:
+        """
+        Facet counts for the matched set (every live listing when
+        `listing_ids` is None). The category facet ignores the category
+        filter so the sidebar can still offer the other categories.
+        """
+        # Consistent snapshot: writers swap in new arrays rather than
+        # changing these, so they can be used after the lock is released
+        with self._lock:
+            ids, alive = self.ids, self.alive
+            cat, loc, price = self.category, self.location, self.price
+            categories, locations = list(self.categories), list(self.locations)
+            category_code = self._category_codes.get(category) if category else None
+
+        mask = alive.copy()
+        if listing_ids is not None:
+            wanted = np.fromiter(listing_ids, dtype=np.int64)
+            matched = np.zeros(len(ids), dtype=bool)
+            if len(ids) and len(wanted):
+                pos = np.searchsorted(ids, wanted)
+                pos[pos == len(ids)] = 0
+                matched[pos[ids[pos] == wanted]] = True
+            mask &= matched
+
+        category_counts = np.bincount(cat[mask], minlength=len(categories))
+        if category:
+            mask &= cat == (category_code if category_code is not None else -1)
+        location_counts = np.bincount(loc[mask], minlength=len(locations))
+        bucket = np.searchsorted(PRICE_BUCKETS, price[mask], side="right") - 1
+        price_counts = np.bincount(np.clip(bucket, 0, None), minlength=len(PRICE_BUCKETS))
+
+        return {
+            "category": _named_counts(categories, category_counts),
+            "location": _named_counts(locations, location_counts),
+            "price": [
+                {
+                    "min": low,
+                    "max": PRICE_BUCKETS[i + 1] if i + 1 < len(PRICE_BUCKETS) else None,
+                    "count": int(price_counts[i]),
+                }
+                for i, low in enumerate(PRICE_BUCKETS)
+                if price_counts[i]
+            ],
+        }
+
+
+def _seconds(created_at: Optional[datetime]) -> float:
+    return naive_seconds(created_at) if created_at is not None else np.nan
+
+
+def _replaced(values: np.ndarray, i: int, value) -> np.ndarray:
+    values = values.copy()
+    values[i] = value
+    return values
+
+
+def _named_counts(names: List[str], counts: np.ndarray) -> Dict[str, int]:
+    order = np.argsort(-counts, kind="stable")
+    return {names[i]: int(counts[i]) for i in order if counts[i]}
+
+
+facet_index = FacetIndex()
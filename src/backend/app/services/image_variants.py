@@ -0,0 +1,217 @@
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.listing import Listing
+from app.models.listing_image import ListingImage
+from app.models.listing_image_variant import ListingImageVariant
+from app.services.storage import URL_PREFIX, upload_store
+
+logger = logging.getLogger("image_variants")
+
+# Variant name -> longest edge in pixels. Images are never upscaled.
+VARIANT_SIZES = {
+    "thumb": 160,
+    "card": 480,
+    "full": 1600,
+}
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+# Only these are resized; anything else (SVG, PDF, ...) keeps the original.
+RASTER_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+
+
+# -------------------------
+#  RENDERING (runs in the worker processes)
+# -------------------------
+def render_variants(source_path: str) -> List[dict]:
+    """
+    Resize and recompress one stored image into every VARIANT_SIZES
+    entry, as JPEG (PNG when it has transparency) plus WebP when Pillow
+    was built with it. Variants are written to the content store, so
+    identical outputs are shared. Returns one dict per variant.
+    """
+    from PIL import Image, ImageOps, features
+
+    webp = features.check("webp")
+    with Image.open(source_path) as original:
+        original.load()
+        image = ImageOps.exif_transpose(original)
+
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    variants = []
+    for name, edge in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+        encodings = [("", "PNG", {"optimize": True}) if has_alpha else
+                     ("", "JPEG", {"quality": JPEG_QUALITY, "optimize": True, "progressive": True})]
+        if webp:
+            encodings.append(("_webp", "WEBP", {"quality": WEBP_QUALITY, "method": 4}))
+        for suffix, fmt, options in encodings:
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt, **options)
+            size = buffer.tell()
+            buffer.seek(0)
+            stored = upload_store.save_stream(buffer, f"variant.{fmt.lower()}")
+            variants.append({
+                "name": name + suffix,
+                "url": stored.url,
+                "width": resized.width,
+                "height": resized.height,
+                "size_bytes": size,
+            })
+    return variants
+
+
+# -------------------------
+#  PIPELINE
+# -------------------------
+class VariantPipeline:
+    """
+    Generates variants for listing images off the request path. Rendering
+    happens in a process pool; finished results are written to
+    listing_image_variants by a single writer thread, which then refreshes
+    the listing's card so feeds pick the variants up.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._pending = set()
+
+        self.completed = 0
+        self.failed = 0
+
+    # -------------------------
+    #  LIFECYCLE
+    # -------------------------
+    def start(self) -> None:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-variants")
+
+    def stop(self) -> None:
+        """Drop queued work; images still missing variants are picked up by backfill()."""
+        with self._lock:
+            pool, writer = self._pool, self._writer
+            self._pool = self._writer = None
+            self._pending.clear()
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if writer is not None:
+            writer.shutdown(wait=True)
+
+    # -------------------------
+    #  QUEUE
+    # -------------------------
+    def submit(self, images: Iterable[ListingImage]) -> None:
+        """Queue variant generation for freshly committed images."""
+        self.submit_many((img.id, img.listing_id, img.image_url) for img in images)
+
+    def submit_many(self, jobs: Iterable[Tuple[int, int, str]]) -> None:
+        self.start()
+        with self._lock:
+            for image_id, listing_id, image_url in jobs:
+                source = _source_path(image_url)
+                if image_id in self._pending or source is None:
+                    continue
+                self._pending.add(image_id)
+                future = self._pool.submit(render_variants, source)
+                future.add_done_callback(
+                    lambda f, image_id=image_id, listing_id=listing_id: self._finished(image_id, listing_id, f)
+                )
+
+    def backfill(self, db: Session) -> int:
+        """
+        Queue every image that has no variants yet (e.g. uploaded before
+        this existed, or dropped by stop()). Run by app.backfill_variants
+        rather than at startup, so workers don't all render the same
+        images. Returns how many images were queued.
+        """
+        has_variants = select(ListingImageVariant.image_id)
+        rows = (
+            db.query(ListingImage.id, ListingImage.listing_id, ListingImage.image_url)
+            .filter(ListingImage.id.not_in(has_variants))
+            .all()
+        )
+        self.submit_many(rows)
+        with self._lock:
+            return len(self._pending)
+
+    def join(self, poll: float = 0.2) -> None:
+        """Block until every queued image has been rendered and recorded."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+            time.sleep(poll)
+
+    def _finished(self, image_id: int, listing_id: int, future: Future) -> None:
+        writer = self._writer
+        if future.cancelled() or writer is None:
+            return
+        writer.submit(self._record, image_id, listing_id, future)
+
+    def _record(self, image_id: int, listing_id: int, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(image_id)
+        try:
+            variants = future.result()
+        except Exception:
+            self.failed += 1
+            logger.warning("Could not render variants for image %s", image_id, exc_info=True)
+            return
+
+        # Imported here so the render processes, which import this
+        # module, do not load the listing service and its indexes.
+        from app.services.listing_service import listing_variants_ready
+
+        try:
+            with SessionLocal() as db:
+                if db.get(ListingImage, image_id) is None:
+                    return  # image replaced or listing deleted meanwhile
+                db.query(ListingImageVariant).filter(ListingImageVariant.image_id == image_id).delete()
+                db.add_all(ListingImageVariant(image_id=image_id, **v) for v in variants)
+                # The listing's payload changed, so move its version on
+                db.query(Listing).filter(Listing.id == listing_id).update(
+                    {Listing.updated_at: func.now()}, synchronize_session=False
+                )
+                db.commit()
+                listing_variants_ready(db, listing_id)
+        except Exception:
+            self.failed += 1
+            logger.exception("Could not save variants for image %s", image_id)
+            return
+        self.completed += 1
+
+
+def _source_path(image_url: str) -> Optional[str]:
+    """Local raster file behind an /uploads URL, or None."""
+    prefix = URL_PREFIX + "/"
+    if not image_url or not image_url.startswith(prefix):
+        return None
+    if os.path.splitext(image_url)[1].lower() not in RASTER_EXTENSIONS:
+        return None
+    path = upload_store.path(image_url[len(prefix):])
+    return path if os.path.isfile(path) else None
+
+
+image_variants = VariantPipeline(workers=settings.IMAGE_VARIANT_WORKERS)
@@ -12,6 +12,7 @@ from app.schemas.item_interaction import (
 from app.models.item_interaction import ItemInteraction, InteractionAction
 from app.models.listing import Listing
 from app.models.user import User
+from app.services.popularity import popularity
 
 
 # ----------------------------------------------------
@@ -35,6 +36,7 @@ def record_item_interaction(
     db.add(interaction)
     db.commit()
     db.refresh(interaction)
+    popularity.add(interaction.listing_id, interaction.weight, interaction.id)
 
     return interaction
 
@@ -213,13 +215,6 @@ def get_seller_stats(db: Session, seller_id: int) -> SellerStatsResponse:
 # 6. POPULARITY SCORES FOR SEARCH RANKING
 # ----------------------------------------------------
 def get_popularity_scores(db: Session) -> Dict[int, float]:
-    rows = (
-        db.query(
-            ItemInteraction.listing_id,
-            func.sum(ItemInteraction.weight).label("score")
-        )
-        .group_by(ItemInteraction.listing_id)
-        .all()
-    )
-
-    return {row[0]: float(row[1]) for row in rows}
+    """Served from the in-memory popularity vector; a stale one is reloaded in the background."""
+    popularity.refresh_if_stale()
+    return popularity.as_dict()
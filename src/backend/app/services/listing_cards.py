@@ -0,0 +1,176 @@
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.listing import Listing
+from app.schemas.listing import ListingRead
+from app.services.loading import in_id_batches, listings_with_images
+
+# Listings loaded per round trip when (re)filling the store.
+LOAD_BATCH_SIZE = 1000
+# Seconds a card is served to callers that cannot pass listing versions
+# (recommendations) before it is read again; bounds how long an edit made
+# on another worker goes unseen there.
+CARD_TTL = 60.0
+
+# ListingRead fields other than images, in ListingRead order. The
+# description is not kept on cards (it is most of a listing's size);
+# feeds read it with the page's rows and pass it to to_dict().
+SCALAR_FIELDS = (
+    "title", "description", "price", "location", "category",
+    "id", "seller_id", "seller_user_id", "created_at", "updated_at",
+)
+
+
+class ListingCard:
+    """
+    Denormalized, JSON-ready projection of one listing: every ListingRead
+    field but the description, already converted (dates as ISO strings,
+    price as float), plus the images as plain tuples. Feeds render straight from these instead
+    of loading Listing rows and their images. `version` is the
+    Listing.version the card was built from.
+    """
+
+    __slots__ = (
+        "id", "title", "price", "location", "category",
+        "seller_id", "seller_user_id", "created_at", "updated_at", "images", "version", "loaded_at",
+    )
+
+    def __init__(self, data: dict, version: Optional[int] = None):
+        self.id = data["id"]
+        self.title = data["title"]
+        self.price = data["price"]
+        self.location = data["location"]
+        self.category = data["category"]
+        self.seller_id = data["seller_id"]
+        self.seller_user_id = data["seller_user_id"]
+        self.created_at = data["created_at"]
+        self.updated_at = data["updated_at"]
+        # (image id, url, is_primary, {variant name: url})
+        self.images = tuple(
+            (img["id"], img["image_url"], img["is_primary"], img["variants"])
+            for img in data["images"]
+        )
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def from_listing(cls, listing: Listing) -> "ListingCard":
+        data = ListingRead.model_validate(listing, from_attributes=True).model_dump(mode="json")
+        return cls(data, listing.version)
+
+    def primary_image(self, variant: Optional[str] = None) -> Optional[str]:
+        """URL of the primary image, as `variant` when that has been generated."""
+        if not self.images:
+            return None
+        image = next((img for img in self.images if img[2]), self.images[0])
+        return image[3].get(variant, image[1]) if variant else image[1]
+
+    def to_dict(self, fields: Optional[FrozenSet[str]] = None, description: Optional[str] = None) -> dict:
+        """
+        Same shape as ListingRead.model_dump(mode="json"), narrowed to
+        `fields` when given. `description` is the listing's, which the
+        card does not hold.
+        """
+        data = {
+            name: description if name == "description" else getattr(self, name)
+            for name in SCALAR_FIELDS
+            if fields is None or name in fields
+        }
+        if fields is None or "images" in fields:
+            data["images"] = [
+                {"id": image_id, "image_url": url, "is_primary": is_primary, "variants": variants}
+                for image_id, url, is_primary, variants in self.images
+            ]
+        return data
+
+    def summary(self) -> dict:
+        """Small card used by recommendations."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "price": self.price,
+            "images": [
+                {"image_url": url, "variants": variants}
+                for _, url, _, variants in self.images
+            ],
+        }
+
+
+class ListingCardStore:
+    """
+    Listing id -> ListingCard for every listing, filled at startup and
+    kept in sync by the listing write hooks. get_many() also reloads from
+    the database the ids this worker has not seen yet (e.g. created on
+    another worker) and the cards that are out of date: an older version
+    than the caller read, or, without versions, older than CARD_TTL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cards: Dict[int, ListingCard] = {}
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    # -------------------------
+    #  WRITES
+    # -------------------------
+    def put(self, listing: Listing) -> ListingCard:
+        card = ListingCard.from_listing(listing)
+        with self._lock:
+            self.cards[card.id] = card
+        return card
+
+    def remove(self, listing_id: int) -> None:
+        with self._lock:
+            self.cards.pop(listing_id, None)
+
+    def rebuild(self, db: Session) -> None:
+        cards = {}
+        for batch in in_id_batches(listings_with_images(db), Listing.id, LOAD_BATCH_SIZE):
+            for listing in batch:
+                cards[listing.id] = ListingCard.from_listing(listing)
+            db.expunge_all()
+        with self._lock:
+            self.cards = cards
+
+    # -------------------------
+    #  READS
+    # -------------------------
+    def get(self, listing_id: int) -> Optional[ListingCard]:
+        return self.cards.get(listing_id)
+
+    def get_many(
+        self,
+        listing_ids: Iterable[int],
+        db: Optional[Session] = None,
+        versions: Optional[Dict[int, int]] = None,
+    ) -> List[ListingCard]:
+        """
+        Cards for `listing_ids` in the order given. `versions` maps ids to
+        their current Listing.version (feeds select it with the sort keys).
+        Missing and out-of-date cards are loaded in one query when `db` is
+        passed; ids that do not exist at all are skipped.
+        """
+        listing_ids = list(listing_ids)
+        cards = self.cards
+        if versions is not None:
+            missing = [
+                i for i in listing_ids
+                if i not in cards or cards[i].version != versions.get(i, cards[i].version)
+            ]
+        else:
+            expired = time.monotonic() - CARD_TTL
+            missing = [i for i in listing_ids if i not in cards or cards[i].loaded_at < expired]
+        if missing and db is not None:
+            listings = listings_with_images(db).filter(Listing.id.in_(missing)).all()
+            for listing in listings:
+                self.put(listing)
+            cards = self.cards
+        return [cards[i] for i in listing_ids if i in cards]
+
+
+listing_cards = ListingCardStore()
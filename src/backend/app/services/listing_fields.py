@@ -0,0 +1,55 @@
+from functools import lru_cache
+from typing import FrozenSet, Optional, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, create_model
+from sqlalchemy.orm import Session, load_only
+
+from app.models.listing import Listing
+from app.schemas.listing import ListingRead
+from app.services.loading import images_with_variants
+
+# Everything ?fields= can ask for, in ListingRead order.
+LISTING_FIELDS = tuple(ListingRead.model_fields)
+# Fields backed by a Listing column or column_property (everything but images).
+COLUMN_FIELDS = frozenset(name for name in LISTING_FIELDS if name in Listing.__mapper__.column_attrs)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    """
+    ?fields=title,price -> {"id", "title", "price"}; None (the full
+    payload) when the parameter is absent or empty. The id is always kept.
+    """
+    if not fields:
+        return None
+    wanted = {name.strip() for name in fields.split(",") if name.strip()}
+    if not wanted:
+        return None
+    unknown = wanted.difference(LISTING_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))} (allowed: {', '.join(LISTING_FIELDS)})",
+        )
+    return frozenset(wanted | {"id"})
+
+
+@lru_cache(maxsize=256)
+def partial_model(fields: FrozenSet[str]) -> Type[BaseModel]:
+    """ListingRead reduced to `fields`; validating it only reads those attributes."""
+    return create_model(
+        "ListingFields",
+        **{name: (info.annotation, info) for name, info in ListingRead.model_fields.items() if name in fields},
+    )
+
+
+def listings_with_fields(db: Session, fields: FrozenSet[str]):
+    """Listings with only the requested columns loaded, and images only when asked for."""
+    options = [load_only(*(getattr(Listing, name) for name in LISTING_FIELDS if name in COLUMN_FIELDS & fields))]
+    if "images" in fields:
+        options.append(images_with_variants())
+    return db.query(Listing).options(*options)
+
+
+def render_fields(listing: Listing, fields: FrozenSet[str]) -> dict:
+    return partial_model(fields).model_validate(listing, from_attributes=True).model_dump(mode="json")
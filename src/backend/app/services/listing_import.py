@@ -0,0 +1,242 @@
+import csv
+import io
+import json
+import os
+import zipfile
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.database import inserted_ids
+from app.models.listing import Listing
+from app.models.listing_image import ListingImage
+from app.schemas.listing import ListingCreate
+from app.services.image_variants import image_variants
+from app.services.listing_service import listings_saved
+from app.services.loading import listings_with_images
+from app.services.storage import upload_store
+
+# Rows inserted (and committed) together.
+IMPORT_BATCH_SIZE = 500
+# Per-row errors listed in the report; the counts always cover every row.
+MAX_REPORTED_ERRORS = 1000
+# Image names in a CSV "images" cell are separated by this.
+IMAGE_SEPARATOR = "|"
+
+FIELDS = ("title", "description", "price", "location", "category")
+MAX_LENGTHS = {
+    name: Listing.__table__.c[name].type.length
+    for name in FIELDS
+    if getattr(Listing.__table__.c[name].type, "length", None)
+}
+
+
+class RowError(Exception):
+    pass
+
+
+# -------------------------
+#  READING
+# -------------------------
+def iter_rows(source: BinaryIO, fmt: str) -> Iterator[Tuple[int, dict]]:
+    """(row number, raw dict) pairs, read incrementally from CSV or NDJSON."""
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        # Header is line 1, so data rows start at 2 like a spreadsheet
+        for number, row in enumerate(csv.DictReader(text), start=2):
+            yield number, row
+        return
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield number, {"__error__": f"invalid JSON: {exc.msg}"}
+            continue
+        yield number, row if isinstance(row, dict) else {"__error__": "expected a JSON object"}
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file")
+
+
+# -------------------------
+#  VALIDATION
+# -------------------------
+class ImageArchive:
+    """Images from the optional zip, stored on first use and looked up by name."""
+
+    def __init__(self, source: Optional[BinaryIO]):
+        self.members: Dict[str, zipfile.ZipInfo] = {}
+        self.stored: Dict[str, str] = {}
+        self.zip = None
+        if source is not None:
+            try:
+                self.zip = zipfile.ZipFile(source)
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail="images must be a zip archive")
+            for info in self.zip.infolist():
+                if not info.is_dir():
+                    self.members.setdefault(info.filename, info)
+                    self.members.setdefault(os.path.basename(info.filename), info)
+
+    def url(self, name: str) -> str:
+        if name in self.stored:
+            return self.stored[name]
+        info = self.members.get(name)
+        if info is None:
+            raise RowError(f"image '{name}' is not in the zip")
+        if info.file_size > upload_store.max_bytes:
+            raise RowError(f"image '{name}' is too large")
+        try:
+            with self.zip.open(info) as member:
+                url = upload_store.save_stream(member, info.filename).url
+        except HTTPException as exc:
+            raise RowError(f"image '{name}': {exc.detail}")
+        except (zipfile.BadZipFile, zlib.error, NotImplementedError, RuntimeError):
+            # Corrupt, encrypted or compressed with an unsupported method
+            raise RowError(f"image '{name}' could not be read from the zip")
+        self.stored[name] = url
+        return url
+
+
+def _image_names(raw) -> List[str]:
+    if raw is None or raw == "":
+        return []
+    if isinstance(raw, str):
+        return [n.strip() for n in raw.split(IMAGE_SEPARATOR) if n.strip()]
+    if isinstance(raw, list) and all(isinstance(n, str) for n in raw):
+        return [n.strip() for n in raw if n.strip()]
+    raise RowError("images must be a list of file names")
+
+
+def validate_row(raw: dict, archive: ImageArchive) -> Tuple[dict, List[str]]:
+    """(listing values, image URLs) for one row, or RowError."""
+    if "__error__" in raw:
+        raise RowError(raw["__error__"])
+    try:
+        data = ListingCreate.model_validate({name: raw.get(name) for name in FIELDS})
+    except ValidationError as exc:
+        raise RowError("; ".join(
+            f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors()
+        ))
+    values = data.model_dump()
+    for name in FIELDS:
+        if isinstance(values[name], str) and not values[name].strip():
+            raise RowError(f"{name}: required")
+    for name, limit in MAX_LENGTHS.items():
+        if len(values[name]) > limit:
+            raise RowError(f"{name}: longer than {limit} characters")
+    if values["price"] < 0:
+        raise RowError("price: must not be negative")
+
+    image_names = _image_names(raw.get("images"))
+    if image_names and archive.zip is None:
+        raise RowError("row lists images but no zip was uploaded")
+    return values, [archive.url(name) for name in image_names]
+
+
+# -------------------------
+#  IMPORT
+# -------------------------
+def import_listings(
+    db: Session,
+    seller_id: int,
+    source: BinaryIO,
+    fmt: str,
+    images: Optional[BinaryIO] = None,
+) -> dict:
+    """
+    Validate rows as they are read and insert the valid ones
+    IMPORT_BATCH_SIZE at a time, one transaction per batch. A batch that
+    fails to insert is rolled back and retried row by row, so only the
+    rows the database refuses are reported. A file that cannot be read
+    as UTF-8 CSV/NDJSON stops the import with a 400; batches committed
+    before that point stay committed.
+    """
+    archive = ImageArchive(images)
+    report = {"created": 0, "failed": 0, "listing_ids": [], "errors": []}
+
+    def fail(row_number: int, message: str) -> None:
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row_number, "error": message})
+
+    batch: List[Tuple[int, dict, List[str]]] = []
+    row_number = 0
+    try:
+        for row_number, raw in iter_rows(source, fmt):
+            try:
+                values, urls = validate_row(raw, archive)
+            except RowError as exc:
+                fail(row_number, str(exc))
+                continue
+            batch.append((row_number, values, urls))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                _insert_batch(db, seller_id, batch, report, fail)
+                batch = []
+    except (UnicodeDecodeError, csv.Error) as exc:
+        reason = "not UTF-8 text" if isinstance(exc, UnicodeDecodeError) else str(exc)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Could not read the file after row {row_number}: {reason}. "
+                   f"{report['created']} listings from earlier rows were imported.",
+        )
+    if batch:
+        _insert_batch(db, seller_id, batch, report, fail)
+    return report
+
+
+def _insert_batch(db: Session, seller_id: int, batch, report: dict, fail) -> None:
+    try:
+        ids = _insert_rows(db, seller_id, batch)
+    except Exception:
+        # Insert the rows one by one so only the failing ones are lost
+        db.rollback()
+        ids = []
+        for item in batch:
+            try:
+                ids.extend(_insert_rows(db, seller_id, [item]))
+            except Exception as exc:
+                db.rollback()
+                fail(item[0], f"insert failed: {exc.__class__.__name__}")
+        if not ids:
+            return
+
+    report["created"] += len(ids)
+    report["listing_ids"].extend(ids)
+
+    # Refresh the in-memory indexes and queue image variants for the batch
+    db.expunge_all()
+    saved = listings_with_images(db).filter(Listing.id.in_(ids)).all()
+    listings_saved(saved)
+    image_variants.submit(img for listing in saved for img in listing.images)
+
+
+def _insert_rows(db: Session, seller_id: int, batch) -> List[int]:
+    """Insert and commit the batch's listings and images; returns the listing ids."""
+    rows = [{"seller_id": seller_id, **values} for _, values, _ in batch]
+    # One multi-row INSERT for the listings (add_all + flush would send
+    # a statement per row on MySQL, which has no RETURNING) and one
+    # executemany for their images
+    result = db.execute(insert(Listing).values(rows))
+    ids = inserted_ids(db, result.lastrowid, len(rows))
+    image_rows = [
+        {"listing_id": listing_id, "image_url": url, "is_primary": i == 0}
+        for listing_id, (_, _, urls) in zip(ids, batch)
+        for i, url in enumerate(urls)
+    ]
+    if image_rows:
+        db.execute(insert(ListingImage), image_rows)
+    db.commit()
+    return ids
@@ -0,0 +1,365 @@
+import threading
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.listing import Listing
+from app.schemas.listing import ListingRead
+from app.services.autocomplete import autocomplete
+from app.services.chat_context import invalidate_listing_owner, listing_owner_changed
+from app.services.facets import facet_index
+from app.services.listing_cards import listing_cards
+from app.services.listing_fields import listings_with_fields, render_fields
+from app.services.loading import in_id_batches, listings_with_images
+from app.services.popularity import popularity
+from app.services.ranking import blend_scores, ranking_clock
+from app.services.search_index import search_index
+from app.utils.cache import LRUCache
+from app.utils.conditional import weak_etag
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_paginate
+
+
+# Keyset orderings for listing feeds: (column, descending). Every one
+# ends in Listing.id so the order is total and cursors are unambiguous.
+LISTING_SORTS = {
+    "newest": [(Listing.created_at, True), (Listing.id, True)],
+    "price_low": [(Listing.price, False), (Listing.id, False)],
+    "price_high": [(Listing.price, True), (Listing.id, True)],
+}
+
+
+def feed_query(db: Session):
+    """
+    Listing rows reduced to their sort keys, version and description.
+    Feeds page over this and render the page from the listing card store
+    (serialize_page), which reloads any card older than the version read
+    here; the description, which cards leave out, comes from the row.
+    """
+    return db.query(Listing.id, Listing.created_at, Listing.price, Listing.version, Listing.description)
+
+
+def paginate_listings(
+    query,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    include_total: bool = False,
+) -> dict:
+    if sort not in LISTING_SORTS:
+        sort = "newest"
+    return keyset_paginate(query, LISTING_SORTS[sort], sort, cursor, limit, include_total)
+
+
+# In-memory orderings of search hits, the same as LISTING_SORTS:
+# (key, tie-breaker), both read highest first, so ascending sorts negate
+# theirs.
+HIT_SORTS = {
+    "newest": lambda ids, price, created: (created, ids),
+    "price_low": lambda ids, price, created: (-price, -ids),
+    "price_high": lambda ids, price, created: (price, ids),
+}
+
+
+def paginate_hits(
+    query,
+    scores: Dict[int, float],
+    sort: str = "relevance",
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    include_total: bool = False,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+) -> dict:
+    """
+    Pages of search hits. `scores` maps every hit id to its text score.
+    The hits are filtered by category and location, ordered and cut at
+    the cursor in memory from the facet columns, so only the ids of the
+    page itself go into the IN list that reads them. `query` must apply
+    the same filters; hits it no longer returns (changed on another
+    worker) are skipped and the next ones read instead.
+
+    sort=relevance blends text scores with popularity and recency over
+    the whole filtered hit set in one vectorized pass; the other sorts
+    match LISTING_SORTS. Render the rows with serialize_page.
+    """
+    if sort != "relevance" and sort not in HIT_SORTS:
+        sort = "newest"
+
+    ids, price, created = facet_index.matching(scores, category, location)
+
+    # The relevance cursor also pins the clock used for recency so later
+    # pages are cut from the same ranking as the first one.
+    now, after = ranking_clock(), None
+    if cursor:
+        try:
+            values = decode_cursor(cursor, sort)
+            if sort == "relevance":
+                last_key, last_id, now = values
+                now = float(now)
+            else:
+                last_key, last_id = values
+            after = (float(last_key), int(last_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if sort == "relevance":
+        key = blend_scores(ids, [scores[i] for i in ids.tolist()], created, now)
+        tie = ids
+    else:
+        key, tie = HIT_SORTS[sort](ids, price, created)
+    # Unknown created_at sorts last
+    key = np.nan_to_num(key, nan=-np.inf)
+    total = len(ids)
+
+    if after:
+        last_key, last_id = after
+        last_tie = -last_id if sort == "price_low" else last_id
+        keep = (key < last_key) | ((key == last_key) & (tie < last_tie))
+        ids, key, tie = ids[keep], key[keep], tie[keep]
+
+    order = np.lexsort((-tie, -key))
+    ranked, key = ids[order].tolist(), key[order].tolist()
+
+    # Read the page plus one row to know whether another page follows
+    results, positions, start = [], [], 0
+    while len(results) <= limit and start < len(ranked):
+        window = ranked[start:start + limit + 1 - len(results)]
+        rows = {row.id: row for row in query.filter(Listing.id.in_(window))}
+        for offset, listing_id in enumerate(window):
+            if listing_id in rows:
+                results.append(rows[listing_id])
+                positions.append(start + offset)
+        start += len(window)
+
+    next_cursor = None
+    if len(results) > limit:
+        results, last = results[:limit], positions[limit - 1]
+        values = [key[last], ranked[last]]
+        next_cursor = encode_cursor(sort, values + [now] if sort == "relevance" else values)
+
+    page = {
+        "results": results,
+        "count": len(results),
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
+    if include_total:
+        page.update({"total": total, "total_is_estimate": False})
+    return page
+
+
+def serialize_page(page: dict, db: Optional[Session] = None, fields: Optional[FrozenSet[str]] = None) -> dict:
+    """
+    Replace the page's rows (anything with .id and .version) with
+    JSON-ready ListingRead dicts from the listing card store, narrowed to
+    `fields` when given. Descriptions come from the rows' .description,
+    or are read for the page in one query when the rows lack it.
+    """
+    rows = page["results"]
+    cards = listing_cards.get_many((row.id for row in rows), db, {row.id: row.version for row in rows})
+    descriptions = {}
+    if fields is None or "description" in fields:
+        if rows and hasattr(rows[0], "description"):
+            descriptions = {row.id: row.description for row in rows}
+        elif rows and db is not None:
+            descriptions = dict(
+                db.query(Listing.id, Listing.description).filter(Listing.id.in_([row.id for row in rows])).all()
+            )
+    page["results"] = [card.to_dict(fields, descriptions.get(card.id)) for card in cards]
+    page["count"] = len(page["results"])
+    return page
+
+
+# ----------------------------------------------------
+# NDJSON EXPORT
+# ----------------------------------------------------
+# Listings read (and their images loaded) per query.
+EXPORT_BATCH_SIZE = 500
+
+
+def export_listings_ndjson(updated_since: Optional[datetime] = None) -> Iterator[bytes]:
+    """
+    Every listing as one ListingRead JSON object per line, oldest id
+    first. Listings are read EXPORT_BATCH_SIZE at a time by keyset (id >
+    last id), each batch with its images selectin-loaded, so memory stays
+    flat however big the catalogue is. Uses its own session because the
+    response outlives the request's.
+    """
+    with SessionLocal() as db:
+        query = listings_with_images(db)
+        if updated_since is not None:
+            query = query.filter(Listing.updated_at >= updated_since)
+        for batch in in_id_batches(query, Listing.id, EXPORT_BATCH_SIZE):
+            chunk = [
+                ListingRead.model_validate(listing, from_attributes=True).model_dump_json()
+                for listing in batch
+            ]
+            # Nothing from this batch is needed again
+            db.expunge_all()
+            yield ("\n".join(chunk) + "\n").encode()
+
+
+# ----------------------------------------------------
+# LISTING DETAIL CACHE
+# ----------------------------------------------------
+# Rendered GET /listings/{id} bodies, keyed by listing id and versioned
+# by Listing.version. Writes on this worker drop the entry straight away;
+# entries made stale by another worker fail the version check, which
+# reads only that column (updated_at would miss two edits in one second).
+listing_json_cache = LRUCache(
+    max_entries=10_000,
+    ttl=600.0,
+    sizeof=len,
+    max_bytes=64 * 1024 * 1024,
+)
+
+
+def listing_version(db: Session, listing_id: int):
+    """A listing's (version, updated_at), read on their own (None if it does not exist)."""
+    return db.query(Listing.version, Listing.updated_at).filter(Listing.id == listing_id).first()
+
+
+def render_listing_json(db: Session, listing_id: int, version: Optional[int] = None) -> Optional[bytes]:
+    """ListingRead JSON for one listing, or None if it does not exist."""
+    if version is None:
+        current = listing_version(db, listing_id)
+        if current is None:
+            return None
+        version = current.version
+    body = listing_json_cache.get(listing_id, version)
+    if body is None:
+        listing = listings_with_images(db).filter(Listing.id == listing_id).first()
+        if listing is None:
+            return None
+        body = ListingRead.model_validate(listing, from_attributes=True).model_dump_json().encode()
+        listing_json_cache.put(listing_id, body, listing.version)
+    return body
+
+
+def render_listings_json(db: Session, listing_ids: List[int]) -> Dict[int, bytes]:
+    """
+    ListingRead JSON for many listings, keyed by id; ids that do not
+    exist are left out. Versions are read in one IN query, and cache
+    misses are loaded together in a second one with their images.
+    """
+    if not listing_ids:
+        return {}
+    versions = dict(
+        db.query(Listing.id, Listing.version).filter(Listing.id.in_(listing_ids)).all()
+    )
+    bodies = {}
+    for listing_id, version in versions.items():
+        body = listing_json_cache.get(listing_id, version)
+        if body is not None:
+            bodies[listing_id] = body
+    misses = [listing_id for listing_id in versions if listing_id not in bodies]
+    if misses:
+        for listing in listings_with_images(db).filter(Listing.id.in_(misses)):
+            body = ListingRead.model_validate(listing, from_attributes=True).model_dump_json().encode()
+            listing_json_cache.put(listing.id, body, listing.version)
+            bodies[listing.id] = body
+    return bodies
+
+
+def render_listing_fields(db: Session, listing_ids: List[int], fields: FrozenSet[str]) -> Dict[int, dict]:
+    """
+    Only `fields` of each listing, keyed by id. Loads just those columns
+    (and the images only when asked for), bypassing the detail cache,
+    which holds full payloads.
+    """
+    if not listing_ids:
+        return {}
+    listings = listings_with_fields(db, fields).filter(Listing.id.in_(listing_ids))
+    return {listing.id: render_fields(listing, fields) for listing in listings}
+
+
+def seller_listings_etag(db: Session, seller_id: int, *params) -> str:
+    """
+    Validator for a page of one seller's listings: a create or delete
+    changes the count or highest id, and every update raises the sum of
+    the version counters (updated_at misses two edits in one second).
+    """
+    count, last_id, versions = (
+        db.query(func.count(Listing.id), func.max(Listing.id), func.sum(Listing.version))
+        .filter(Listing.seller_id == seller_id)
+        .one()
+    )
+    return weak_etag("seller-listings", seller_id, count, last_id, versions, *params)
+
+
+# ----------------------------------------------------
+# CATALOGUE VERSION
+# ----------------------------------------------------
+# Bumped on every listing write on this worker; caches of listing-derived
+# data stamp entries with it so a write makes them miss.
+_catalogue_lock = threading.Lock()
+_catalogue_version = 0
+
+
+def catalogue_version() -> int:
+    return _catalogue_version
+
+
+def bump_catalogue_version() -> None:
+    global _catalogue_version
+    with _catalogue_lock:
+        _catalogue_version += 1
+
+
+# ----------------------------------------------------
+# IN-MEMORY INDEXES
+# ----------------------------------------------------
+def load_listing_indexes(db: Session) -> None:
+    """Fill the in-memory search structures from the database at startup."""
+    popularity.refresh(db)
+    search_index.rebuild(db)
+    autocomplete.rebuild(db)
+    facet_index.rebuild(db)
+    listing_cards.rebuild(db)
+
+
+def listing_saved(listing: Listing) -> None:
+    """Call after a listing create/update has been committed."""
+    search_index.add_listing(listing)
+    autocomplete.add_listing(listing)
+    facet_index.add_listing(listing)
+    listing_cards.put(listing)
+    listing_json_cache.pop(listing.id)
+    listing_owner_changed(listing)
+    bump_catalogue_version()
+
+
+def listings_saved(listings: Iterable[Listing]) -> None:
+    """listing_saved() for a batch of committed listings (bulk import)."""
+    for listing in listings:
+        search_index.add_listing(listing)
+        autocomplete.add_listing(listing)
+        facet_index.add_listing(listing)
+        listing_cards.put(listing)
+        listing_json_cache.pop(listing.id)
+    bump_catalogue_version()
+
+
+def listing_variants_ready(db: Session, listing_id: int) -> None:
+    """Call once new image variants for a listing have been committed."""
+    listing = listings_with_images(db).filter(Listing.id == listing_id).first()
+    if listing is not None:
+        listing_cards.put(listing)
+        listing_json_cache.pop(listing_id)
+        bump_catalogue_version()
+
+
+def listing_deleted(listing_id: int) -> None:
+    """Call after a listing delete has been committed."""
+    search_index.remove(listing_id)
+    autocomplete.remove_listing(listing_id)
+    facet_index.remove(listing_id)
+    listing_cards.remove(listing_id)
+    listing_json_cache.pop(listing_id)
+    invalidate_listing_owner(listing_id)
+    bump_catalogue_version()
@@ -0,0 +1,65 @@
+from typing import Iterator, List
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Query, Session, selectinload
+
+from app.models.listing import Listing
+from app.models.listing_image import ListingImage
+from app.models.listing_image_variant import ListingImageVariant  # noqa: F401 (registers the mapper)
+from app.models.seller import Seller
+
+# Query helpers with explicit loader strategies. Every relationship a
+# response touches is loaded up front with selectinload (one extra SELECT
+# per relationship for the whole result, not one per row), so rendering
+# never falls back to lazy loads.
+
+
+# -------------------------
+#  LISTINGS
+# -------------------------
+def images_with_variants():
+    return selectinload(Listing.images).selectinload(ListingImage.variants)
+
+
+def listings_with_images(db: Session):
+    """Listings ready to be rendered as ListingRead."""
+    return db.query(Listing).options(images_with_variants())
+
+
+def listings_for_write(db: Session):
+    """Listings plus the seller row used for the ownership check."""
+    return db.query(Listing).options(
+        images_with_variants(),
+        selectinload(Listing.seller).load_only(Seller.id, Seller.user_id),
+    )
+
+
+def get_listing_or_404(db: Session, listing_id: int, for_write: bool = False) -> Listing:
+    query = listings_for_write(db) if for_write else listings_with_images(db)
+    listing = query.filter(Listing.id == listing_id).first()
+    if not listing:
+        raise HTTPException(status_code=404, detail="Listing not found")
+    return listing
+
+
+# -------------------------
+#  BATCHES
+# -------------------------
+def in_id_batches(query: Query, id_column, batch_size: int) -> Iterator[List]:
+    """
+    The query's rows in id order, `batch_size` at a time. Each batch is
+    its own fully fetched SELECT ... WHERE id > last ORDER BY id LIMIT n,
+    so selectin loads and writes can run between batches. With
+    yield_per instead, PyMySQL's unbuffered cursor is cut short by the
+    first other statement on the connection and the loop ends early.
+    """
+    last_id = None
+    while True:
+        batch_query = query if last_id is None else query.filter(id_column > last_id)
+        batch = batch_query.order_by(id_column).limit(batch_size).all()
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        last_id = getattr(batch[-1], id_column.key)
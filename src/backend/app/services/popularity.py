@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.item_interaction import ItemInteraction
+
+logger = logging.getLogger("popularity")
+
+# Full reload from item_interactions at most this often; in between the
+# vector is kept current by record_item_interaction.
+REFRESH_SECONDS = 300
+# Pending increments are folded into the arrays past this many ids.
+MAX_PENDING = 1000
+
+
+def _take(ids: np.ndarray, values: np.ndarray, wanted: np.ndarray) -> np.ndarray:
+    """values[ids == w] for each w in `wanted`, 0 where absent; `ids` sorted."""
+    out = np.zeros(len(wanted), dtype=np.float64)
+    if len(ids):
+        pos = np.searchsorted(ids, wanted)
+        pos[pos == len(ids)] = 0
+        hit = ids[pos] == wanted
+        out[hit] = values[pos[hit]]
+    return out
+
+
+class PopularityCache:
+    """
+    listing_id -> summed interaction weight, held as two sorted NumPy
+    arrays so a whole candidate set can be looked up in one call.
+
+    Interactions recorded on this worker are added straight away; the
+    periodic reload picks up the ones recorded elsewhere. Reloads run on
+    a background thread, one at a time, while lookups keep using the
+    current vector.
+
+    A reload sums interactions up to a high-water id read when it starts,
+    and keeps as pending only this worker's increments above that id, so
+    an interaction committed while the GROUP BY runs is counted once.
+    (One whose id was allocated below the mark but that committed after
+    the snapshot is missed until the next reload.)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ids = np.empty(0, dtype=np.int64)
+        self.scores = np.empty(0, dtype=np.float64)
+        self.pending: Dict[int, float] = {}
+        self.refreshed_at = 0.0
+        # (interaction id, listing id, weight) recorded since the running
+        # reload started, or None
+        self._during_refresh: Optional[List[Tuple[Optional[int], int, float]]] = None
+        self._refreshing = False
+
+    def refresh(self, db: Session) -> None:
+        # Increments from here on are kept, and those above the high-water
+        # id (missing from the GROUP BY) become the new vector's pending set
+        with self._lock:
+            self._during_refresh = []
+        try:
+            high_water = db.query(func.max(ItemInteraction.id)).scalar() or 0
+            rows = self._load(db, high_water)
+        except Exception:
+            with self._lock:
+                self._during_refresh = None
+            raise
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        scores = np.fromiter((float(row[1] or 0) for row in rows), dtype=np.float64, count=len(rows))
+        order = np.argsort(ids)
+        with self._lock:
+            pending: Dict[int, float] = {}
+            for interaction_id, listing_id, weight in self._during_refresh:
+                if interaction_id is None or interaction_id > high_water:
+                    pending[listing_id] = pending.get(listing_id, 0.0) + weight
+            self.ids, self.scores = ids[order], scores[order]
+            self.pending, self._during_refresh = pending, None
+            self.refreshed_at = time.monotonic()
+
+    def _load(self, db: Session, high_water: int):
+        return (
+            db.query(
+                ItemInteraction.listing_id,
+                func.sum(ItemInteraction.weight).label("score")
+            )
+            .filter(ItemInteraction.id <= high_water)
+            .group_by(ItemInteraction.listing_id)
+            .all()
+        )
+
+    def refresh_if_stale(self) -> None:
+        """Start a background reload once the vector is REFRESH_SECONDS old."""
+        if time.monotonic() - self.refreshed_at <= REFRESH_SECONDS:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name="popularity-refresh", daemon=True).start()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            with SessionLocal() as db:
+                self.refresh(db)
+        except Exception:
+            logger.exception("Popularity refresh failed")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def add(self, listing_id: int, weight: float, interaction_id: Optional[int] = None) -> None:
+        """Count a committed interaction; pass its id so a running reload can tell if it saw it."""
+        with self._lock:
+            self.pending[listing_id] = self.pending.get(listing_id, 0.0) + weight
+            if self._during_refresh is not None:
+                self._during_refresh.append((interaction_id, listing_id, weight))
+            if len(self.pending) > MAX_PENDING:
+                self._fold()
+
+    def _fold(self) -> None:
+        extra_ids = np.fromiter(self.pending.keys(), dtype=np.int64, count=len(self.pending))
+        extra = np.fromiter(self.pending.values(), dtype=np.float64, count=len(self.pending))
+        ids = np.concatenate([self.ids, extra_ids])
+        scores = np.concatenate([self.scores, extra])
+        self.ids, inverse = np.unique(ids, return_inverse=True)
+        self.scores = np.bincount(inverse, weights=scores)
+        self.pending = {}
+
+    def lookup(self, listing_ids: np.ndarray) -> np.ndarray:
+        """Popularity for each id in `listing_ids` (0 when unseen)."""
+        listing_ids = np.asarray(listing_ids, dtype=np.int64)
+        with self._lock:
+            ids, scores = self.ids, self.scores
+            pending_ids = np.fromiter(self.pending.keys(), dtype=np.int64, count=len(self.pending))
+            pending = np.fromiter(self.pending.values(), dtype=np.float64, count=len(self.pending))
+        order = np.argsort(pending_ids)
+        return _take(ids, scores, listing_ids) + _take(pending_ids[order], pending[order], listing_ids)
+
+    def get(self, listing_id: int) -> float:
+        with self._lock:
+            i = int(np.searchsorted(self.ids, listing_id))
+            hit = i < len(self.ids) and self.ids[i] == listing_id
+            return (float(self.scores[i]) if hit else 0.0) + self.pending.get(listing_id, 0.0)
+
+    def as_dict(self) -> Dict[int, float]:
+        with self._lock:
+            self._fold()
+            return dict(zip(self.ids.tolist(), self.scores.tolist()))
+
+
+popularity = PopularityCache()
@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.popularity import popularity
+
+
+# Listing timestamps are naive wall-clock values from the database, so
+# recency is measured on the same naive clock instead of through Unix
+# timestamps, which would read them in the worker's local timezone.
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+
+
+def naive_seconds(value: datetime) -> float:
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return (value - _NAIVE_EPOCH).total_seconds()
+
+
+def ranking_clock() -> float:
+    """The current time on the naive clock blend_scores measures age on."""
+    return naive_seconds(datetime.now())
+
+
+def _unit_max(values: np.ndarray) -> np.ndarray:
+    top = values.max() if len(values) else 0.0
+    return values / top if top > 0 else np.zeros_like(values)
+
+
+def blend_scores(
+    listing_ids: Sequence[int],
+    text_scores: Sequence[float],
+    created: Sequence[float],
+    now: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Final sort=relevance score for a candidate set, computed in one pass:
+
+        text * BM25 + popularity * log(1 + interactions) + recency * decay
+
+    BM25 and popularity are scaled to [0, 1] within the candidate set;
+    recency halves every SEARCH_RECENCY_HALF_LIFE_DAYS before `now`
+    (from ranking_clock(), pinned by callers that page through the result).
+    `created` holds naive_seconds() of each listing's created_at, NaN when
+    unknown.
+    """
+    if now is None:
+        now = ranking_clock()
+    text = _unit_max(np.asarray(text_scores, dtype=np.float64))
+    pop = _unit_max(np.log1p(np.maximum(popularity.lookup(np.asarray(listing_ids, dtype=np.int64)), 0)))
+
+    age_days = (now - np.asarray(created, dtype=np.float64)) / 86400.0
+    recency = np.exp2(-np.clip(age_days, 0, None) / settings.SEARCH_RECENCY_HALF_LIFE_DAYS)
+    recency = np.nan_to_num(recency, nan=0.0)
+
+    return (
+        settings.SEARCH_TEXT_WEIGHT * text
+        + settings.SEARCH_POPULARITY_WEIGHT * pop
+        + settings.SEARCH_RECENCY_WEIGHT * recency
+    )
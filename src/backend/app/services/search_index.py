@@ -0,0 +1,302 @@
+import math
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.listing import Listing
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Title and category matches say more about a listing than a passing
+# mention in the description, so their term frequencies count extra.
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "category": 2.0,
+    "location": 1.5,
+    "description": 1.0,
+}
+
+# Cap on how many vocabulary terms a single prefix may expand to.
+MAX_PREFIX_EXPANSION = 50
+
+# Searches with fewer hits than this are retried with spelling corrections.
+FUZZY_MIN_HITS = 3
+# Candidates (by shared trigrams) checked with a real edit distance per term.
+MAX_FUZZY_CANDIDATES = 50
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+
+def trigrams(term: str) -> set:
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent
+    transpositions), giving up with limit + 1 once it must exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def max_typos(term: str) -> int:
+    return 1 if len(term) <= 5 else 2
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercased tokens joined by single spaces, punctuation dropped."""
+    return " ".join(tokenize(text))
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over listing title, description, category
+    and location, ranked with BM25.
+
+    Kept up to date by the listings router on create/update/delete and
+    rebuilt from the database at startup.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        # term -> {listing_id: weighted term frequency}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        # listing_id -> {term: weighted term frequency}
+        self.doc_terms: Dict[int, Dict[str, float]] = {}
+        self.doc_len: Dict[int, float] = {}
+        self.total_len = 0.0
+        # Sorted vocabulary, used for prefix expansion of partial words
+        self.vocab: List[str] = []
+        # trigram -> vocabulary terms containing it, for spelling correction
+        self.trigram_terms: Dict[str, set] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    # -------------------------
+    #  WRITES
+    # -------------------------
+    def add(self, listing_id: int, **fields: Optional[str]) -> None:
+        """Index (or re-index) a listing from its text fields."""
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(field)):
+                terms[token] = terms.get(token, 0.0) + weight
+
+        with self._lock:
+            self._remove(listing_id)
+            for term, tf in terms.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = {}
+                    self.vocab.insert(bisect_left(self.vocab, term), term)
+                    for gram in trigrams(term):
+                        self.trigram_terms.setdefault(gram, set()).add(term)
+                postings[listing_id] = tf
+            length = sum(terms.values())
+            self.doc_terms[listing_id] = terms
+            self.doc_len[listing_id] = length
+            self.total_len += length
+
+    def add_listing(self, listing: Listing) -> None:
+        self.add(
+            listing.id,
+            title=listing.title,
+            description=listing.description,
+            category=listing.category,
+            location=listing.location,
+        )
+
+    def remove(self, listing_id: int) -> None:
+        with self._lock:
+            self._remove(listing_id)
+
+    def _remove(self, listing_id: int) -> None:
+        terms = self.doc_terms.pop(listing_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(listing_id, None)
+            if not postings:
+                del self.postings[term]
+                i = bisect_left(self.vocab, term)
+                if i < len(self.vocab) and self.vocab[i] == term:
+                    del self.vocab[i]
+                for gram in trigrams(term):
+                    terms_with_gram = self.trigram_terms.get(gram)
+                    if terms_with_gram is not None:
+                        terms_with_gram.discard(term)
+                        if not terms_with_gram:
+                            del self.trigram_terms[gram]
+        self.total_len -= self.doc_len.pop(listing_id, 0.0)
+
+    def rebuild(self, db: Session) -> None:
+        """Reload the whole index from the listings table."""
+        rows = (
+            db.query(
+                Listing.id,
+                Listing.title,
+                Listing.description,
+                Listing.category,
+                Listing.location,
+            )
+            .yield_per(1000)
+        )
+        with self._lock:
+            self._clear()
+            for row in rows:
+                self.add(
+                    row.id,
+                    title=row.title,
+                    description=row.description,
+                    category=row.category,
+                    location=row.location,
+                )
+
+    # -------------------------
+    #  READS
+    # -------------------------
+    def expand(self, term: str) -> List[str]:
+        """
+        Exact term if it is indexed, otherwise every indexed term it is a
+        prefix of — so "cem" still finds "cement" while the user types.
+        """
+        if term in self.postings:
+            return [term]
+        matches = []
+        i = bisect_left(self.vocab, term)
+        while i < len(self.vocab) and self.vocab[i].startswith(term):
+            matches.append(self.vocab[i])
+            if len(matches) >= MAX_PREFIX_EXPANSION:
+                break
+            i += 1
+        return matches
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Return (listing_id, score) pairs, best match first."""
+        query_terms = tokenize(query)
+        if not query_terms:
+            return []
+
+        with self._lock:
+            n_docs = len(self.doc_terms)
+            if n_docs == 0:
+                return []
+            avg_len = self.total_len / n_docs
+            scores: Dict[int, float] = {}
+
+            for term in dict.fromkeys(query_terms):
+                for expanded in self.expand(term):
+                    postings = self.postings[expanded]
+                    df = len(postings)
+                    idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                    for listing_id, tf in postings.items():
+                        norm = 1 - self.b + self.b * self.doc_len[listing_id] / avg_len
+                        score = idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+                        scores[listing_id] = scores.get(listing_id, 0.0) + score
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return ranked
+
+    def search_ids(self, query: str, limit: Optional[int] = None) -> List[int]:
+        return [listing_id for listing_id, _ in self.search(query, limit)]
+
+    # -------------------------
+    #  SPELLING CORRECTION
+    # -------------------------
+    def correct_term(self, term: str) -> Optional[str]:
+        """
+        Closest indexed term within max_typos(term) edits. Candidates come
+        from the trigram index (a term within k edits shares at least
+        |grams| - 4k trigrams: an adjacent transposition touches four),
+        so only a handful get a real edit distance.
+        """
+        limit = max_typos(term)
+        grams = trigrams(term)
+        shared: Dict[str, int] = {}
+        with self._lock:
+            for gram in grams:
+                for candidate in self.trigram_terms.get(gram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+            min_shared = max(1, len(grams) - 4 * limit)
+            candidates = sorted(
+                (c for c, n in shared.items() if n >= min_shared),
+                key=lambda c: shared[c],
+                reverse=True,
+            )[:MAX_FUZZY_CANDIDATES]
+
+            best, best_key = None, None
+            for candidate in candidates:
+                distance = edit_distance(term, candidate, limit)
+                if distance > limit:
+                    continue
+                # Fewest edits, then the term more listings use
+                key = (distance, -len(self.postings[candidate]))
+                if best_key is None or key < best_key:
+                    best, best_key = candidate, key
+        return best
+
+    def correct(self, query: str) -> Optional[str]:
+        """Query with unknown words replaced by their closest indexed term."""
+        terms = tokenize(query)
+        corrected = []
+        for term in terms:
+            if self.expand(term):
+                corrected.append(term)
+            else:
+                corrected.append(self.correct_term(term) or term)
+        return " ".join(corrected) if corrected != terms else None
+
+    def search_fuzzy(self, query: str) -> Tuple[List[Tuple[int, float]], Optional[str]]:
+        """
+        search(), retried with a spelling-corrected query when it finds
+        fewer than FUZZY_MIN_HITS listings. Returns (hits, correction),
+        where correction is None unless the corrected query was used.
+        """
+        ranked = self.search(query)
+        if len(ranked) >= FUZZY_MIN_HITS:
+            return ranked, None
+        corrected = self.correct(query)
+        if not corrected:
+            return ranked, None
+        fuzzy = self.search(corrected)
+        if len(fuzzy) <= len(ranked):
+            return ranked, None
+        return fuzzy, corrected
+
+
+search_index = SearchIndex()
+
@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal
+from app.models.search_query import SearchQuery
+from app.services.search_rollups import apply_search_rollups
+
+logger = logging.getLogger("search_log")
+
+# Flush once this many events are waiting...
+BATCH_SIZE = 500
+# ...or this many seconds after the last flush, whichever comes first.
+FLUSH_INTERVAL_SECONDS = 2.0
+# Events arriving while this many are already queued are dropped.
+MAX_QUEUE = 10_000
+
+
+class SearchLogBuffer:
+    """
+    Write-behind buffer for search events. /search/log only appends to an
+    in-memory queue; a background thread writes the queue out as
+    multi-row INSERTs when it reaches BATCH_SIZE or every
+    FLUSH_INTERVAL_SECONDS, and once more on shutdown. Each batch also
+    updates the hourly search rollups in the same transaction. A batch
+    the database refuses is written again one event at a time, so a bad
+    event is dropped on its own.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        max_queue: int = MAX_QUEUE,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue: Deque[dict] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    # -------------------------
+    #  LIFECYCLE
+    # -------------------------
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="search-log-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Search log flush failed")
+
+    # -------------------------
+    #  QUEUE
+    # -------------------------
+    def add(self, **row) -> bool:
+        """Queue one search event; returns False if it had to be dropped."""
+        row.setdefault("created_at", datetime.now())
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._queue.append(row)
+            self.enqueued += 1
+            depth = len(self._queue)
+        if depth >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _take_batch(self) -> List[dict]:
+        with self._lock:
+            n = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(n)]
+
+    def flush(self) -> int:
+        """Write out everything queued so far; returns the number of rows."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                started = time.perf_counter()
+                try:
+                    _write(batch)
+                    saved = len(batch)
+                except Exception:
+                    logger.warning("Search log batch of %d failed; writing it event by event", len(batch),
+                                   exc_info=True)
+                    saved = sum(_write_one(row) for row in batch)
+                    with self._lock:
+                        self.dropped += len(batch) - saved
+                self._record_flush(saved, (time.perf_counter() - started) * 1000)
+                written += saved
+        return written
+
+    def _record_flush(self, rows: int, elapsed_ms: float) -> None:
+        with self._lock:
+            self.flushed += rows
+            self.flushes += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self.total_flush_ms += elapsed_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": len(self._queue),
+                "enqueued": self.enqueued,
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "last_flush_ms": round(self.last_flush_ms, 3),
+                "max_flush_ms": round(self.max_flush_ms, 3),
+                "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            }
+
+
+def _write(rows: List[dict]) -> None:
+    with SessionLocal() as db:
+        db.execute(insert(SearchQuery), rows)
+        apply_search_rollups(db, rows)
+        db.commit()
+
+
+def _write_one(row: dict) -> bool:
+    try:
+        _write([row])
+        return True
+    except Exception as exc:
+        logger.warning("Dropping search event %r: %s", row.get("query_text"), exc)
+        return False
+
+
+search_log = SearchLogBuffer()
@@ -0,0 +1,158 @@
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.search_query import SearchQuery
+from app.models.search_rollup import SearchQueryRollup
+from app.services.loading import in_id_batches
+from app.services.search_index import normalize
+
+# Searches with fewer results than this feed "suggested searches"
+LOW_RESULTS = 3
+
+WINDOW_RE = re.compile(r"^(\d+)([hd])$")
+
+RollupKey = Tuple[datetime, str, str]
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def parse_window(window: str) -> Optional[timedelta]:
+    """'24h', '7d', ... -> timedelta; 'all' -> None."""
+    if window == "all":
+        return None
+    match = WINDOW_RE.match(window)
+    if not match or int(match.group(1)) == 0:
+        raise HTTPException(status_code=400, detail="window must look like 24h, 7d or all")
+    amount, unit = int(match.group(1)), match.group(2)
+    return timedelta(hours=amount) if unit == "h" else timedelta(days=amount)
+
+
+def _aggregate(rows: Iterable[dict]) -> Dict[RollupKey, List[int]]:
+    """(hour, normalized text, category) -> [searches, low-result searches]"""
+    counts: Dict[RollupKey, List[int]] = {}
+    for row in rows:
+        text = normalize(row.get("query_text"))[:512]
+        if not text:
+            continue
+        key = (
+            hour_bucket(row.get("created_at") or datetime.now()),
+            text,
+            (row.get("category") or "")[:100],
+        )
+        totals = counts.setdefault(key, [0, 0])
+        totals[0] += 1
+        totals[1] += int((row.get("results_count") or 0) < LOW_RESULTS)
+    return counts
+
+
+def _upsert(db: Session, counts: Dict[RollupKey, List[int]]) -> None:
+    values = [
+        {
+            "bucket": bucket,
+            "query_text": text,
+            "category": category,
+            "searches": searches,
+            "low_result_searches": low,
+        }
+        for (bucket, text, category), (searches, low) in counts.items()
+    ]
+    if not values:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(SearchQueryRollup).values(values)
+        stmt = stmt.on_duplicate_key_update(
+            searches=SearchQueryRollup.searches + stmt.inserted.searches,
+            low_result_searches=SearchQueryRollup.low_result_searches + stmt.inserted.low_result_searches,
+        )
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(SearchQueryRollup).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket", "query_text", "category"],
+            set_={
+                "searches": SearchQueryRollup.searches + stmt.excluded.searches,
+                "low_result_searches": SearchQueryRollup.low_result_searches + stmt.excluded.low_result_searches,
+            },
+        )
+    db.execute(stmt)
+
+
+def apply_search_rollups(db: Session, rows: Iterable[dict]) -> None:
+    """
+    Fold a batch of search events into the hourly rollups. Called by the
+    search log flusher inside the same transaction as the raw inserts.
+    """
+    _upsert(db, _aggregate(rows))
+
+
+def backfill_search_rollups(db: Session, batch_size: int = 5000) -> None:
+    """
+    Rebuild the rollups from the raw search_queries table, reading it in
+    id batches that are fully fetched before each batch's upsert runs.
+    """
+    db.query(SearchQueryRollup).delete()
+    rows = db.query(
+        SearchQuery.id,
+        SearchQuery.query_text,
+        SearchQuery.category,
+        SearchQuery.results_count,
+        SearchQuery.created_at,
+    )
+    for batch in in_id_batches(rows, SearchQuery.id, batch_size):
+        apply_search_rollups(db, [row._asdict() for row in batch])
+    db.commit()
+
+
+def _window_query(db: Session, *columns, window: str):
+    since = parse_window(window)
+    query = db.query(*columns)
+    if since is not None:
+        query = query.filter(SearchQueryRollup.bucket >= hour_bucket(datetime.now() - since))
+    return query
+
+
+def popular_searches(db: Session, window: str, limit: int = 10):
+    total = func.sum(SearchQueryRollup.searches)
+    return (
+        _window_query(db, SearchQueryRollup.query_text, total, window=window)
+        .group_by(SearchQueryRollup.query_text)
+        .order_by(total.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def low_result_searches(db: Session, window: str, limit: int = 10):
+    low = func.sum(SearchQueryRollup.low_result_searches)
+    return (
+        _window_query(db, SearchQueryRollup.query_text, low, window=window)
+        .group_by(SearchQueryRollup.query_text)
+        .having(low > 0)
+        .order_by(low.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def popular_categories(db: Session, window: str, limit: int = 10):
+    total = func.sum(SearchQueryRollup.searches)
+    return (
+        _window_query(db, SearchQueryRollup.category, total, window=window)
+        .filter(SearchQueryRollup.category != "")
+        .group_by(SearchQueryRollup.category)
+        .order_by(total.desc())
+        .limit(limit)
+        .all()
+    )
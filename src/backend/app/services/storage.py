@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+
+# Bytes read from an upload per step while hashing and copying it.
+CHUNK_SIZE = 64 * 1024
+
+# File extensions kept on stored names; anything else is stored bare.
+EXTENSION_RE = re.compile(r"^\.[a-z0-9]{1,8}$")
+
+# Public URL prefix the upload directory is mounted under.
+URL_PREFIX = "/uploads"
+
+# Partial uploads live here until they are hashed and renamed; never served.
+INCOMING_DIR = ".incoming"
+
+# Stored next to a gzipped copy (<name>.gz) that can be served as-is.
+PRECOMPRESSED_EXTENSIONS = {".svg"}
+
+# <sha256[:2]>/<sha256>[.ext]
+CONTENT_NAME_RE = re.compile(r"^([0-9a-f]{2})/(\1[0-9a-f]{62})(\.[a-z0-9]{1,8})?$")
+
+
+class StoredFile:
+    __slots__ = ("name", "size", "digest", "created")
+
+    def __init__(self, name: str, size: int, digest: str, created: bool):
+        self.name = name        # path relative to the upload root
+        self.size = size
+        self.digest = digest    # hex sha256 of the content
+        self.created = created  # False when an identical file was already stored
+
+    @property
+    def url(self) -> str:
+        return f"{URL_PREFIX}/{self.name}"
+
+
+class ContentStore:
+    """
+    Content-addressed file storage. Uploads are copied in CHUNK_SIZE
+    steps into a temp file while being hashed, and the size limit is
+    checked as the bytes arrive, so oversized files are rejected without
+    being read into memory. The finished file is renamed to
+    <sha256[:2]>/<sha256><ext>; identical content uploaded twice, by
+    anyone, is stored once.
+    """
+
+    def __init__(self, root: str, max_bytes: int, chunk_size: int = CHUNK_SIZE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.tmp_dir = os.path.join(root, INCOMING_DIR)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def save(self, upload: UploadFile, max_bytes: Optional[int] = None) -> StoredFile:
+        return self.save_stream(upload.file, upload.filename, max_bytes)
+
+    def save_stream(self, source: BinaryIO, filename: Optional[str] = None, max_bytes: Optional[int] = None) -> StoredFile:
+        limit = max_bytes or self.max_bytes
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = source.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > limit:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File too large (limit is {limit} bytes)",
+                        )
+                    digest.update(chunk)
+                    out.write(chunk)
+            if size == 0:
+                raise HTTPException(status_code=400, detail="Empty file")
+
+            hex_digest = digest.hexdigest()
+            name = f"{hex_digest[:2]}/{hex_digest}{_extension(filename)}"
+            final_path = self.path(name)
+            if os.path.exists(final_path):
+                return StoredFile(name, size, hex_digest, created=False)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            if os.path.splitext(name)[1] in PRECOMPRESSED_EXTENSIONS:
+                self._write_gzip(tmp_path, final_path + ".gz")
+            os.replace(tmp_path, final_path)
+            tmp_path = None
+            return StoredFile(name, size, hex_digest, created=True)
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _write_gzip(self, source_path: str, target_path: str) -> None:
+        fd, tmp_gz = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with open(source_path, "rb") as src, os.fdopen(fd, "wb") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) as out:
+                    while chunk := src.read(self.chunk_size):
+                        out.write(chunk)
+            os.replace(tmp_gz, target_path)
+        except Exception:
+            os.remove(tmp_gz)
+            raise
+
+
+def content_digest(name: str) -> Optional[str]:
+    """sha256 encoded in a content-addressed name, or None for other files."""
+    match = CONTENT_NAME_RE.match(name.replace(os.sep, "/"))
+    return match.group(2) if match else None
+
+
+def _extension(filename: Optional[str]) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext == ".jpeg":
+        ext = ".jpg"
+    return ext if EXTENSION_RE.match(ext) else ""
+
+
+upload_store = ContentStore(settings.UPLOAD_DIR, settings.MAX_UPLOAD_BYTES)
@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Bounded LRU cache with a per-entry TTL and an optional version stamp.
+
+    An entry is only served while it is younger than `ttl` seconds and was
+    stored under the same version the caller asks for; anything else
+    counts as a miss and is dropped.
+
+    With `sizeof`, the cache also tracks the total size of its values and,
+    if `max_bytes` is set, evicts least recently used entries to stay
+    under it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 60.0,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (version, expires_at, value, size)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, key: Hashable, version: Any = None) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_version, expires_at, value, _ = entry
+            if stored_version != version or expires_at <= now:
+                self._discard(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: Any = None) -> None:
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            self._discard(key)
+            self._data[key] = (version, time.monotonic() + self.ttl, value, size)
+            self.size_bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self.size_bytes > self.max_bytes and len(self._data) > 1
+            ):
+                _, (_, _, _, evicted_size) = self._data.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[3]
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
+            if self.sizeof:
+                stats.update({"bytes": self.size_bytes, "max_bytes": self.max_bytes})
+            return stats
@@ -0,0 +1,90 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Clients may keep the body but must revalidate before reusing it.
+REVALIDATE = "no-cache"
+REVALIDATE_PRIVATE = "private, no-cache"
+
+
+def weak_etag(*parts: Any) -> str:
+    """
+    W/"<hash>" over the parts that determine a response body. Use
+    version counters rather than timestamps where an edit can land in the
+    same second as the last one.
+    """
+    raw = "|".join(str(p) for p in parts)
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+
+def http_date(moment: datetime) -> str:
+    """
+    RFC 7231 date for a Last-Modified header. Naive datetimes from the
+    database are taken to be UTC.
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return format_datetime(moment.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    True when the client's copy is current. If-None-Match wins when
+    present; If-Modified-Since is only consulted without it.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have whole-second precision
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def validator_headers(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = REVALIDATE,
+) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def conditional(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = REVALIDATE,
+) -> Optional[Response]:
+    """
+    Set the validators on `response` and return an empty 304 to send
+    instead when the client's copy is current, else None.
+    """
+    headers = validator_headers(etag, last_modified, cache_control)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
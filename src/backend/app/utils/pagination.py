@@ -0,0 +1,118 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Opt-in totals count at most this many rows; past it the total is
+# reported as a lower bound instead of running a full COUNT.
+TOTAL_COUNT_CAP = 1000
+
+# (column, descending)
+OrderSpec = Sequence[Tuple[Any, bool]]
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """Opaque, URL-safe token holding the sort key of the last row served."""
+    raw = json.dumps({"s": sort, "k": [_encode_value(v) for v in values]})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = data["k"]
+        if data["s"] != sort or not isinstance(values, list):
+            raise ValueError
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _coerce(column: Any, value: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+
+def _after(order: OrderSpec, values: Sequence[Any]):
+    """
+    Rows strictly after `values` in `order`, expanded to
+    (a > x) OR (a = x AND b > y) so it works on any backend.
+    """
+    clauses = []
+    for i, (column, desc) in enumerate(order):
+        equal = [c == v for (c, _), v in zip(order[:i], values[:i])]
+        beyond = column < values[i] if desc else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+def cursor_filter(order: OrderSpec, sort: str, cursor: str):
+    """WHERE clause for the rows after a cursor from encode_cursor(sort, ...)."""
+    raw = decode_cursor(cursor, sort)
+    if len(raw) != len(order):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        values = [_coerce(column, v) for (column, _), v in zip(order, raw)]
+    except (TypeError, ValueError, ArithmeticError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return _after(order, values)
+
+
+def estimate_total(query, cap: int = TOTAL_COUNT_CAP) -> dict:
+    counted = query.order_by(None).limit(cap + 1).count()
+    return {"total": min(counted, cap), "total_is_estimate": counted > cap}
+
+
+def keyset_paginate(
+    query,
+    order: OrderSpec,
+    sort: str,
+    cursor: Optional[str],
+    limit: int,
+    include_total: bool = False,
+) -> dict:
+    """
+    Page through `query` by its sort key rather than OFFSET, so any page
+    costs the same as the first one. The last column in `order` must be
+    unique (normally the primary key) to keep the ordering total.
+    """
+    base = query
+    if cursor:
+        query = query.filter(cursor_filter(order, sort, cursor))
+
+    query = query.order_by(*[c.desc() if desc else c.asc() for c, desc in order])
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, [getattr(last, c.key) for c, _ in order])
+
+    page = {
+        "results": rows,
+        "count": len(rows),
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
+    if include_total:
+        page.update(estimate_total(base))
+    return page
@@ -0,0 +1,100 @@
+import os
+from mimetypes import guess_type
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.services.storage import INCOMING_DIR, PRECOMPRESSED_EXTENSIONS, content_digest
+
+# Content-addressed files never change, so clients and CDNs may keep them.
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Legacy files stored under their original names can still be replaced.
+REVALIDATE_CACHE = "public, max-age=300, must-revalidate"
+
+
+class UploadFiles(StaticFiles):
+    """
+    StaticFiles for the upload directory, tuned for caching:
+
+    - content-addressed files get `Cache-Control: immutable` and their
+      sha256 as a strong ETag, so conditional requests need no disk I/O
+      beyond the stat; everything else revalidates every few minutes
+    - If-None-Match (including `*`) answers 304
+    - Range / If-Range are handled by FileResponse, which also hands the
+      file to the server with `http.response.pathsend` (sendfile) when the
+      ASGI server offers that extension
+    - with `accel_redirect_prefix` set, the body is left to the fronting
+      nginx via X-Accel-Redirect, which serves it with sendfile (and the
+      .gz siblings itself with gzip_static)
+    - SVGs with a precompressed `.gz` sibling are sent gzip-encoded to
+      clients that accept it
+    """
+
+    def __init__(self, *args, accel_redirect_prefix: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip("/") if accel_redirect_prefix else None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if path.split(os.sep, 1)[0] == INCOMING_DIR:
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        name = os.path.relpath(full_path, os.path.realpath(self.directory))
+        digest = content_digest(name)
+
+        headers = {"cache-control": IMMUTABLE_CACHE if digest else REVALIDATE_CACHE}
+        encoding = None
+        serve_path, serve_stat = full_path, stat_result
+        ext = os.path.splitext(name)[1].lower()
+        if ext in PRECOMPRESSED_EXTENSIONS:
+            headers["vary"] = "Accept-Encoding"
+            if "gzip" in request_headers.get("accept-encoding", ""):
+                try:
+                    serve_stat = os.stat(full_path + ".gz")
+                    serve_path, encoding = full_path + ".gz", "gzip"
+                    headers["content-encoding"] = "gzip"
+                except OSError:
+                    serve_stat = stat_result
+        if digest:
+            headers["etag"] = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+        if self.accel_redirect_prefix:
+            return Response(
+                status_code=status_code,
+                headers={
+                    "cache-control": headers["cache-control"],
+                    "x-accel-redirect": f"{self.accel_redirect_prefix}/{name.replace(os.sep, '/')}",
+                },
+            )
+
+        response = FileResponse(
+            serve_path,
+            status_code=status_code,
+            stat_result=serve_stat,
+            headers=headers,
+            media_type=_media_type(name) if encoding else None,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        if request_headers.get("if-none-match", "").strip() == "*":
+            return True
+        return super().is_not_modified(response_headers, request_headers)
+
+
+def _media_type(name: str) -> str:
+    return guess_type(name)[0] or "application/octet-stream"
@@ -0,0 +1,157 @@
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+# Import the app from src/backend and point it at a throwaway SQLite
+# database and upload folder before app.core.config reads the environment.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_tmp = tempfile.mkdtemp(prefix="constructify-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_tmp, "uploads"))
+
+from sqlalchemy import BigInteger, event  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only auto-increments INTEGER PRIMARY KEY columns
+    return "INTEGER"
+
+
+# -------------------------
+#  APP AND DATABASE
+# -------------------------
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import app.main as main
+    from app.core.database import Base, engine
+    from app.models import (  # noqa: F401 (registers the tables)
+        chat, conversation, item_interaction, listing, listing_image,
+        listing_image_variant, search_query, search_rollup, seller, user,
+    )
+
+    engine.echo = False
+    Base.metadata.create_all(bind=engine)
+    with TestClient(main.app) as c:
+        yield c
+
+
+@pytest.fixture
+def db(client):
+    from app.core.database import SessionLocal
+
+    with SessionLocal() as session:
+        yield session
+
+
+def _auth(user_id: int) -> dict:
+    from app.core.security import create_access_token
+
+    return {"Authorization": "Bearer " + create_access_token({"sub": str(user_id)})}
+
+
+@pytest.fixture
+def make_seller(db):
+    """Creates a seller (user + sellers row); returns ids and auth headers."""
+    from app.models.seller import Seller
+    from app.models.user import RoleEnum, User
+
+    def make(name: str = "Seller") -> SimpleNamespace:
+        user = User(name=name, email=f"{name.lower()}-{os.urandom(4).hex()}@example.com",
+                    password_hash="x", role=RoleEnum.seller)
+        db.add(user)
+        db.flush()
+        seller = Seller(user_id=user.id, business_name=f"{name} Ltd", address="Nairobi")
+        db.add(seller)
+        db.commit()
+        return SimpleNamespace(user_id=user.id, seller_id=seller.id, headers=_auth(user.id))
+
+    return make
+
+
+@pytest.fixture
+def make_buyer(db):
+    from app.models.user import RoleEnum, User
+
+    def make(name: str = "Buyer") -> SimpleNamespace:
+        user = User(name=name, email=f"{name.lower()}-{os.urandom(4).hex()}@example.com",
+                    password_hash="x", role=RoleEnum.buyer)
+        db.add(user)
+        db.commit()
+        return SimpleNamespace(user_id=user.id, headers=_auth(user.id))
+
+    return make
+
+
+@pytest.fixture
+def make_admin(db):
+    from app.models.user import RoleEnum, User
+
+    def make() -> SimpleNamespace:
+        user = User(name="Admin", email=f"admin-{os.urandom(4).hex()}@example.com",
+                    password_hash="x", role=RoleEnum.admin)
+        db.add(user)
+        db.commit()
+        return SimpleNamespace(user_id=user.id, headers=_auth(user.id))
+
+    return make
+
+
+@pytest.fixture
+def make_listings(db):
+    """Adds `count` listings with `images` images each for a seller; returns their ids."""
+    from app.models.listing import Listing
+    from app.models.listing_image import ListingImage
+
+    def make(seller_id: int, count: int, images: int = 2) -> list:
+        listings = [
+            Listing(title=f"Cement {i}", description="Bags of cement", price=10 + i,
+                    location="Nairobi", category="Cement", seller_id=seller_id)
+            for i in range(count)
+        ]
+        db.add_all(listings)
+        db.flush()
+        db.add_all(
+            ListingImage(listing_id=listing.id, image_url=f"/uploads/{listing.id}-{n}.png", is_primary=(n == 0))
+            for listing in listings
+            for n in range(images)
+        )
+        db.commit()
+        return [listing.id for listing in listings]
+
+    return make
+
+
+# -------------------------
+#  STATEMENT COUNTING
+# -------------------------
+class StatementCounter:
+    """Records every SQL statement the engine sends while listening."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def count(self, fn):
+        """fn()'s result and the number of statements it ran."""
+        self.statements.clear()
+        result = fn()
+        return result, len(self.statements)
+
+
+@pytest.fixture
+def statements(client):
+    from app.core.database import engine
+
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(engine, "before_cursor_execute", counter)
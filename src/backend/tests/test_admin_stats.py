@@ -0,0 +1,10 @@
+import pytest
+
+STATS = ["/search/log/stats", "/search/cache/stats", "/listings/cache/stats"]
+
+
+@pytest.mark.parametrize("path", STATS)
+def test_stats_need_an_admin(client, path, make_buyer, make_admin):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=make_buyer().headers).status_code == 403
+    assert client.get(path, headers=make_admin().headers).status_code == 200
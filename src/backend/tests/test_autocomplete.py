@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+
+import pytest
+
+BRANDS = ["Bamburi", "Simba", "Savannah", "Devki", "Tononoka", "Crown", "Sadolin", "Basco", "Kenbro", "Mabati"]
+PRODUCTS = ["Portland cement", "steel reinforcement bar", "roofing sheet", "ceramic floor tile", "PVC pipe",
+            "gloss paint", "timber plank", "concrete block", "galvanised wire", "river sand"]
+SPECS = ["50kg bag", "12mm x 6m", "gauge 30", "600x600mm", "4 inch", "20 litre", "2x4 cypress", "6 inch solid",
+         "BRC A142", "grade 42.5N"]
+
+
+def _catalogue(count: int) -> list:
+    return [
+        SimpleNamespace(
+            id=i,
+            title=f"{BRANDS[i % 10]} {PRODUCTS[i * 7 // 3 % 10]} {SPECS[i // 7 % 10]} lot {i}",
+            price=100 + i, category="Cement", location="Nairobi",
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.fixture
+def weights(monkeypatch):
+    """Popularity per listing id, so suggestion weights differ."""
+    from app.services.popularity import popularity
+
+    scores = {}
+    monkeypatch.setattr(popularity, "get", lambda listing_id: scores.get(listing_id, 0.0))
+    return scores
+
+
+def _nodes(node) -> int:
+    return 1 + sum(_nodes(child) for child in node.children.values())
+
+
+def _expected(index, prefix: str, limit: int) -> list:
+    from app.services.autocomplete import MAX_KEY_LEN
+    from app.services.search_index import normalize
+
+    typed = normalize(prefix)[:MAX_KEY_LEN]
+    matches = [e for e in index.entries.values() if any(k.startswith(typed) for k in e.index_keys)]
+    return sorted((e.weight for e in matches), reverse=True)[:limit]
+
+
+def _weights(index, suggestions: list) -> list:
+    keys = [("listing", s["id"]) if s["type"] == "listing" else (s["type"], s["text"].lower()) for s in suggestions]
+    return [index.entries[key].weight for key in keys]
+
+
+PREFIXES = ["cem", "portland cement 50", "bamburi portland cement 50kg bag lot 1", "reinforcement bar 12mm x",
+            "lot 19", "42.5n lot", "pipe 4 inch lot 3", "savannah gloss paint 20 litre lot 4", "zz"]
+
+
+def test_trie_stays_small_at_catalogue_size(weights):
+    from app.services.autocomplete import Autocomplete
+
+    listings = _catalogue(10_000)
+    for listing in listings[::7]:
+        weights[listing.id] = float(listing.id % 50)
+    index = Autocomplete()
+    index.load(listings)
+
+    # Every word start of every title is indexed, yet most of each index
+    # string sits whole in a leaf rather than in nodes of its own
+    keys = sum(len(entry.index_keys) for entry in index.entries.values())
+    assert keys > 7 * len(listings)
+    assert _nodes(index.root) < 3 * len(listings)
+    for prefix in PREFIXES:
+        assert _weights(index, index.suggest(prefix, 10)) == _expected(index, prefix, 10), prefix
+
+
+def test_incremental_writes_match_a_full_load(weights):
+    from app.services.autocomplete import Autocomplete
+
+    listings = _catalogue(2_000)
+    for listing in listings[::3]:
+        weights[listing.id] = float(listing.id % 13)
+    loaded, incremental = Autocomplete(), Autocomplete()
+    loaded.load(listings[::2])
+    for listing in listings:
+        incremental.add_listing(listing)
+    for listing in listings[1::2]:
+        incremental.remove_listing(listing.id)
+
+    for prefix in PREFIXES:
+        expected = _expected(loaded, prefix, 10)
+        assert _weights(loaded, loaded.suggest(prefix, 10)) == expected, prefix
+        assert _weights(incremental, incremental.suggest(prefix, 10)) == expected, prefix
+
+
+def test_popular_listings_rank_first_and_words_inside_titles_complete(weights):
+    from app.services.autocomplete import Autocomplete
+
+    index = Autocomplete()
+    index.load([
+        SimpleNamespace(id=1, title="Portland cement", price=700, category="Cement", location="Nairobi"),
+        SimpleNamespace(id=2, title="Cement mixer", price=90_000, category="Tools", location="Nairobi"),
+    ])
+    weights[2] = 20.0
+    index.reweigh_listing(2)
+
+    listings = [s for s in index.suggest("cem") if s["type"] == "listing"]
+    assert [s["id"] for s in listings] == [2, 1]
+    assert {"type": "category", "text": "Cement"} in index.suggest("cem")
+
+    index.remove_listing(2)
+    assert [s["id"] for s in index.suggest("cem") if s["type"] == "listing"] == [1]
+    assert index.suggest("tools") == []
+
+
+def test_queries_are_suggested_once_seen_often_enough():
+    from app.services.autocomplete import MIN_QUERY_FREQ, Autocomplete
+
+    index = Autocomplete()
+    index.record_query("ballast 20mm", results_count=4)
+    index.record_query("ballast 6mm", results_count=0)
+    assert index.suggest("ballast") == []
+
+    for _ in range(MIN_QUERY_FREQ - 1):
+        index.record_query("Ballast  20mm", results_count=4)
+    assert index.suggest("ballast") == [{"type": "query", "text": "ballast 20mm"}]
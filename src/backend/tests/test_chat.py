@@ -0,0 +1,35 @@
+from urllib.parse import quote
+
+
+def _token(headers: dict) -> str:
+    return quote(headers["Authorization"].split(" ", 1)[1])
+
+
+def test_buyer_messages_seller_at_listed_user_id(client, make_seller, make_buyer, make_listings):
+    seller, buyer = make_seller(), make_buyer()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+
+    listing = client.get(f"/listings/{listing_id}").json()
+    assert listing["seller_id"] == seller.seller_id
+    assert listing["seller_user_id"] == seller.user_id
+
+    with client.websocket_connect(f"/chat/ws/{listing_id}?token={_token(seller.headers)}") as seller_ws, \
+            client.websocket_connect(f"/chat/ws/{listing_id}?token={_token(buyer.headers)}") as buyer_ws:
+        buyer_ws.send_json({"receiver_id": listing["seller_user_id"], "message": "Is this available?"})
+        echo = buyer_ws.receive_json()
+        received = seller_ws.receive_json()
+
+    assert echo["type"] == "message"
+    assert received["message"] == "Is this available?"
+    assert received["sender_id"] == buyer.user_id
+
+
+def test_seller_user_id_in_feeds_and_sparse_fields(client, make_seller, make_listings):
+    seller = make_seller()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+
+    feed = client.get(f"/listings/seller/{seller.seller_id}").json()["results"]
+    sparse = client.get(f"/listings/seller/{seller.seller_id}", params={"fields": "seller_user_id"}).json()
+
+    assert [item["seller_user_id"] for item in feed] == [seller.user_id]
+    assert sparse["results"] == [{"id": listing_id, "seller_user_id": seller.user_id}]
@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+
+from app.services.chat_broker import LocalBroker, RedisBroker, encode_command, read_reply
+
+
+def _recording_broker(broker, received, slow_channel=None, release=None):
+    async def handler(channel, data):
+        if channel == slow_channel:
+            await release.wait()
+        received.append((channel, data))
+
+    broker.set_handler(handler)
+    return broker
+
+
+# -------------------------
+#  IN-PROCESS BROKER
+# -------------------------
+def test_local_broker_delivers_only_subscribed_channels():
+    async def run():
+        received = []
+        broker = _recording_broker(LocalBroker(), received)
+        await broker.subscribe("chat:1:2")
+        await broker.publish("chat:1:2", "hello")
+        await broker.publish("chat:1:3", "not here")
+        await broker.join()
+        await broker.unsubscribe("chat:1:2")
+        await broker.publish("chat:1:2", "gone")
+        await broker.join()
+        return received
+
+    assert asyncio.run(run()) == [("chat:1:2", "hello")]
+
+
+def test_local_broker_keeps_each_channels_order():
+    async def run():
+        received = []
+        broker = _recording_broker(LocalBroker(), received)
+        for channel in ("chat:1:2", "chat:1:3"):
+            await broker.subscribe(channel)
+        for i in range(50):
+            await broker.publish("chat:1:2", str(i))
+            await broker.publish("chat:1:3", str(i))
+        await broker.join()
+        return received
+
+    received = asyncio.run(run())
+    for channel in ("chat:1:2", "chat:1:3"):
+        assert [data for ch, data in received if ch == channel] == [str(i) for i in range(50)]
+
+
+def test_slow_channel_does_not_hold_up_others():
+    async def run():
+        received = []
+        release = asyncio.Event()
+        broker = _recording_broker(LocalBroker(), received, "chat:1:2", release)
+        for channel in ("chat:1:2", "chat:1:3"):
+            await broker.subscribe(channel)
+        await broker.publish("chat:1:2", "slow")
+        await broker.publish("chat:1:3", "fast")
+        await asyncio.sleep(0.01)
+        before_release = list(received)
+        release.set()
+        await broker.join()
+        return before_release, received
+
+    before_release, received = asyncio.run(run())
+    assert before_release == [("chat:1:3", "fast")]
+    assert received == [("chat:1:3", "fast"), ("chat:1:2", "slow")]
+
+
+# -------------------------
+#  REDIS BROKER
+# -------------------------
+class StandInRedis:
+    """
+    Just enough of Redis pub/sub for RedisBroker. With `drop_after`, the
+    connection that answers that many publishes is closed right after,
+    leaving the rest of its pipeline unread.
+    """
+
+    def __init__(self, drop_after=None):
+        self.subscribers = {}
+        self.drop_after = drop_after
+        self.published = 0
+
+    async def handle(self, reader, writer):
+        channels = set()
+        try:
+            while True:
+                name, *args = await read_reply(reader)
+                if name == b"PUBLISH":
+                    listeners = self.subscribers.get(args[0], set())
+                    for listener in listeners:
+                        listener.write(encode_command("message", args[0], args[1]))
+                    writer.write(b":%d\r\n" % len(listeners))
+                    self.published += 1
+                    if self.published == self.drop_after:
+                        await writer.drain()
+                        writer.close()
+                        return
+                elif name == b"SUBSCRIBE":
+                    for channel in args:
+                        self.subscribers.setdefault(channel, set()).add(writer)
+                        channels.add(channel)
+                        writer.write(encode_command("subscribe", channel, len(channels)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in channels:
+                self.subscribers[channel].discard(writer)
+
+
+async def _until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+async def _publish_through_redis(redis, count):
+    """Publishes `count` events back to back; returns what came back and the pipelined batch sizes."""
+    server = await asyncio.start_server(redis.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    received = []
+    broker = _recording_broker(RedisBroker(f"redis://127.0.0.1:{port}"), received)
+
+    batches = []
+    send_publishes = broker._send_publishes
+
+    async def record(batch):
+        batches.append(len(batch))
+        await send_publishes(batch)
+
+    broker._send_publishes = record
+    try:
+        await broker.subscribe("chat:1:2")
+        await _until(lambda: redis.subscribers.get(b"chat:1:2"))
+        for i in range(count):
+            await broker.publish("chat:1:2", str(i))
+        await _until(lambda: len(received) >= count)
+        await asyncio.sleep(0.05)
+        await broker.join()
+    finally:
+        await broker.stop()
+        server.close()
+        await server.wait_closed()
+    return [data for _, data in received], batches
+
+
+def test_redis_broker_pipelines_publishes():
+    received, batches = asyncio.run(_publish_through_redis(StandInRedis(), 200))
+
+    assert received == [str(i) for i in range(200)]
+    # Publishes queued back to back share one write and one round trip
+    assert sum(batches) == 200
+    assert len(batches) <= 2
+
+
+@pytest.mark.parametrize("drop_after", [1, 50, 199])
+def test_redis_broker_resends_only_unacknowledged_publishes(drop_after):
+    redis = StandInRedis(drop_after=drop_after)
+    received, _ = asyncio.run(_publish_through_redis(redis, 200))
+
+    assert received == [str(i) for i in range(200)]
+    assert redis.published == 200
+
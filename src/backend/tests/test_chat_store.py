@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+
+def _save_all(writer, rows):
+    async def run():
+        return await asyncio.gather(*(writer.save(**row) for row in rows), return_exceptions=True)
+
+    try:
+        return asyncio.run(run())
+    finally:
+        writer.stop()
+
+
+def test_batch_gets_the_ids_it_was_given(db, make_seller, make_buyer, make_listings):
+    from app.models.chat import ChatMessage
+    from app.services.chat_store import ChatMessageWriter
+
+    seller, buyer = make_seller(), make_buyer()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+    rows = [
+        dict(sender_id=buyer.user_id, receiver_id=seller.user_id, listing_id=listing_id, message=f"m{i}")
+        for i in range(5)
+    ]
+
+    saved = _save_all(ChatMessageWriter(), rows)
+
+    for message in saved:
+        assert db.get(ChatMessage, message["id"]).message == message["message"]
+
+
+def test_rejected_message_fails_alone(db, make_seller, make_buyer, make_listings):
+    from sqlalchemy.exc import IntegrityError
+
+    from app.models.chat import ChatMessage
+    from app.services.chat_store import ChatMessageWriter
+
+    seller, buyer = make_seller(), make_buyer()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+    row = dict(sender_id=buyer.user_id, receiver_id=seller.user_id, listing_id=listing_id)
+    rows = [dict(row, message="before"), dict(row, message=None), dict(row, message="after")]
+
+    writer = ChatMessageWriter()
+    before, rejected, after = _save_all(writer, rows)
+
+    assert isinstance(rejected, IntegrityError)
+    assert db.get(ChatMessage, before["id"]).message == "before"
+    assert db.get(ChatMessage, after["id"]).message == "after"
+    assert (writer.saved, writer.failed) == (2, 1)
+
+
+@pytest.mark.parametrize("count", [1, 6])
+def test_batch_is_one_insert(count, db, make_seller, make_buyer, make_listings, statements):
+    from datetime import datetime
+
+    from app.services.chat_store import _insert_messages
+
+    seller, buyer = make_seller(), make_buyer()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+    rows = [
+        dict(sender_id=buyer.user_id, receiver_id=seller.user_id, listing_id=listing_id, message="m",
+             created_at=datetime.now())
+        for _ in range(count)
+    ]
+
+    _, n = statements.count(lambda: _insert_messages(db, rows))
+    db.rollback()
+
+    # Messages, then the conversation lookup and its insert
+    assert n == 3
+
+
+@pytest.mark.parametrize("with_partner", [False, True])
+def test_history_legs_are_index_scans_in_id_order(with_partner, db):
+    from sqlalchemy import event
+
+    from app.core.database import engine
+    from app.services.chat_store import message_history
+
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        message_history(db, 1, 2, 3 if with_partner else None)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    statement, parameters = executed[-1]
+    plan = [row[-1] for row in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+    # Each leg is a range scan on an index that ends in id, so it reads
+    # newest first and stops after limit + 1 rows
+    expected = ["_sender_receiver", "_sender_receiver"] if with_partner else ["_sender", "_receiver"]
+    legs = [step for step in plan if "COVERING INDEX" in step]
+    assert [step.split()[5].replace("ix_chat_messages_listing", "") for step in legs] == expected
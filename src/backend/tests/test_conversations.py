@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+START = datetime(2026, 3, 1, 9, 0)
+
+
+@pytest.fixture
+def send(db):
+    """Stores messages the way the chat writer does; minutes after START orders them."""
+    from app.services.chat_store import _insert_messages
+
+    def send(listing_id: int, sender, receiver, message: str, minute: int) -> None:
+        _insert_messages(db, [dict(sender_id=sender.user_id, receiver_id=receiver.user_id, listing_id=listing_id,
+                                   message=message, created_at=START + timedelta(minutes=minute))])
+        db.commit()
+
+    return send
+
+
+def _inbox(client, user, **params) -> dict:
+    response = client.get("/chat/messages", params=params, headers=user.headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_inbox_has_one_entry_per_conversation_with_unread_counts(client, make_seller, make_buyer, make_listings,
+                                                                 send):
+    seller, buyer = make_seller(), make_buyer("Amina")
+    cement, steel = make_listings(seller.seller_id, 2)
+
+    send(cement, buyer, seller, "Is this available?", 1)
+    send(cement, seller, buyer, "Yes", 2)
+    send(cement, buyer, seller, "Can you deliver?", 3)
+    send(steel, buyer, seller, "Price for 10?", 4)
+
+    seller_inbox = _inbox(client, seller)["results"]
+    buyer_inbox = _inbox(client, buyer)["results"]
+
+    assert [(c["listing_id"], c["last_message"], c["unread_count"]) for c in seller_inbox] == [
+        (steel, "Price for 10?", 1),
+        (cement, "Can you deliver?", 2),
+    ]
+    assert {c["user_id"] for c in seller_inbox} == {buyer.user_id}
+    assert seller_inbox[0]["user_name"] == "Amina"
+    assert seller_inbox[0]["listing_title"] == "Cement 1"
+    assert [(c["listing_id"], c["unread_count"]) for c in buyer_inbox] == [(steel, 0), (cement, 1)]
+
+
+def test_reading_a_conversation_clears_only_that_users_count(client, make_seller, make_buyer, make_listings, send):
+    seller, buyer = make_seller(), make_buyer()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+    send(listing_id, buyer, seller, "Hello", 1)
+    send(listing_id, seller, buyer, "Hi", 2)
+    send(listing_id, buyer, seller, "Still there?", 3)
+
+    response = client.post(f"/chat/{listing_id}/read", params={"user_id": buyer.user_id}, headers=seller.headers)
+
+    assert response.status_code == 200
+    assert _inbox(client, seller)["results"][0]["unread_count"] == 0
+    assert _inbox(client, buyer)["results"][0]["unread_count"] == 1
+
+
+def test_inbox_pages_cover_both_sides_of_each_pair(client, make_seller, make_buyer, make_listings, send):
+    # The user is the lower id of some pairs and the higher of others
+    early_buyer, seller, late_buyer = make_buyer(), make_seller(), make_buyer()
+    listings = make_listings(seller.seller_id, 5)
+    for minute, listing_id in enumerate(listings):
+        buyer = early_buyer if minute % 2 else late_buyer
+        send(listing_id, buyer, seller, f"m{minute}", minute)
+
+    seen, cursor = [], None
+    while True:
+        page = _inbox(client, seller, limit=2, **({"cursor": cursor} if cursor else {}))
+        seen += [c["listing_id"] for c in page["results"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == listings[::-1]
+
+
+def test_inbox_is_one_statement_whatever_its_size(client, make_seller, make_buyer, make_listings, send, statements):
+    seller = make_seller()
+    listings = make_listings(seller.seller_id, 6)
+    buyers = [make_buyer() for _ in range(3)]
+    for minute, (listing_id, buyer) in enumerate(zip(listings, buyers * 2)):
+        send(listing_id, buyer, seller, "?", minute)
+
+    _, small = statements.count(lambda: _inbox(client, seller, limit=1))
+    _, large = statements.count(lambda: _inbox(client, seller, limit=6))
+
+    # The current user, then the inbox
+    assert small == large == 2
+
+
+def test_long_messages_are_cut_for_the_preview(client, make_seller, make_buyer, make_listings, send):
+    from app.services.conversations import PREVIEW_LENGTH
+
+    seller, buyer = make_seller(), make_buyer()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+    send(listing_id, buyer, seller, "x" * (PREVIEW_LENGTH + 50), 1)
+
+    preview = _inbox(client, seller)["results"][0]["last_message"]
+
+    assert len(preview) == PREVIEW_LENGTH
+    assert preview.endswith("…")
+
+
+def test_backfill_rebuilds_conversations_from_messages(client, db, make_seller, make_buyer, make_listings, send):
+    from app.models.conversation import Conversation
+    from app.services.conversations import backfill_conversations
+
+    seller, buyer = make_seller(), make_buyer()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+    send(listing_id, buyer, seller, "first", 1)
+    send(listing_id, seller, buyer, "last", 2)
+    conversations = db.query(Conversation).count()
+
+    backfill_conversations(db, batch_size=2)
+
+    rebuilt = _inbox(client, seller)["results"]
+    assert [(c["listing_id"], c["user_id"], c["last_message"], c["unread_count"]) for c in rebuilt] == [
+        (listing_id, buyer.user_id, "last", 0),
+    ]
+    assert db.query(Conversation).count() == conversations
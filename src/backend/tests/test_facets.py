@@ -0,0 +1,93 @@
+import numpy as np
+
+
+def _index():
+    from app.services.facets import FacetIndex
+
+    index = FacetIndex()
+    index.add(3, "Cement", "Nairobi", 450)
+    index.add(1, "Cement", "Mombasa", 80)
+    index.add(2, "Steel", "Nairobi", 1_200)
+    index.add(4, "Steel", "Nairobi", 120_000)
+    return index
+
+
+def test_counts_cover_every_live_listing(client):
+    counts = _index().counts()
+
+    assert counts["category"] == {"Cement": 2, "Steel": 2}
+    assert counts["location"] == {"Nairobi": 3, "Mombasa": 1}
+    assert counts["price"] == [
+        {"min": 0, "max": 100, "count": 1},
+        {"min": 100, "max": 500, "count": 1},
+        {"min": 1_000, "max": 5_000, "count": 1},
+        {"min": 100_000, "max": None, "count": 1},
+    ]
+
+
+def test_category_facet_ignores_the_category_filter(client):
+    counts = _index().counts([1, 2, 3, 99], category="Cement")
+
+    # Other categories stay on offer; the rest is narrowed to Cement
+    assert counts["category"] == {"Cement": 2, "Steel": 1}
+    assert counts["location"] == {"Nairobi": 1, "Mombasa": 1}
+
+
+def test_updates_and_removals_are_counted(client):
+    index = _index()
+    index.add(3, "Steel", "Kisumu", 450)
+    index.remove(4)
+    index.remove(99)
+
+    counts = index.counts()
+    assert counts["category"] == {"Steel": 2, "Cement": 1}
+    assert counts["location"] == {"Nairobi": 1, "Mombasa": 1, "Kisumu": 1}
+
+
+def test_counts_keep_working_on_the_arrays_they_started_with(client):
+    index = _index()
+    ids, category = index.ids, index.category
+
+    index.add(5, "Timber", "Nakuru", 10)
+    index.add(1, "Timber", "Mombasa", 80)
+    index.remove(2)
+
+    # Writers swap in new arrays instead of changing these
+    assert ids.tolist() == [1, 2, 3, 4]
+    assert category.tolist() == [0, 1, 0, 1]
+    assert index.alive.tolist() == [True, False, True, True, True]
+
+
+def test_matching_filters_hits_in_the_order_given(client):
+    from datetime import datetime
+
+    from app.services.ranking import naive_seconds
+
+    index = _index()
+    created = datetime(2026, 1, 2, 3, 4, 5)
+    index.add(5, "Steel", "Nairobi", 10, created)
+    index.remove(4)
+
+    ids, price, created_at = index.matching([5, 4, 1, 2, 99], category="Steel", location="Nairobi")
+
+    assert ids.tolist() == [5, 2]
+    assert price.tolist() == [10.0, 1_200.0]
+    assert created_at[0] == naive_seconds(created) and np.isnan(created_at[1])
+
+
+def test_search_facets_count_the_whole_matched_set(client, db, make_seller, make_listings):
+    from app.models.listing import Listing
+    from app.services.listing_service import listing_saved
+
+    ids = make_listings(make_seller().seller_id, 5)
+    for i, listing in enumerate(db.query(Listing).filter(Listing.id.in_(ids)).order_by(Listing.id)):
+        listing.title = f"Terrazzo {i}"
+        listing.category = "Flooring" if i < 3 else "Tiles"
+        listing.location = "Mombasa" if i % 2 else "Nairobi"
+        db.commit()
+        listing_saved(listing)
+
+    page = client.get("/search/listings", params={"q": "terrazzo", "facets": True, "limit": 1}).json()
+
+    assert page["facets"]["category"] == {"Flooring": 3, "Tiles": 2}
+    assert page["facets"]["location"] == {"Nairobi": 3, "Mombasa": 2}
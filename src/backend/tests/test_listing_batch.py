@@ -0,0 +1,46 @@
+import pytest
+
+
+def test_batch_keeps_the_requested_order_and_reports_missing_ids(client, make_seller, make_listings):
+    seller = make_seller()
+    a, b, c = make_listings(seller.seller_id, 3)
+    missing = c + 10_000
+
+    got = client.get("/listings/batch", params={"ids": f"{c},{a},{missing}"}).json()
+    repeated = client.get(f"/listings/batch?ids={b}&ids={c},{b}").json()
+    posted = client.post("/listings/batch", json={"ids": [c, a, missing]}).json()
+
+    assert [item["id"] for item in got["results"]] == [c, a]
+    assert got["missing"] == [missing]
+    assert [item["id"] for item in repeated["results"]] == [b, c]
+    assert posted == got
+    assert got["results"][0] == client.get(f"/listings/{c}").json()
+
+
+@pytest.mark.parametrize("params, detail", [
+    ({"ids": "1,x"}, "ids must be integers"),
+    ({"ids": ",".join(str(i) for i in range(1, 302))}, "At most 300 ids per request"),
+])
+def test_bad_batches_are_a_400(client, params, detail):
+    response = client.get("/listings/batch", params=params)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+
+
+def test_batch_statements_do_not_grow_with_the_batch(client, make_seller, make_listings, statements):
+    seller = make_seller()
+    small, large = make_listings(seller.seller_id, 2), make_listings(seller.seller_id, 8)
+
+    def fetch(ids):
+        return lambda: client.post("/listings/batch", json={"ids": ids}).json()
+
+    _, cold_small = statements.count(fetch(small))
+    _, cold_large = statements.count(fetch(large))
+    warm, warm_count = statements.count(fetch(large))
+
+    assert cold_small == cold_large
+    # Only the versions are read once the bodies are cached
+    assert warm_count == 1
+    assert [item["id"] for item in warm["results"]] == large
+
@@ -0,0 +1,78 @@
+def test_rebuild_reads_every_batch(db, make_seller, make_listings, monkeypatch):
+    import app.services.listing_cards as listing_cards_module
+    from app.models.listing import Listing
+    from app.services.listing_cards import ListingCardStore
+
+    monkeypatch.setattr(listing_cards_module, "LOAD_BATCH_SIZE", 3)
+    seller = make_seller()
+    ids = make_listings(seller.seller_id, 8, images=1)
+
+    store = ListingCardStore()
+    store.rebuild(db)
+
+    assert set(store.cards) == {listing_id for listing_id, in db.query(Listing.id)}
+    assert all(len(store.cards[i].images) == 1 for i in ids)
+
+
+def test_cards_leave_out_the_description(db, make_seller, make_listings):
+    from app.services.listing_cards import ListingCardStore
+
+    seller = make_seller()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+
+    card = ListingCardStore().get_many([listing_id], db)[0]
+
+    assert not hasattr(card, "description")
+    assert card.to_dict(description="Bags of cement")["description"] == "Bags of cement"
+    assert "description" not in card.to_dict(frozenset({"id", "title"}))
+
+
+def test_feeds_still_carry_the_description(client, db, make_seller, make_listings):
+    from app.models.listing import Listing
+    from app.services.listing_service import serialize_page
+
+    seller = make_seller()
+    ids = make_listings(seller.seller_id, 2)
+
+    feed = client.get(f"/listings/seller/{seller.seller_id}").json()["results"]
+    # Relevance pages hold (id, created_at, version) rows, without the description
+    rows = db.query(Listing.id, Listing.created_at, Listing.version).filter(Listing.id.in_(ids)).all()
+    scored = serialize_page({"results": rows}, db)["results"]
+
+    assert [item["description"] for item in feed] == ["Bags of cement"] * 2
+    assert [item["description"] for item in scored] == ["Bags of cement"] * 2
+
+
+def test_newer_version_reloads_the_card(db, make_seller, make_listings):
+    from app.models.listing import Listing
+    from app.services.listing_cards import ListingCardStore
+
+    seller = make_seller()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+    store = ListingCardStore()
+    card = store.get_many([listing_id], db)[0]
+
+    # Edited on another worker: this store never saw the write
+    db.query(Listing).filter(Listing.id == listing_id).update({Listing.title: "Steel"})
+    db.commit()
+    version = db.query(Listing.version).filter(Listing.id == listing_id).scalar()
+
+    assert store.get_many([listing_id], db, {listing_id: card.version})[0].title == card.title
+    assert store.get_many([listing_id], db, {listing_id: version})[0].title == "Steel"
+
+
+def test_cards_past_their_ttl_are_reloaded(db, make_seller, make_listings, monkeypatch):
+    import app.services.listing_cards as listing_cards_module
+    from app.models.listing import Listing
+    from app.services.listing_cards import ListingCardStore
+
+    seller = make_seller()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+    store = ListingCardStore()
+    store.get_many([listing_id], db)
+    db.query(Listing).filter(Listing.id == listing_id).update({Listing.title: "Bricks"})
+    db.commit()
+
+    assert store.get_many([listing_id], db)[0].title != "Bricks"
+    monkeypatch.setattr(listing_cards_module, "CARD_TTL", 0.0)
+    assert store.get_many([listing_id], db)[0].title == "Bricks"
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    import app.services.listing_service as listing_service
+
+    monkeypatch.setattr(listing_service, "EXPORT_BATCH_SIZE", 3)
+
+
+def _export(client, **params):
+    response = client.get("/listings/export", params=params)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_covers_every_batch(client, db, make_seller, make_listings, small_batches, statements):
+    from app.models.listing import Listing
+
+    seller = make_seller()
+    ids = make_listings(seller.seller_id, 10, images=1)
+
+    exported, n = statements.count(lambda: _export(client))
+    exported_ids = [item["id"] for item in exported]
+
+    assert exported_ids == sorted(exported_ids)
+    assert len(exported_ids) == db.query(Listing).count()
+    assert set(ids) <= set(exported_ids)
+    assert all(len(item["images"]) == 1 for item in exported if item["id"] in ids)
+    # Per batch of 3: listings, images and image variants
+    batches = -(-len(exported_ids) // 3)
+    assert n == 3 * batches + int(len(exported_ids) % 3 == 0)
+
@@ -0,0 +1,73 @@
+"""
+Edits made by another worker (straight to the database, without this
+worker's write hooks) within the same second must still show up.
+SQLite's CURRENT_TIMESTAMP has one-second precision, like MySQL's.
+"""
+from app.core.database import SessionLocal
+from app.models.listing import Listing
+
+
+def edit_elsewhere(listing_id: int, **values) -> None:
+    with SessionLocal() as other_worker:
+        listing = other_worker.get(Listing, listing_id)
+        for name, value in values.items():
+            setattr(listing, name, value)
+        other_worker.commit()
+
+
+def test_detail_serves_same_second_edit(client, make_seller, make_listings):
+    seller = make_seller()
+    listing_id, = make_listings(seller.seller_id, 1)
+    assert client.get(f"/listings/{listing_id}").json()["title"] == "Cement 0"
+
+    edit_elsewhere(listing_id, title="Cement, 50kg")
+    assert client.get(f"/listings/{listing_id}").json()["title"] == "Cement, 50kg"
+    edit_elsewhere(listing_id, title="Cement, 25kg")
+    assert client.get(f"/listings/{listing_id}").json()["title"] == "Cement, 25kg"
+
+
+def test_batch_serves_same_second_edit(client, make_seller, make_listings):
+    seller = make_seller()
+    ids = make_listings(seller.seller_id, 2)
+    client.get("/listings/batch", params={"ids": ids})
+
+    edit_elsewhere(ids[1], price=99)
+    results = client.get("/listings/batch", params={"ids": ids}).json()["results"]
+    assert [r["price"] for r in results] == [10.0, 99.0]
+
+
+def test_detail_etag_changes_on_same_second_edit(client, make_seller, make_listings):
+    seller = make_seller()
+    listing_id, = make_listings(seller.seller_id, 1)
+    etag = client.get(f"/listings/{listing_id}").headers["etag"]
+
+    edit_elsewhere(listing_id, title="Cement, 50kg")
+    response = client.get(f"/listings/{listing_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Cement, 50kg"
+    assert client.get(f"/listings/{listing_id}", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_seller_feed_etag_changes_on_same_second_edit(client, make_seller, make_listings):
+    seller = make_seller()
+    ids = make_listings(seller.seller_id, 3)
+    etag = client.get(f"/listings/seller/{seller.seller_id}").headers["etag"]
+
+    edit_elsewhere(ids[0], price=99)
+    response = client.get(f"/listings/seller/{seller.seller_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert {r["price"] for r in response.json()["results"]} == {99.0, 11.0, 12.0}
+
+
+def test_seller_profile_etag_changes_on_same_second_edit(client, make_seller):
+    from app.models.seller import Seller
+
+    seller = make_seller()
+    etag = client.get("/sellers/me", headers=seller.headers).headers["etag"]
+    with SessionLocal() as other_worker:
+        other_worker.get(Seller, seller.seller_id).business_name = "Renamed Ltd"
+        other_worker.commit()
+
+    response = client.get("/sellers/me", headers={**seller.headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["business_name"] == "Renamed Ltd"
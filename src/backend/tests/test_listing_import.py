@@ -0,0 +1,79 @@
+import io
+
+import pytest
+
+HEADER = "title,description,price,location,category\n"
+
+
+def _row(title: str) -> str:
+    return f"{title},Bags of cement,450,Nairobi,Cement\n"
+
+
+def _import(client, seller, content: bytes, images: bytes = None):
+    files = {"file": ("listings.csv", io.BytesIO(content), "text/csv")}
+    if images is not None:
+        files["images"] = ("images.zip", io.BytesIO(images), "application/zip")
+    return client.post("/listings/import", files=files, headers=seller.headers)
+
+
+@pytest.fixture
+def refuse_title(db):
+    """Makes the database refuse listings with the given title."""
+    from sqlalchemy import text
+
+    def refuse(title: str) -> None:
+        db.execute(text(
+            "CREATE TRIGGER refuse_import BEFORE INSERT ON listings "
+            f"WHEN NEW.title = '{title}' BEGIN SELECT RAISE(ABORT, 'refused'); END"
+        ))
+        db.commit()
+
+    yield refuse
+    db.execute(text("DROP TRIGGER IF EXISTS refuse_import"))
+    db.commit()
+
+
+def test_refused_row_fails_alone(client, db, make_seller, refuse_title):
+    from app.models.listing import Listing
+
+    seller = make_seller()
+    refuse_title("Refused")
+
+    report = _import(client, seller, (HEADER + _row("Kept 1") + _row("Refused") + _row("Kept 2")).encode()).json()
+
+    assert (report["created"], report["failed"]) == (2, 1)
+    assert report["errors"] == [{"row": 3, "error": "insert failed: IntegrityError"}]
+    titles = [t for t, in db.query(Listing.title).filter(Listing.id.in_(report["listing_ids"])).order_by(Listing.id)]
+    assert titles == ["Kept 1", "Kept 2"]
+
+
+def test_file_that_is_not_utf8_is_a_400(client, make_seller):
+    response = _import(client, make_seller(), (HEADER + _row("Cement")).encode("utf-16"))
+
+    assert response.status_code == 400
+    assert "not UTF-8 text" in response.json()["detail"]
+
+
+def test_images_that_are_not_a_zip_are_a_400(client, make_seller):
+    response = _import(client, make_seller(), (HEADER + _row("Cement")).encode(), images=b"not a zip")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "images must be a zip archive"
+
+
+def test_unreadable_zip_member_fails_its_row(client, make_seller):
+    import zipfile
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("bag.png", b"\x89PNG" + b"x" * 2000)
+    data = bytearray(archive.getvalue())
+    # Corrupt the compressed bytes of the member
+    start = 30 + len("bag.png")
+    data[start:start + 20] = b"\xff" * 20
+
+    content = HEADER.replace("\n", ",images\n") + _row("Cement").replace("\n", ",bag.png\n")
+    report = _import(client, make_seller(), content.encode(), images=bytes(data)).json()
+
+    assert (report["created"], report["failed"]) == (0, 1)
+    assert report["errors"] == [{"row": 2, "error": "image 'bag.png' could not be read from the zip"}]
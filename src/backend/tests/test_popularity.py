@@ -0,0 +1,53 @@
+def _interaction(listing_id: int, weight: float) -> int:
+    from app.core.database import SessionLocal
+    from app.models.item_interaction import InteractionAction, ItemInteraction
+
+    with SessionLocal() as session:
+        interaction = ItemInteraction(listing_id=listing_id, action=InteractionAction.view, weight=weight)
+        session.add(interaction)
+        session.commit()
+        return interaction.id
+
+
+def test_refresh_counts_concurrent_interactions_once(db, make_seller, make_listings):
+    from app.services.popularity import PopularityCache
+
+    seller = make_seller()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+    cache = PopularityCache()
+
+    early = _interaction(listing_id, 1.0)
+    cache.add(listing_id, 1.0, early)
+    # Committed before the reload reads its high-water id; add() arrives late
+    committed_before = _interaction(listing_id, 2.0)
+
+    load = cache._load
+
+    def load_while_recording(session, high_water):
+        cache.add(listing_id, 2.0, committed_before)
+        # Committed and recorded while the GROUP BY runs
+        during = _interaction(listing_id, 4.0)
+        cache.add(listing_id, 4.0, during)
+        return load(session, high_water)
+
+    cache._load = load_while_recording
+    cache.refresh(db)
+
+    assert cache.get(listing_id) == 7.0
+    cache._load = load
+    cache.refresh(db)
+    assert cache.get(listing_id) == 7.0
+
+
+def test_increments_survive_a_reload_that_missed_them(db, make_seller, make_listings):
+    from app.services.popularity import PopularityCache
+
+    seller = make_seller()
+    listing_id = make_listings(seller.seller_id, 1)[0]
+    cache = PopularityCache()
+    cache.refresh(db)
+
+    cache.add(listing_id, 3.0, _interaction(listing_id, 3.0))
+    assert cache.get(listing_id) == 3.0
+    cache.refresh(db)
+    assert cache.get(listing_id) == 3.0
@@ -0,0 +1,75 @@
+def test_entries_expire_after_their_ttl(monkeypatch):
+    import app.utils.cache as cache_module
+    from app.utils.cache import LRUCache
+
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = LRUCache(ttl=30.0)
+    cache.put("page", {"results": []}, version=1)
+
+    now[0] += 29.9
+    assert cache.get("page", 1) == {"results": []}
+    now[0] += 0.2
+    assert cache.get("page", 1) is None
+    assert (cache.stats()["hits"], cache.stats()["expired"]) == (1, 1)
+
+
+def test_other_versions_miss_and_drop_the_entry():
+    from app.utils.cache import LRUCache
+
+    cache = LRUCache()
+    cache.put("page", "v1 page", version=1)
+
+    assert cache.get("page", 2) is None
+    assert cache.get("page", 1) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    from app.utils.cache import LRUCache
+
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts_oldest_first():
+    from app.utils.cache import LRUCache
+
+    cache = LRUCache(sizeof=len, max_bytes=10)
+    cache.put("a", "x" * 4)
+    cache.put("b", "x" * 4)
+    cache.put("c", "x" * 4)
+
+    assert cache.get("a") is None
+    assert cache.size_bytes == 8
+
+
+def test_search_pages_are_served_from_cache_until_a_listing_changes(client, db, make_seller, make_listings, statements):
+    from app.models.listing import Listing
+    from app.services.listing_service import listing_saved
+
+    seller = make_seller()
+    first = db.get(Listing, make_listings(seller.seller_id, 1)[0])
+    first.title = "Marble slab"
+    db.commit()
+    listing_saved(first)
+    params = {"q": "marble", "sort": "newest"}
+
+    page = client.get("/search/listings", params=params).json()
+    cached, n = statements.count(lambda: client.get("/search/listings", params=params).json())
+    assert cached == page
+    assert n == 0
+
+    second = db.get(Listing, make_listings(seller.seller_id, 1)[0])
+    second.title = "Marble tile"
+    db.commit()
+    listing_saved(second)
+
+    fresh = client.get("/search/listings", params=params).json()
+    assert [item["id"] for item in fresh["results"]] == [second.id, first.id]
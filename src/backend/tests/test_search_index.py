@@ -0,0 +1,34 @@
+from app.services.search_index import SearchIndex, edit_distance
+
+
+def make_index(*titles):
+    index = SearchIndex()
+    for listing_id, title in enumerate(titles, start=1):
+        index.add(listing_id, title=title)
+    return index
+
+
+def test_edit_distance_counts_a_transposition_as_one_edit():
+    assert edit_distance("sotne", "stone", 1) == 1
+
+
+def test_correct_term_finds_transposed_term():
+    # "sotne" shares one of "stone"'s five trigrams; still a single edit
+    index = make_index("Stone blocks", "Steel bars")
+    assert index.correct_term("sotne") == "stone"
+
+
+def test_correct_term_finds_substituted_term():
+    index = make_index("Cement bags", "Steel bars")
+    assert index.correct_term("cemant") == "cement"
+
+
+def test_correct_term_rejects_terms_beyond_the_typo_limit():
+    index = make_index("Stone blocks")
+    assert index.correct_term("xtqne") is None
+
+
+def test_correct_rewrites_only_unknown_words():
+    index = make_index("Stone blocks", "Cement bags")
+    assert index.correct("cement sotne") == "cement stone"
+    assert index.correct("cement stone") is None
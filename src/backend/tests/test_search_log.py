@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.mark.parametrize("payload", [
+    {},
+    {"query_text": 42},
+    {"query_text": "x" * 513},
+    {"query_text": "cement", "results_count": "many"},
+    {"query_text": "cement", "results_count": -1},
+    {"query_text": "cement", "category": ["Cement"]},
+])
+def test_malformed_events_are_refused(client, payload):
+    assert client.post("/search/log", json=payload).status_code == 422
+
+
+def test_event_is_queued(client):
+    from app.services.search_log import search_log
+
+    before = search_log.stats()["enqueued"]
+    response = client.post("/search/log", json={"query_text": "cement", "results_count": 3, "device_type": "mobile"})
+
+    assert response.json() == {"status": "queued"}
+    assert search_log.stats()["enqueued"] == before + 1
+    # Written now rather than by the flusher while a later test counts statements
+    search_log.flush()
+
+
+def test_rejected_batch_drops_only_the_bad_event(db):
+    from app.models.search_query import SearchQuery
+    from app.services.search_log import SearchLogBuffer
+
+    buffer = SearchLogBuffer()
+    buffer.add(query_text="gravel before", results_count=1)
+    buffer.add(query_text=None, results_count=1)  # NOT NULL in search_queries
+    buffer.add(query_text="gravel after", results_count=1)
+
+    assert buffer.flush() == 2
+    assert (buffer.stats()["flushed"], buffer.stats()["dropped"]) == (2, 1)
+    texts = {t for t, in db.query(SearchQuery.query_text).filter(SearchQuery.query_text.like("gravel%"))}
+    assert texts == {"gravel before", "gravel after"}
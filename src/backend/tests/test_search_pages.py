@@ -0,0 +1,89 @@
+import re
+
+import pytest
+
+LIMIT = 3
+
+
+@pytest.fixture
+def indexed_listings(db, make_seller, make_listings):
+    """Listings titled with a word no other test uses, added to the in-memory indexes."""
+    from app.models.listing import Listing
+    from app.services.listing_service import listing_saved
+
+    def make(word: str, count: int, **values) -> list:
+        ids = make_listings(make_seller().seller_id, count, images=1)
+        listings = db.query(Listing).filter(Listing.id.in_(ids)).order_by(Listing.id).all()
+        for i, listing in enumerate(listings):
+            listing.title = f"{word} {i}"
+            for name, value in values.items():
+                setattr(listing, name, value(i) if callable(value) else value)
+        db.commit()
+        for listing in listings:
+            listing_saved(listing)
+        return ids
+
+    return make
+
+
+def _pages(client, path, **params):
+    results, cursor = [], None
+    while True:
+        page = client.get(path, params=dict(params, limit=LIMIT, **({"cursor": cursor} if cursor else {}))).json()
+        results += page["results"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return results
+
+
+def _largest_in_list(statements) -> int:
+    return max((len(m.split(",")) for s in statements for m in re.findall(r"IN \(([^)]*)\)", s)), default=0)
+
+
+@pytest.mark.parametrize("word, sort, expected", [
+    ("Basalt", "newest", lambda rows: sorted(rows, key=lambda r: (r["created_at"], r["id"]), reverse=True)),
+    ("Andesite", "price_low", lambda rows: sorted(rows, key=lambda r: (r["price"], r["id"]))),
+    ("Rhyolite", "price_high", lambda rows: sorted(rows, key=lambda r: (r["price"], r["id"]), reverse=True)),
+])
+def test_sorted_search_pages_read_only_their_hits(word, sort, expected, client, indexed_listings, statements):
+    ids = indexed_listings(word, 10, price=lambda i: 10 + i % 4)
+
+    statements.statements.clear()
+    results = _pages(client, "/search/listings", q=word.lower(), sort=sort)
+
+    assert [r["id"] for r in results] == [r["id"] for r in expected(results)]
+    assert sorted(r["id"] for r in results) == sorted(ids)
+    assert _largest_in_list(statements.statements) <= LIMIT + 1
+
+
+def test_relevance_pages_cover_every_hit_once(client, indexed_listings, statements):
+    ids = indexed_listings("Dolerite", 10)
+
+    statements.statements.clear()
+    results = _pages(client, "/search/listings", q="dolerite", include_total=True)
+
+    assert sorted(r["id"] for r in results) == sorted(ids)
+    assert _largest_in_list(statements.statements) <= LIMIT + 1
+    first = client.get("/search/listings", params={"q": "dolerite", "limit": LIMIT, "include_total": True}).json()
+    assert (first["total"], first["total_is_estimate"]) == (10, False)
+
+
+def test_search_filters_hits_before_reading_them(client, indexed_listings):
+    ids = indexed_listings("Gneiss", 6, location=lambda i: "Mombasa" if i % 2 else "Nairobi")
+
+    results = _pages(client, "/search/", search="gneiss", location="Mombasa")
+
+    assert [r["id"] for r in results] == sorted(ids[1::2], reverse=True)
+
+
+def test_hits_changed_elsewhere_are_skipped(client, db, indexed_listings):
+    from app.models.listing import Listing
+
+    ids = indexed_listings("Schist", 6)
+    # Moved to another category by a worker whose indexes this one never saw
+    db.query(Listing).filter(Listing.id.in_(ids[:4])).update({Listing.category: "Steel"})
+    db.commit()
+
+    results = _pages(client, "/search/listings", q="schist", category="Cement", sort="newest")
+
+    assert sorted(r["id"] for r in results) == ids[4:]
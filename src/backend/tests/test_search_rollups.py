@@ -0,0 +1,45 @@
+from datetime import datetime
+
+
+def _rollups(db, text):
+    from app.models.search_rollup import SearchQueryRollup
+
+    return {
+        (r.bucket, r.category): (r.searches, r.low_result_searches)
+        for r in db.query(SearchQueryRollup).filter(SearchQueryRollup.query_text == text)
+    }
+
+
+def test_backfill_covers_every_batch(db):
+    from app.models.search_query import SearchQuery
+    from app.services.search_rollups import backfill_search_rollups
+
+    ten, eleven = datetime(2026, 1, 5, 10, 15), datetime(2026, 1, 5, 11, 40)
+    db.add_all(
+        SearchQuery(query_text="Red  Bricks!", category="Bricks", results_count=i, created_at=ten)
+        for i in range(5)
+    )
+    db.add(SearchQuery(query_text="red bricks", category="Bricks", results_count=0, created_at=eleven))
+    db.add(SearchQuery(query_text="red bricks", category=None, results_count=9, created_at=eleven))
+    db.commit()
+
+    backfill_search_rollups(db, batch_size=2)
+
+    assert _rollups(db, "red bricks") == {
+        (datetime(2026, 1, 5, 10), "Bricks"): (5, 3),
+        (datetime(2026, 1, 5, 11), "Bricks"): (1, 1),
+        (datetime(2026, 1, 5, 11), ""): (1, 0),
+    }
+
+
+def test_apply_adds_to_existing_rollups(db):
+    from app.services.search_rollups import apply_search_rollups
+
+    at = datetime(2026, 2, 1, 9, 5)
+    event = {"query_text": "Steel Bars", "category": "Steel", "results_count": 1, "created_at": at}
+    apply_search_rollups(db, [event, event])
+    db.commit()
+    apply_search_rollups(db, [dict(event, results_count=10)])
+    db.commit()
+
+    assert _rollups(db, "steel bars") == {(datetime(2026, 2, 1, 9), "Steel"): (3, 2)}
@@ -0,0 +1,64 @@
+import pytest
+
+
+def test_parse_fields_always_keeps_the_id(client):
+    from app.services.listing_fields import parse_fields
+
+    assert parse_fields(None) is None
+    assert parse_fields(" , ") is None
+    assert parse_fields("title, price") == {"id", "title", "price"}
+
+
+def test_unknown_fields_are_a_400(client, make_seller, make_listings):
+    listing_id = make_listings(make_seller().seller_id, 1)[0]
+
+    response = client.get(f"/listings/{listing_id}", params={"fields": "title,password_hash"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Unknown fields: password_hash (allowed: title,")
+
+
+def test_detail_returns_only_the_fields_asked_for(client, make_seller, make_listings):
+    listing_id = make_listings(make_seller().seller_id, 1)[0]
+
+    sparse = client.get(f"/listings/{listing_id}", params={"fields": "title,price"})
+    full = client.get(f"/listings/{listing_id}")
+
+    assert sparse.json() == {"id": listing_id, "title": "Cement 0", "price": 10.0}
+    # Each field set has its own validator
+    assert sparse.headers["etag"] != full.headers["etag"]
+
+
+@pytest.mark.parametrize("path", ["/listings/", "/search/listings"])
+def test_feeds_keep_the_page_envelope(client, make_seller, make_listings, path):
+    make_listings(make_seller().seller_id, 3)
+
+    page = client.get(path, params={"fields": "title", "limit": 2}).json()
+
+    assert [set(item) for item in page["results"]] == [{"id", "title"}] * 2
+    assert page["next_cursor"]
+    following = client.get(path, params={"fields": "title", "limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [set(item) for item in following["results"]] == [{"id", "title"}] * 2
+
+
+def test_sparse_batch_returns_only_the_fields_asked_for(client, make_seller, make_listings):
+    ids = make_listings(make_seller().seller_id, 2)
+
+    got = client.get("/listings/batch", params={"ids": ",".join(map(str, ids)), "fields": "title,price"}).json()
+
+    assert got["results"] == [{"id": i, "title": f"Cement {n}", "price": 10.0 + n} for n, i in enumerate(ids)]
+    assert got["missing"] == []
+
+
+def test_images_are_only_loaded_when_asked_for(client, make_seller, make_listings, statements):
+    ids = ",".join(map(str, make_listings(make_seller().seller_id, 3)))
+
+    statements.count(lambda: client.get("/listings/batch", params={"ids": ids, "fields": "title"}))
+    without = list(statements.statements)
+    with_images, _ = statements.count(
+        lambda: client.get("/listings/batch", params={"ids": ids, "fields": "title,images"})
+    )
+
+    assert not any("FROM listing_images" in s for s in without)
+    assert any("FROM listing_images" in s for s in statements.statements)
+    assert all(len(item["images"]) == 2 for item in with_images.json()["results"])
@@ -0,0 +1,99 @@
+"""
+SQL statements per request for the listing and chat endpoints, pinned so
+a lazy load or per-row query shows up as a failure. Each check runs with
+a small and a larger data set; the count must not depend on either.
+"""
+import pytest
+
+from app.models.chat import ChatMessage
+from app.services.conversations import record_messages
+
+SIZES = [1, 6]
+
+
+@pytest.fixture
+def catalogue(request, db, make_seller, make_buyer, make_listings):
+    """A seller with `request.param` listings and a buyer who messaged about each."""
+    seller, buyer = make_seller(), make_buyer()
+    ids = make_listings(seller.seller_id, request.param, images=request.param)
+    messages = [
+        ChatMessage(sender_id=buyer.user_id, receiver_id=seller.user_id, listing_id=listing_id, message="Still available?")
+        for listing_id in ids
+    ]
+    db.add_all(messages)
+    db.flush()
+    record_messages(db, messages)
+    db.commit()
+    return seller, buyer, ids
+
+
+def requests_for(client, seller, buyer, ids):
+    return {
+        # listing id, created_at, price and version; the page is rendered from cards
+        "browse": lambda: client.get("/listings/"),
+        # ETag validator + page
+        "seller feed": lambda: client.get(f"/listings/seller/{seller.seller_id}"),
+        # user + seller row + ETag validator + page
+        "my listings": lambda: client.get("/listings/my-listings", headers=seller.headers),
+        # version check against the cached body
+        "detail": lambda: client.get(f"/listings/{ids[0]}"),
+        # versions for every id in one IN query
+        "batch": lambda: client.get("/listings/batch", params={"ids": ",".join(map(str, ids))}),
+        # user + one UNION ALL over both sides of the conversations
+        "inbox": lambda: client.get("/chat/messages", headers=buyer.headers),
+        # user + listing owner + one UNION ALL over both directions
+        "history": lambda: client.get(f"/chat/{ids[0]}", params={"user_id": seller.user_id}, headers=buyer.headers),
+    }
+
+
+# Warm counts: the second identical request, once caches are filled.
+READ_STATEMENTS = {
+    "browse": 1,
+    "seller feed": 2,
+    "my listings": 4,
+    "detail": 1,
+    "batch": 1,
+    "inbox": 2,
+    "history": 3,
+}
+
+
+@pytest.mark.parametrize("catalogue", SIZES, indirect=True)
+@pytest.mark.parametrize("name", list(READ_STATEMENTS))
+def test_read_statement_count(client, statements, catalogue, name):
+    request = requests_for(client, *catalogue)[name]
+    statements.count(request)
+    response, count = statements.count(request)
+    assert response.status_code == 200
+    assert count == READ_STATEMENTS[name], statements.statements
+
+
+@pytest.mark.parametrize("catalogue", SIZES, indirect=True)
+def test_detail_cold_statement_count(client, statements, catalogue):
+    # version, then the listing with its images and their variants
+    _, _, ids = catalogue
+    response, count = statements.count(lambda: client.get(f"/listings/{ids[-1]}"))
+    assert response.status_code == 200
+    assert count == 4, statements.statements
+
+
+@pytest.mark.parametrize("catalogue", SIZES, indirect=True)
+def test_update_statement_count(client, statements, catalogue):
+    # user, listing + seller + images + variants, UPDATE, then the refresh
+    # for the response (listing, seller, images, variants)
+    seller, _, ids = catalogue
+    response, count = statements.count(
+        lambda: client.put(f"/listings/{ids[0]}", data={"title": "Cement, 50kg"}, headers=seller.headers)
+    )
+    assert response.status_code == 200
+    assert count == 10, statements.statements
+
+
+@pytest.mark.parametrize("catalogue", SIZES, indirect=True)
+def test_delete_statement_count(client, statements, catalogue):
+    # user, listing + seller + images + variants, the cascaded chat
+    # messages and interactions, then one DELETE per table
+    seller, _, ids = catalogue
+    response, count = statements.count(lambda: client.delete(f"/listings/{ids[0]}", headers=seller.headers))
+    assert response.status_code == 200
+    assert count == 10, statements.statements
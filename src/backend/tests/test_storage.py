@@ -0,0 +1,85 @@
+import io
+import os
+
+import pytest
+
+
+@pytest.fixture
+def store(tmp_path):
+    from app.services.storage import ContentStore
+
+    return ContentStore(str(tmp_path), max_bytes=1024, chunk_size=16)
+
+
+def _incoming(store) -> list:
+    return os.listdir(store.tmp_dir)
+
+
+def test_identical_content_is_stored_once(store):
+    import hashlib
+
+    first = store.save_stream(io.BytesIO(b"cement" * 20), "bag.JPEG")
+    second = store.save_stream(io.BytesIO(b"cement" * 20), "other-name.jpg")
+
+    digest = hashlib.sha256(b"cement" * 20).hexdigest()
+    assert first.name == second.name == f"{digest[:2]}/{digest}.jpg"
+    assert (first.created, second.created) == (True, False)
+    assert first.url == f"/uploads/{first.name}"
+    with open(store.path(first.name), "rb") as f:
+        assert f.read() == b"cement" * 20
+    assert _incoming(store) == []
+
+
+def test_unknown_extensions_are_dropped(store):
+    stored = store.save_stream(io.BytesIO(b"x"), "notes.<script>")
+
+    assert "." not in os.path.basename(stored.name)
+
+
+@pytest.mark.parametrize("content, status", [(b"x" * 1025, 413), (b"", 400)])
+def test_rejected_uploads_leave_nothing_behind(store, content, status):
+    from fastapi import HTTPException
+
+    with pytest.raises(HTTPException) as exc:
+        store.save_stream(io.BytesIO(content), "bag.png")
+
+    assert exc.value.status_code == status
+    assert _incoming(store) == []
+    assert sorted(os.listdir(store.root)) == [".incoming"]
+
+
+def test_oversized_upload_stops_reading_at_the_limit(store):
+    from fastapi import HTTPException
+
+    class Endless(io.RawIOBase):
+        reads = 0
+
+        def read(self, n=-1):
+            self.reads += 1
+            return b"x" * n
+
+    source = Endless()
+    with pytest.raises(HTTPException):
+        store.save_stream(source, "bag.png")
+
+    # 1024-byte limit in 16-byte chunks
+    assert source.reads == 1024 // 16 + 1
+
+
+def test_svgs_get_a_gzipped_sibling(store):
+    import gzip
+
+    svg = b"<svg xmlns='http://www.w3.org/2000/svg'>" + b"<g/>" * 50 + b"</svg>"
+    stored = store.save_stream(io.BytesIO(svg), "logo.svg")
+
+    with gzip.open(store.path(stored.name) + ".gz") as f:
+        assert f.read() == svg
+
+
+def test_content_digest_only_reads_content_addressed_names():
+    from app.services.storage import content_digest
+
+    digest = "ab" + "0" * 62
+    assert content_digest(f"ab/{digest}.png") == digest
+    assert content_digest(f"cd/{digest}.png") is None
+    assert content_digest("legacy-upload.png") is None
@@ -0,0 +1,79 @@
+import io
+import os
+
+import pytest
+
+
+@pytest.fixture
+def stored(client):
+    from app.services.storage import upload_store
+
+    def save(content: bytes, filename: str):
+        return upload_store.save_stream(io.BytesIO(content), filename)
+
+    return save
+
+
+def test_content_addressed_files_are_immutable_with_a_strong_etag(client, stored):
+    from app.utils.upload_files import IMMUTABLE_CACHE
+
+    image = stored(b"\x89PNG" + os.urandom(64), "bag.png")
+
+    response = client.get(image.url)
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE
+    assert response.headers["etag"] == f'"{image.digest}"'
+
+
+@pytest.mark.parametrize("if_none_match", ["etag", "*"])
+def test_matching_if_none_match_is_a_304(client, stored, if_none_match):
+    image = stored(b"\x89PNG" + os.urandom(64), "bag.png")
+    etag = f'"{image.digest}"' if if_none_match == "etag" else "*"
+
+    response = client.get(image.url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_ranges_are_served(client, stored):
+    content = b"\x89PNG" + os.urandom(64)
+    image = stored(content, "bag.png")
+
+    response = client.get(image.url, headers={"Range": "bytes=4-11"})
+
+    assert response.status_code == 206
+    assert response.content == content[4:12]
+
+
+def test_svgs_are_sent_gzipped_to_clients_that_accept_it(client, stored):
+    svg = b"<svg xmlns='http://www.w3.org/2000/svg'>" + b"<g/>" * 50 + b"</svg>"
+    logo = stored(svg, "logo.svg")
+
+    gzipped = client.get(logo.url, headers={"Accept-Encoding": "gzip"})
+    plain = client.get(logo.url, headers={"Accept-Encoding": "identity"})
+
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["content-type"].startswith("image/svg+xml")
+    assert gzipped.headers["etag"] == f'"{logo.digest}-gzip"'
+    assert gzipped.content == svg
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] == f'"{logo.digest}"'
+    assert plain.content == svg
+
+
+def test_other_files_revalidate_and_partial_uploads_are_hidden(client):
+    from app.core.config import settings
+    from app.services.storage import INCOMING_DIR
+    from app.utils.upload_files import REVALIDATE_CACHE
+
+    with open(os.path.join(settings.UPLOAD_DIR, "legacy-upload.png"), "wb") as f:
+        f.write(b"\x89PNG legacy")
+    with open(os.path.join(settings.UPLOAD_DIR, INCOMING_DIR, "partial"), "wb") as f:
+        f.write(b"half")
+
+    legacy = client.get("/uploads/legacy-upload.png")
+
+    assert legacy.headers["cache-control"] == REVALIDATE_CACHE
+    assert client.get(f"/uploads/{INCOMING_DIR}/partial").status_code == 404
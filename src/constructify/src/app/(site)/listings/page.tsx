@@ -20,25 +20,44 @@ interface Listing {
   images: ListingImage[]; // include images
 }
 
+// One page of GET /listings/; pass next_cursor back to get the next one
+interface ListingPage {
+  results: Listing[];
+  next_cursor: string | null;
+}
+
 export default function ListingsPage() {
   const [listings, setListings] = useState<Listing[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  // Fetch all listings from backend
-  useEffect(() => {
-    async function fetchListings() {
-      try {
-        const res = await api.get<Listing[]>("/listings/");
-        setListings(res.data);
-      } catch (err) {
-        console.error("Failed to fetch listings", err);
-      } finally {
-        setLoading(false);
-      }
+  // Fetch listings from backend, a page at a time
+  async function fetchListings(cursor?: string) {
+    try {
+      const res = await api.get<ListingPage>("/listings/", {
+        params: { cursor },
+      });
+      setListings((prev) =>
+        cursor ? [...prev, ...res.data.results] : res.data.results
+      );
+      setNextCursor(res.data.next_cursor);
+    } catch (err) {
+      console.error("Failed to fetch listings", err);
     }
-    fetchListings();
+  }
+
+  useEffect(() => {
+    fetchListings().finally(() => setLoading(false));
   }, []);
 
+  async function loadMore() {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    await fetchListings(nextCursor);
+    setLoadingMore(false);
+  }
+
   if (loading) return <p className="text-center mt-10">Loading...</p>;
 
   return (
@@ -82,6 +101,18 @@ export default function ListingsPage() {
           );
         })}
       </div>
+
+      {nextCursor && (
+        <div className="text-center mt-8">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-4 py-2 border rounded-lg hover:bg-gray-100 disabled:opacity-50"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
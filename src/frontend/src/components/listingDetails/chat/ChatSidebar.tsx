@@ -12,34 +12,47 @@ interface ChatMessage {
 
 interface Props {
   listingId: number;
-  sellerId: number;
+  // The seller's users.id (not sellers.id); chat addresses users
+  sellerUserId: number;
 }
 
-export default function ChatSidebar({ listingId, sellerId }: Props) {
+export default function ChatSidebar({ listingId, sellerUserId }: Props) {
   const { user } = useAuth();
   const [messages, setMessages] = useState<ChatMessage[]>([]);
   const [input, setInput] = useState("");
+  // id to pass as before_id for the next older page; null when none left
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
   const socketRef = useRef<WebSocket | null>(null);
   const messagesEndRef = useRef<HTMLDivElement | null>(null);
 
-  const receiverId = sellerId;
+  const receiverId = sellerUserId;
 
-  // Auto-scroll to bottom
+  // Auto-scroll to bottom (for new messages, not prepended older ones)
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   };
-  useEffect(scrollToBottom, [messages]);
+  useEffect(scrollToBottom, [messages[messages.length - 1]?.id]);
 
-  // Load chat history
+  // Load chat history: latest page first, older pages on demand
   useEffect(() => {
     const loadMessages = async () => {
       const res = await api.get(`/chat/${listingId}`);
       setMessages(res.data);
+      setOlderCursor(res.headers["x-next-before-id"] ?? null);
     };
 
     loadMessages();
   }, [listingId]);
 
+  const loadOlder = async () => {
+    if (!olderCursor) return;
+    const res = await api.get(`/chat/${listingId}`, {
+      params: { before_id: olderCursor },
+    });
+    setMessages((prev) => [...res.data, ...prev]);
+    setOlderCursor(res.headers["x-next-before-id"] ?? null);
+  };
+
   // WebSocket connection
   useEffect(() => {
     if (!user) return;
@@ -98,6 +111,14 @@ export default function ChatSidebar({ listingId, sellerId }: Props) {
 
       {/* Chat messages */}
       <div className="flex-1 overflow-y-auto p-4 space-y-3">
+        {olderCursor && (
+          <button
+            onClick={loadOlder}
+            className="block mx-auto text-xs text-blue-600 hover:underline"
+          >
+            Load earlier messages
+          </button>
+        )}
         {messages.map((msg) => (
           <div
             key={msg.id}
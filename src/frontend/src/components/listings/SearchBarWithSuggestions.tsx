@@ -9,10 +9,13 @@ interface SearchInsights {
   popular_categories?: string[];
 }
 
+// One /search/quick suggestion; id, price and image_url only come with listings
 interface QuickResult {
-  id: number;
-  title: string;
-  price: number;
+  type: "listing" | "category" | "location" | "query";
+  text: string;
+  id?: number;
+  price?: number | null;
+  image_url?: string | null;
 }
 
 export default function SearchBarWithSuggestions() {
@@ -114,19 +117,48 @@ export default function SearchBarWithSuggestions() {
                 <h4 className="text-xs font-bold text-gray-500 mb-2 uppercase tracking-wider">
                   Search Results
                 </h4>
-                {quickResults.map((item) => (
-                  <Link
-                    key={item.id}
-                    to={`/listings/${item.id}`}
-                    className="block py-2 px-3 hover:bg-[#B8860B] hover:text-white transition-all duration-200 mb-1"
-                    onClick={() => setShowDropdown(false)}
-                  >
-                    <div className="flex justify-between items-center">
-                      <span className="font-medium">{item.title}</span>
-                      <span className="font-bold">${item.price.toLocaleString()}</span>
-                    </div>
-                  </Link>
-                ))}
+                {quickResults.map((item) =>
+                  item.type === "listing" ? (
+                    <Link
+                      key={`listing-${item.id}`}
+                      to={`/listings/${item.id}`}
+                      className="block py-2 px-3 hover:bg-[#B8860B] hover:text-white transition-all duration-200 mb-1"
+                      onClick={() => setShowDropdown(false)}
+                    >
+                      <div className="flex justify-between items-center">
+                        <span className="font-medium">{item.text}</span>
+                        {item.price != null && (
+                          <span className="font-bold">${item.price.toLocaleString()}</span>
+                        )}
+                      </div>
+                    </Link>
+                  ) : item.type === "category" ? (
+                    <Link
+                      key={`category-${item.text}`}
+                      to={`/search-results?category=${encodeURIComponent(item.text)}`}
+                      className="block py-2 px-3 hover:bg-[#B8860B] hover:text-white transition-all duration-200 mb-1"
+                      onClick={() => setShowDropdown(false)}
+                    >
+                      <div className="flex justify-between items-center">
+                        <span>{item.text}</span>
+                        <span className="text-sm opacity-75">category</span>
+                      </div>
+                    </Link>
+                  ) : (
+                    <button
+                      key={`${item.type}-${item.text}`}
+                      className="block w-full text-left py-2 px-3 hover:bg-[#B8860B] hover:text-white transition-all duration-200 mb-1"
+                      onClick={() => goToSearchResults(item.text)}
+                    >
+                      <div className="flex justify-between items-center">
+                        <span>{item.text}</span>
+                        {item.type === "location" && (
+                          <span className="text-sm opacity-75">location</span>
+                        )}
+                      </div>
+                    </button>
+                  )
+                )}
 
                 <button
                   className="block w-full text-left py-2 px-3 mt-2 text-[#B8860B] hover:bg-[#B8860B] hover:text-white font-semibold transition-all duration-200"
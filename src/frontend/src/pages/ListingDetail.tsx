@@ -17,6 +17,8 @@ interface ListingDetail {
   location: string;
   category: string;
   seller_id: number;
+  // users.id of the seller: who chat messages are addressed to
+  seller_user_id: number;
   images: { id: number; image_url: string; is_primary: boolean }[];
 }
 
@@ -152,7 +154,7 @@ export default function ListingDetail() {
         {showChat && isLoggedIn && !isOwner && (
           <ChatSidebar
             listingId={listing.id}
-            sellerId={listing.seller_id}
+            sellerUserId={listing.seller_user_id}
           />
         )}
       </div>
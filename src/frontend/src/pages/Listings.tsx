@@ -19,26 +19,40 @@ export interface Listing {
 
 export default function ListingsPage() {
   const [listings, setListings] = useState<Listing[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchParams] = useSearchParams();
   const category = searchParams.get("category") || "";
   const q = searchParams.get("q") || "";
 
   // ---- Fetch listings using NEW /search/listings ----
+  // Each call returns one page; next_cursor fetches the next
+  const fetchListings = async (cursor?: string) => {
+    const res = await api.get("/search/listings", {
+      params: { q, category, cursor },
+    });
+    setListings((prev) =>
+      cursor ? [...prev, ...res.data.results] : res.data.results
+    );
+    setNextCursor(res.data.next_cursor);
+  };
+
   useEffect(() => {
-    const fetchListings = async () => {
-      try {
-        const res = await api.get("/search/listings", {
-          params: { q, category },
-        });
-        setListings(res.data.results);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchListings();
+    setLoading(true);
+    fetchListings().finally(() => setLoading(false));
   }, [q, category]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      await fetchListings(nextCursor);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading)
     return (
       <>
@@ -110,6 +124,18 @@ export default function ListingsPage() {
               </div>
             ))
           )}
+
+          {nextCursor && (
+            <div className="text-center">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-6 py-2 border border-[#B8860B] text-[#B8860B] font-semibold hover:bg-[#B8860B] hover:text-white transition-colors disabled:opacity-50"
+              >
+                {loadingMore ? "Loading..." : "Load more listings"}
+              </button>
+            </div>
+          )}
         </div>
       </div>
       <Footer />
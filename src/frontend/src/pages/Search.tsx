@@ -24,29 +24,37 @@ export default function SearchResults() {
   const category = params.get("category") || "";
 
   const [results, setResults] = useState<Listing[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [sort, setSort] = useState("relevance");
 
   // --- Fetch search results ---
+  // Each call returns one page; next_cursor fetches the next
+  const fetchPage = async (cursor?: string) => {
+    const res = await api.get("/search/listings", {
+      params: { q: query, category, sort, cursor },
+    });
+    const page = Array.isArray(res.data.results) ? res.data.results : [];
+    setResults((prev) => (cursor ? [...prev, ...page] : page));
+    setNextCursor(res.data.next_cursor ?? null);
+  };
+
     useEffect(() => {
-        const loadResults = async () => {
-            setLoading(true);
-            try {
-            const res = await api.get("/search/listings", {
-                params: { q: query, category, sort },
-            });
-
-            // FIX 🔥
-            setResults(Array.isArray(res.data.results) ? res.data.results : []);
-
-            } finally {
-                setLoading(false);
-            }
-    };
-
-    loadResults();
+        setLoading(true);
+        fetchPage().finally(() => setLoading(false));
     }, [query, category, sort]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      await fetchPage(nextCursor);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
 
   return (
     <>
@@ -117,6 +125,19 @@ export default function SearchResults() {
             <ListingCard key={listing.id} listing={listing} />
           ))}
         </div>
+
+        {/* Next page */}
+        {!loading && nextCursor && (
+          <div className="text-center mt-8">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-4 py-2 border rounded hover:bg-gray-100 disabled:opacity-50"
+            >
+              {loadingMore ? "Loading…" : "Load more results"}
+            </button>
+          </div>
+        )}
       </div>
 
       <Footer />
@@ -16,15 +16,20 @@ interface Listing {
 
 export default function ListingsTab() {
   const [listings, setListings] = useState<Listing[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [editingListing, setEditingListing] = useState<Listing | null>(null);
 
-  const fetchListings = async () => {
-    setLoading(true);
+  // GET /listings/my-listings returns one page; next_cursor fetches the next
+  const fetchListings = async (cursor?: string) => {
+    if (!cursor) setLoading(true);
     try {
-      const res = await api.get("/listings/my-listings");
-      setListings(res.data);
+      const res = await api.get("/listings/my-listings", { params: { cursor } });
+      setListings(prev =>
+        cursor ? [...prev, ...res.data.results] : res.data.results
+      );
+      setNextCursor(res.data.next_cursor);
     } catch (err: any) {
       setError(err.response?.data?.detail || "Failed to fetch listings");
     } finally {
@@ -109,6 +114,16 @@ return (
       </div>
     ))}
 
+    {nextCursor && (
+      <Button
+        onClick={() => fetchListings(nextCursor)}
+        variant="outline"
+        className="w-full"
+      >
+        Load more listings
+      </Button>
+    )}
+
     <EditListingModal
       open={!!editingListing}
       onClose={() => setEditingListing(null)}
@@ -3,6 +3,7 @@ interface Props {
   activeListing: number | null;
   activePartner: number | null;
   onSelect: (listingId: number, partnerId: number | null) => void;
+  onLoadMore?: () => void;
 }
 
 export default function ChatList({
@@ -10,6 +11,7 @@ export default function ChatList({
   activeListing,
   activePartner,
   onSelect,
+  onLoadMore,
 }: Props) {
   return (
     <div className="h-full overflow-y-auto bg-white border-r border-[#9A7209] rounded-none">
@@ -48,11 +50,30 @@ export default function ChatList({
                     : "hover:bg-[#B8860B]/10 text-gray-800"
                 }`}
               >
-                {c.user_name}
+                <span className="flex items-center justify-between gap-2">
+                  <span className="truncate">{c.user_name}</span>
+                  {c.unread_count > 0 && (
+                    <span className="shrink-0 bg-[#B8860B] text-white text-xs px-2 py-0.5 rounded-none">
+                      {c.unread_count}
+                    </span>
+                  )}
+                </span>
+                <span className="block text-xs text-gray-500 truncate">
+                  {c.last_message}
+                </span>
               </button>
             ))}
         </div>
       ))}
+
+      {onLoadMore && (
+        <button
+          onClick={onLoadMore}
+          className="block w-full px-4 py-3 text-sm text-[#9A7209] hover:bg-[#B8860B]/10"
+        >
+          Load more conversations
+        </button>
+      )}
     </div>
   );
 }
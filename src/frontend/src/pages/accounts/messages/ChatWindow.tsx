@@ -20,24 +20,42 @@ export default function ChatWindow({
 }: Props) {
   const [messages, setMessages] = useState<ChatMessage[]>(initialMessages);
   const [text, setText] = useState("");
+  // id to pass as before_id for the next older page; null when none left
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
   const socketRef = useRef<WebSocket | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
+  // Scroll down for new messages only, not when older ones are prepended
+  const lastMessageId = messages[messages.length - 1]?.id;
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
-  }, [messages]);
+  }, [lastMessageId]);
+
+  const fetchPage = (beforeId?: string) =>
+    api.get(`/chat/${listingId}`, {
+      params: { user_id: chatPartnerId, before_id: beforeId },
+    });
+
+  const loadOlder = async () => {
+    if (!olderCursor) return;
+    const res = await fetchPage(olderCursor);
+    setMessages((prev) => [...res.data, ...prev]);
+    setOlderCursor(res.headers["x-next-before-id"] ?? null);
+  };
 
   useEffect(() => {
     const fetchChat = async () => {
       try {
-        const res = await api.get(`/chat/${listingId}`);
-        const filtered = res.data.filter(
-          (m: ChatMessage) =>
-            m.sender_id === chatPartnerId || m.receiver_id === chatPartnerId
-        );
-        setMessages(filtered);
+        // Latest page first; older pages load on demand
+        const res = await fetchPage();
+        setMessages(res.data);
+        setOlderCursor(res.headers["x-next-before-id"] ?? null);
+        await api.post(`/chat/${listingId}/read`, null, {
+          params: { user_id: chatPartnerId },
+        });
       } catch {
         setMessages([]);
+        setOlderCursor(null);
       }
     };
 
@@ -81,6 +99,14 @@ export default function ChatWindow({
     <div className="h-full flex flex-col bg-white rounded-none">
       {/* MESSAGES */}
       <div className="flex-1 overflow-y-auto p-3 sm:p-4 space-y-3 bg-[#fdfaf4]">
+        {olderCursor && (
+          <button
+            onClick={loadOlder}
+            className="block mx-auto text-xs text-[#9A7209] hover:underline"
+          >
+            Load earlier messages
+          </button>
+        )}
         {messages.map((m) => {
           const isMe = m.sender_id === currentUser.id;
 
@@ -4,26 +4,66 @@ import ChatList from "./ChatList";
 import ChatWindow from "./ChatWindow";
 import { useAuth } from "@/context/useAuth";
 
+export interface ChatMessage {
+  id: number;
+  sender_id: number;
+  receiver_id: number;
+  listing_id: number;
+  message: string;
+  created_at: string;
+}
+
+// One inbox entry from GET /chat/messages
+export interface Conversation {
+  id: number;
+  listing_id: number;
+  listing_title: string;
+  user_id: number;
+  user_name: string;
+  user_image: string | null;
+  last_message: string;
+  last_sender_id: number;
+  last_message_at: string;
+  unread_count: number;
+}
+
 export default function MessagesTab() {
   const { user } = useAuth();
 
-  const [chatData, setChatData] = useState<any[]>([]);
+  // Inbox entries, most recent first; threads load in ChatWindow
+  const [conversations, setConversations] = useState<Conversation[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [activeListing, setActiveListing] = useState<number | null>(null);
   const [activePartner, setActivePartner] = useState<number | null>(null);
 
-  const fetchMessages = async () => {
-    const res = await api.get("/chat/messages");
-    setChatData(res.data);
+  const fetchConversations = async (cursor?: string) => {
+    const res = await api.get("/chat/messages", { params: { cursor } });
+    setConversations((prev) =>
+      cursor ? [...prev, ...res.data.results] : res.data.results
+    );
+    setNextCursor(res.data.next_cursor);
   };
 
   useEffect(() => {
-    fetchMessages();
+    fetchConversations();
   }, []);
 
-  const selectedListing = chatData.find((l) => l.listing_id === activeListing);
-  const selectedChat =
-    selectedListing?.chats.find((c: any) => c.user_id === activePartner) ||
-    null;
+  // ChatList groups conversations by listing
+  const chatData = groupByListing(conversations);
+
+  const selectConversation = (listingId: number | null, partnerId: number | null) => {
+    setActiveListing(listingId);
+    setActivePartner(partnerId);
+    if (listingId && partnerId) {
+      setConversations((prev) =>
+        prev.map((c) =>
+          c.listing_id === listingId && c.user_id === partnerId
+            ? { ...c, unread_count: 0 }
+            : c
+        )
+      );
+    }
+  };
 
   return (
     <div className="border border-[#9A7209] bg-[#B8860B]/10 h-[75vh] rounded-none flex flex-col lg:flex-row">
@@ -34,8 +74,7 @@ export default function MessagesTab() {
           value={`${activeListing || ""}-${activePartner || ""}`}
           onChange={(e) => {
             const [listingId, partnerId] = e.target.value.split("-");
-            setActiveListing(Number(listingId) || null);
-            setActivePartner(Number(partnerId) || null);
+            selectConversation(Number(listingId) || null, Number(partnerId) || null);
           }}
         >
           <option value="">Select Conversation</option>
@@ -58,10 +97,8 @@ export default function MessagesTab() {
           chatData={chatData}
           activeListing={activeListing}
           activePartner={activePartner}
-          onSelect={(l, p) => {
-            setActiveListing(l);
-            setActivePartner(p);
-          }}
+          onSelect={selectConversation}
+          onLoadMore={nextCursor ? () => fetchConversations(nextCursor) : undefined}
         />
       </div>
 
@@ -72,7 +109,7 @@ export default function MessagesTab() {
             listingId={activeListing}
             chatPartnerId={activePartner}
             currentUser={user}
-            initialMessages={selectedChat?.messages || []}
+            initialMessages={[]}
           />
         ) : (
           <div className="flex h-full items-center justify-center text-gray-500 text-lg">
@@ -83,3 +120,18 @@ export default function MessagesTab() {
     </div>
   );
 }
+
+function groupByListing(conversations: Conversation[]) {
+  const listings: any[] = [];
+  const byId = new Map<number, any>();
+  for (const c of conversations) {
+    let listing = byId.get(c.listing_id);
+    if (!listing) {
+      listing = { listing_id: c.listing_id, listing_title: c.listing_title, chats: [] };
+      byId.set(c.listing_id, listing);
+      listings.push(listing);
+    }
+    listing.chats.push(c);
+  }
+  return listings;
+}